@@ -1,4 +1,5 @@
 #include <bits/stdc++.h>
+#include <unistd.h>
 #ifdef _OPENMP
 #include <omp.h>
 #endif
@@ -8,8 +9,52 @@ using vi = vector<int>;
 using population_element = pair<vi, double>;
 #define FOR(i,a,b) for(int i = a ; i < b ; i++)
 
-static std::mt19937 rng(
-    (uint32_t)chrono::high_resolution_clock::now().time_since_epoch().count());
+/* <--- Random streams: every draw comes from a SplitMix64 generator keyed by (run seed,
+   island, generation, chunk), never from shared state, so a GA run is reproducible
+   bit for bit from its seed whatever the number of OpenMP threads ---> */
+inline uint64_t mix64(uint64_t z) {
+  z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+  z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+  return z ^ (z >> 31);
+}
+
+struct Rng {
+  using result_type = uint64_t;
+  uint64_t state;
+  explicit Rng(uint64_t seed) : state(seed) {}
+  static constexpr result_type min() { return 0; }
+  static constexpr result_type max() { return numeric_limits<uint64_t>::max(); }
+  result_type operator()() { return mix64(state += 0x9e3779b97f4a7c15ULL); }
+};
+
+Rng stream_rng(uint64_t seed, uint64_t island, uint64_t generation, uint64_t chunk) {
+  return Rng(mix64(mix64(mix64(mix64(seed) ^ island) ^ generation) ^ chunk));
+}
+
+// Seed for runs that did not ask for one (0 means "pick one"). 53 bits, so the
+// reported seed survives a round trip through a JSON number.
+uint64_t fresh_seed() {
+  uint64_t t = (uint64_t)chrono::high_resolution_clock::now().time_since_epoch().count();
+  return (mix64(t ^ ((uint64_t)getpid() << 32)) & ((1ULL << 53) - 1)) | 1;
+}
+
+// Requested seeds must survive the same round trip: integers in [0, 2^53) only.
+// NO_SEED (outside that range) asks for a fresh seed, so 0 is an ordinary seed.
+const uint64_t SEED_LIMIT = 1ULL << 53;
+const uint64_t NO_SEED = ~0ULL;
+const char *const SEED_ERROR = "seed must be an integer in [0, 2^53)";
+
+bool parse_seed(const char *text, uint64_t &seed) {
+  if (!isdigit((unsigned char)*text))
+    return false;   // strtoull would accept (and wrap) a leading '-'
+  char *end;
+  errno = 0;
+  unsigned long long value = strtoull(text, &end, 10);
+  if (*end || errno == ERANGE || value >= SEED_LIMIT)
+    return false;
+  seed = value;
+  return true;
+}
 
 /*<---- Per-light precomputed constants ---->*/
 struct LightConstants 
@@ -70,13 +115,29 @@ void normalize_greens(vi &greens, int cycle_time, int green_min,
   }
 }
 
+// Seeds (e.g. previous plans for the same intersection) are clamped into range and
+// placed in the population first; the rest is filled with random allocations.
 vector<population_element>
 initialize_population(int pop_size, int num_lights, int green_min,
                       int green_max, int cycle_time,
-                      const vector<LightConstants> &lcs) {
+                      const vector<LightConstants> &lcs, Rng &rng,
+                      const vector<vi> &seeds = {}) {
   vector<population_element> population;
   population.reserve(pop_size);
 
+  for (const vi &seed : seeds) {
+    if ((int)seed.size() != num_lights || (int)population.size() >= pop_size)
+      continue;
+    vi green_times(num_lights);
+    FOR(i, 0, num_lights)
+      green_times[i] = max(green_min, min(green_max, seed[i]));
+    normalize_greens(green_times, cycle_time, green_min, green_max);
+    double total_delay = 0.0;
+    FOR(i, 0, num_lights)
+      total_delay += fitness_function((double)cycle_time, (double)green_times[i], lcs[i]);
+    population.emplace_back(std::move(green_times), total_delay);
+  }
+
   uniform_int_distribution<int> green_dist(green_min, green_max);
 
   int attempts = 0;
@@ -106,7 +167,7 @@ initialize_population(int pop_size, int num_lights, int green_min,
 }
 
 // Tournament Selection: faster (O(k)) and stable pressure
-int tournament_selection(const vector<population_element> &population, int k, mt19937 &local_rng) {
+int tournament_selection(const vector<population_element> &population, int k, Rng &local_rng) {
   int n = (int)population.size();
   uniform_int_distribution<int> dist(0, n - 1);
   
@@ -123,13 +184,12 @@ int tournament_selection(const vector<population_element> &population, int k, mt
   return best_idx;
 }
 
-pair<vi, vi> crossover(const vi &p1, const vi &p2, mt19937 &local_rng) {
+pair<vi, vi> crossover(const vi &p1, const vi &p2, Rng &local_rng) {
   int num_lights = (int)p1.size();
   if (num_lights <= 1)
     return {p1, p2};
   uniform_int_distribution<int> point_dist(1, num_lights - 1);
-  int point =
-      point_dist(rng); // using global rng for simplicity or local_rng if needed
+  int point = point_dist(local_rng);
   vi c1 = p1, c2 = p2;
   for (int i = point; i < num_lights; ++i) {
     swap(c1[i], c2[i]);
@@ -138,7 +198,7 @@ pair<vi, vi> crossover(const vi &p1, const vi &p2, mt19937 &local_rng) {
 }
 
 vi mutate(vi mutated, double mutation_rate, int green_min, int green_max,
-          mt19937 &local_rng) {
+          Rng &local_rng) {
   int num_lights = (int)mutated.size();
   uniform_real_distribution<double> prob_dist(0.0, 1.0);
   uniform_int_distribution<int> sign_dist(0, 1);
@@ -154,7 +214,7 @@ vi mutate(vi mutated, double mutation_rate, int green_min, int green_max,
   return mutated;
 }
 
-vi inversion(vi individual, mt19937 &local_rng) {
+vi inversion(vi individual, Rng &local_rng) {
   int num_lights = (int)individual.size();
   if (num_lights < 2)
     return individual;
@@ -167,48 +227,129 @@ vi inversion(vi individual, mt19937 &local_rng) {
   return individual;
 }
 
-pair<population_element, vector<double>>
-genetic_algorithm(int pop_size, int num_lights, int max_iter, int green_min,
-                  int green_max, int cycle_time, double mutation_rate,
-                  double beta, const vector<LightConstants> &lcs,
-                  bool verbose = false) {
-  vector<population_element> population = initialize_population(
-      pop_size, num_lights, green_min, green_max, cycle_time, lcs);
+/* <--- How a solve ended: GA iterations run, whether it converged (early stop or
+   exact optimum), whether the deadline cut it short, how many seed solutions were
+   injected into the initial population and the RNG seed that reproduces the run ---> */
+struct SolveInfo {
+  int iterations = 0;
+  bool converged = false;
+  bool deadline_hit = false;
+  int seeded = 0;
+  uint64_t seed = 0;
+};
+
+/* <--- Problem setup shared by the CLI and the library API. The GA population is
+   split into `islands` subpopulations that evolve independently and pass their best
+   `migrants` around a ring every `migration_interval` generations; NO_SEED picks a
+   fresh seed per run ---> */
+struct OptimizerConfig {
+  int pop_size = 400;
+  int max_iter = 25;
+  int green_min = 10;
+  int green_max = 60;
+  int cycle_time = 160 - 12;
+  double mutation_rate = 0.15;
+  double beta = 4.0;
+  uint64_t seed = NO_SEED;
+  int islands = 1;
+  int migration_interval = 5;
+  int migrants = 2;
+};
+
+// Returns the best solution and the best-so-far solution after each iteration
+// (index 0 is the best of the initial population). With deadline_ms > 0 no new
+// iteration starts once the deadline has passed; the best so far is returned.
+// seeds warm-start the initial population of every island.
+pair<population_element, vector<population_element>>
+genetic_algorithm(const OptimizerConfig &cfg, int num_lights,
+                  const vector<LightConstants> &lcs, bool verbose = false,
+                  double deadline_ms = 0.0, SolveInfo *info = nullptr,
+                  const vector<vi> &seeds = {}) {
+  auto deadline = chrono::steady_clock::now() +
+                  chrono::duration_cast<chrono::steady_clock::duration>(
+                      chrono::duration<double, milli>(deadline_ms));
+  SolveInfo local_info;
+  SolveInfo &run = info ? *info : local_info;
+  run = SolveInfo();
+  run.seed = cfg.seed == NO_SEED ? fresh_seed() : cfg.seed;
+  const int pop_size = cfg.pop_size, max_iter = cfg.max_iter;
+  const int green_min = cfg.green_min, green_max = cfg.green_max, cycle_time = cfg.cycle_time;
+  const double mutation_rate = cfg.mutation_rate;
 
-  population_element best_sol = population.front();
-  vector<double> best_delays;
-  best_delays.reserve(max_iter + 1);
-  best_delays.push_back(best_sol.second);
+  // Islands of at least 2 individuals; the remainder goes to the first islands
+  const int islands = max(1, min(cfg.islands, pop_size / 2));
+  vector<int> island_size(islands, pop_size / islands);
+  FOR(k, 0, pop_size % islands)
+    island_size[k]++;
+
+  vector<vector<population_element>> pops(islands);
+  FOR(k, 0, islands) {
+    Rng init_rng = stream_rng(run.seed, k, 0, 0);
+    pops[k] = initialize_population(island_size[k], num_lights, green_min, green_max,
+                                    cycle_time, lcs, init_rng, seeds);
+  }
+  for (const vi &seed : seeds)
+    run.seeded += (int)seed.size() == num_lights && run.seeded < island_size[0];
+
+  auto island_best = [&]() {
+    int best = 0;
+    FOR(k, 1, islands)
+      if (pops[k].front().second < pops[best].front().second)
+        best = k;
+    return pops[best].front();
+  };
+  population_element best_sol = island_best();
+  vector<population_element> history;
+  history.reserve(max_iter + 1);
+  history.push_back(best_sol);
 
   if (verbose) {
     cerr << "[ga] pop_size=" << pop_size << " max_iter=" << max_iter
          << " green_min=" << green_min << " green_max=" << green_max
-         << " cycle_time=" << cycle_time << "\n";
+         << " cycle_time=" << cycle_time << " seed=" << run.seed
+         << " islands=" << islands << "\n";
     cerr << "[ga] starting best delay=" << best_sol.second << "\n";
+    if (run.seeded)
+      cerr << "[ga] warm start: " << run.seeded << " seed solution(s)\n";
   }
 
   // Early stopping: stop if no improvement for N iterations
   const int EARLY_STOP_PATIENCE = 5;
   int no_improvement_count = 0;
-  double prev_best = best_sol.second;
   const int TOURNAMENT_SIZE = 4; // Selection pressure
+  // Offspring pairs per work item. Work items, not threads, own the RNG streams,
+  // so the thread count only changes who computes a chunk, never its result.
+  const int CHUNK_PAIRS = 16;
 
   for (int iter = 0; iter < max_iter; ++iter) {
+    if (deadline_ms > 0 && chrono::steady_clock::now() >= deadline) {
+      run.deadline_hit = true;
+      if (verbose) {
+        cerr << "[ga] Deadline of " << deadline_ms << " ms reached after "
+             << iter << " iterations\n";
+      }
+      break;
+    }
     // Tournament selection does not require global preparation (O(N))
-    vector<population_element> next_gen(pop_size);
-
-    // Elitism: carry over the best
-    next_gen[0] = population[0];
+    vector<vector<population_element>> next_gen(islands);
+    vector<pair<int, int>> work;   // (island, first child index)
+    FOR(k, 0, islands) {
+      next_gen[k].resize(island_size[k]);
+      // Elitism: carry over the island's best
+      next_gen[k][0] = pops[k][0];
+      for (int i = 1; i < island_size[k]; i += 2 * CHUNK_PAIRS)
+        work.emplace_back(k, i);
+    }
 
-#pragma omp parallel
-    {
-      mt19937 local_rng(rng() + 100 * (iter + 1));
-#ifdef _OPENMP
-      local_rng.seed(rng() + 100 * (iter + 1) + 7 * omp_get_thread_num());
-#endif
+#pragma omp parallel for schedule(static)
+    for (int w = 0; w < (int)work.size(); ++w) {
+      const int k = work[w].first, first = work[w].second;
+      const vector<population_element> &population = pops[k];
+      vector<population_element> &next = next_gen[k];
+      const int n = island_size[k];
+      Rng local_rng = stream_rng(run.seed, k, iter + 1, first);
 
-#pragma omp for schedule(static)
-      for (int i = 1; i < pop_size; i += 2) {
+      for (int i = first; i < min(n, first + 2 * CHUNK_PAIRS); i += 2) {
         int i1 = tournament_selection(population, TOURNAMENT_SIZE, local_rng);
         int i2 = tournament_selection(population, TOURNAMENT_SIZE, local_rng);
 
@@ -221,36 +362,58 @@ genetic_algorithm(int pop_size, int num_lights, int max_iter, int green_min,
         double d1 = 0;
         for (int j = 0; j < num_lights; j++)
           d1 += fitness_function(cycle_time, c1[j], lcs[j]);
-        next_gen[i] = {std::move(c1), d1};
+        next[i] = {std::move(c1), d1};
 
-        if (i + 1 < pop_size) {
+        if (i + 1 < n) {
           vi c2 = mutate(children.second, mutation_rate, green_min, green_max,
                          local_rng);
           normalize_greens(c2, cycle_time, green_min, green_max);
           double d2 = 0;
           for (int j = 0; j < num_lights; j++)
             d2 += fitness_function(cycle_time, c2[j], lcs[j]);
-          next_gen[i + 1] = {std::move(c2), d2};
+          next[i + 1] = {std::move(c2), d2};
         }
       }
     }
 
-    population = std::move(next_gen);
-    
+    pops = std::move(next_gen);
+
+    // Migration: each island's best replace the worst of the next island on the ring
+    const int migrants = min(cfg.migrants, *min_element(island_size.begin(), island_size.end()) / 2);
+    if (islands > 1 && migrants > 0 && cfg.migration_interval > 0 &&
+        (iter + 1) % cfg.migration_interval == 0) {
+      auto by_delay = [](const population_element &a, const population_element &b) {
+        return a.second < b.second;
+      };
+      vector<vector<population_element>> emigrants(islands);
+      FOR(k, 0, islands) {
+        partial_sort(pops[k].begin(), pops[k].begin() + migrants, pops[k].end(), by_delay);
+        emigrants[k].assign(pops[k].begin(), pops[k].begin() + migrants);
+      }
+      FOR(k, 0, islands) {
+        vector<population_element> &dest = pops[(k + 1) % islands];
+        nth_element(dest.begin(), dest.end() - migrants, dest.end(), by_delay);
+        copy(emigrants[k].begin(), emigrants[k].end(), dest.end() - migrants);
+      }
+    }
+
     // Optimization: Instead of full sort (O(N log N)), just find the best for elitism (O(N))
-    auto best_it = std::min_element(population.begin(), population.end(),
-         [](const population_element &a, const population_element &b) {
-           return a.second < b.second;
-         });
-
-    // Swap best to front so it's preserved by elitism in next iter
-    if (best_it != population.begin()) {
-        std::iter_swap(population.begin(), best_it);
+    FOR(k, 0, islands) {
+      auto best_it = std::min_element(pops[k].begin(), pops[k].end(),
+           [](const population_element &a, const population_element &b) {
+             return a.second < b.second;
+           });
+
+      // Swap best to front so it's preserved by elitism in next iter
+      if (best_it != pops[k].begin()) {
+          std::iter_swap(pops[k].begin(), best_it);
+      }
     }
-    
+
     // Update global best if needed
-    if (population.front().second < best_sol.second) {
-      best_sol = population.front();
+    population_element generation_best = island_best();
+    if (generation_best.second < best_sol.second) {
+      best_sol = generation_best;
       no_improvement_count = 0;
       if (verbose) {
         cerr << "[iter " << iter + 1 << "] new best delay = " << best_sol.second
@@ -265,7 +428,8 @@ genetic_algorithm(int pop_size, int num_lights, int max_iter, int green_min,
              << EARLY_STOP_PATIENCE << ")\n";
       }
     }
-    best_delays.push_back(best_sol.second);
+    history.push_back(best_sol);
+    run.iterations = iter + 1;
 
     /*if we already got the answer then there is no point of waiting for better answer in this case sot for all */
     if (no_improvement_count >= EARLY_STOP_PATIENCE) {
@@ -274,25 +438,667 @@ genetic_algorithm(int pop_size, int num_lights, int max_iter, int green_min,
              << " (no improvement for " << EARLY_STOP_PATIENCE
              << " iterations)\n";
       }
+      run.converged = true;
       break;
     }
   }
 
-  return {best_sol, best_delays};
+  return {best_sol, history};
+}
+
+/* <--- Exact solver: the delay is a sum of independent per-light terms under a shared
+   cycle budget, so a DP over (light, green time used so far) finds the optimum ---> */
+population_element exact_solver(int num_lights, int green_min, int green_max,
+                                int cycle_time, const vector<LightConstants> &lcs,
+                                bool verbose = false) {
+  const double INF = numeric_limits<double>::infinity();
+  // best[i][b]: minimal delay of lights 0..i-1 using exactly b seconds of green
+  vector<vector<double>> best(num_lights + 1, vector<double>(cycle_time + 1, INF));
+  vector<vector<int>> choice(num_lights + 1, vector<int>(cycle_time + 1, -1));
+  best[0][0] = 0.0;
+
+  for (int i = 0; i < num_lights; ++i) {
+    vector<double> cost(green_max + 1);
+    for (int g = green_min; g <= green_max; ++g)
+      cost[g] = fitness_function((double)cycle_time, (double)g, lcs[i]);
+
+    for (int b = 0; b <= cycle_time; ++b) {
+      if (best[i][b] == INF)
+        continue;
+      for (int g = green_min; g <= green_max && b + g <= cycle_time; ++g) {
+        double d = best[i][b] + cost[g];
+        // Strict < keeps the smallest green on ties, so results are deterministic
+        if (d < best[i + 1][b + g]) {
+          best[i + 1][b + g] = d;
+          choice[i + 1][b + g] = g;
+        }
+      }
+    }
+  }
+
+  int used = int(min_element(best[num_lights].begin(), best[num_lights].end()) -
+                 best[num_lights].begin());
+  double delay = best[num_lights][used];
+  if (delay == INF)
+    return {vi(), INF};
+
+  vi greens(num_lights);
+  for (int i = num_lights, b = used; i > 0; --i) {
+    greens[i - 1] = choice[i][b];
+    b -= choice[i][b];
+  }
+
+  if (verbose) {
+    cerr << "[exact] lights=" << num_lights << " green_min=" << green_min
+         << " green_max=" << green_max << " cycle_time=" << cycle_time
+         << " states=" << num_lights * (cycle_time + 1) << "\n";
+    cerr << "[exact] optimal delay=" << delay << " green used=" << used << "\n";
+  }
+  return {greens, delay};
+}
+
+vector<LightConstants> make_light_constants(const vi &cars) {
+  vector<LightConstants> lcs(cars.size());
+  FOR(i, 0, (int)cars.size()) {
+    lcs[i].x = double(20 - cars[i]) / 20.0;
+    lcs[i].c = 20.0;
+    double rad = (lcs[i].x - 1.0) + (lcs[i].x - 1.0) * (lcs[i].x - 1.0) +
+                 ((16.0 * lcs[i].x) / lcs[i].c);
+    lcs[i].a2_ri1 = 173.0 * (lcs[i].x * lcs[i].x) * sqrt(max(0.0, rad));
+  }
+  return lcs;
+}
+
+// Runs one solver; history gets the best-so-far trace (GA) or the optimum (exact).
+// An empty result vector means no feasible allocation exists. seeds only affect the GA.
+population_element solve(const vi &cars, bool exact, const OptimizerConfig &cfg,
+                         bool verbose, vector<population_element> *history = nullptr,
+                         double deadline_ms = 0.0, SolveInfo *info = nullptr,
+                         const vector<vi> &seeds = {}) {
+  vector<LightConstants> lcs = make_light_constants(cars);
+  int num_lights = (int)cars.size();
+  // normalize_greens cannot terminate when even all-minimum greens exceed the cycle
+  if (cfg.green_min > cfg.green_max || num_lights * cfg.green_min > cfg.cycle_time)
+    return {vi(), numeric_limits<double>::infinity()};
+  if (exact) {
+    population_element best = exact_solver(num_lights, cfg.green_min, cfg.green_max,
+                                           cfg.cycle_time, lcs, verbose);
+    if (history && !best.first.empty())
+      history->assign(1, best);
+    if (info)
+      *info = SolveInfo{0, true, false, 0, 0};
+    return best;
+  }
+  auto res = genetic_algorithm(cfg, num_lights, lcs, verbose, deadline_ms, info, seeds);
+  if (history)
+    *history = std::move(res.second);
+  return res.first;
+}
+
+/* <--- Batch solving: independent count vectors spread over the OpenMP threads (each
+   GA then runs single-threaded inside its vector). Each vector's seed is derived from
+   the batch seed and its input index, so a batch is reproducible however it is split
+   into calls, and any item can be replayed alone with the seed it reports ---> */
+uint64_t batch_item_seed(uint64_t batch_seed, size_t index) {
+  return (mix64(batch_seed ^ ((index + 1) * 0x9e3779b97f4a7c15ULL)) & ((1ULL << 53) - 1)) | 1;
+}
+
+void solve_batch(const vector<vi> &cars, const vector<size_t> &indices, bool exact,
+                 const OptimizerConfig &cfg, vector<population_element> &best,
+                 vector<SolveInfo> &infos) {
+  best.assign(cars.size(), population_element());
+  infos.assign(cars.size(), SolveInfo());
+#pragma omp parallel for schedule(dynamic)
+  for (int i = 0; i < (int)cars.size(); ++i) {
+    OptimizerConfig item = cfg;
+    item.seed = batch_item_seed(cfg.seed, indices[i]);
+    best[i] = solve(cars[i], exact, item, false, nullptr, 0.0, &infos[i]);
+  }
+}
+
+/* <--- C API for in-process callers (build with -DALGO_LIBRARY -shared -fPIC) --->
+   Fills greens[num_lights] and *delay. The trace holds the best-so-far delay and
+   greens per GA iteration (trace_greens is trace_capacity x num_lights); *trace_len
+   is the number of entries written. config receives pop_size, max_iter, green_min,
+   green_max, cycle_time. deadline_ms > 0 bounds the GA (best so far is returned);
+   seeds holds num_seeds warm-start allocations (num_seeds x num_lights);
+   *rng_seed selects the GA's random streams (NO_SEED = fresh) and receives the seed used;
+   islands splits the GA population (<= 1 = one population);
+   info receives iterations, converged, deadline_hit, seeded.
+   Returns 0 on success, 1 on bad input, 2 if infeasible. */
+extern "C" int algo_solve(const int *cars, int num_lights, int exact, int *greens,
+                          double *delay, double *trace_delays, int *trace_greens,
+                          int trace_capacity, int *trace_len, int *config,
+                          long long *solve_us, double deadline_ms, const int *seeds,
+                          int num_seeds, unsigned long long *rng_seed, int islands,
+                          int *info) {
+  if (cars == nullptr || num_lights <= 0 || greens == nullptr || delay == nullptr)
+    return 1;
+  vi lane_cars(cars, cars + num_lights);
+  for (int &c : lane_cars)
+    c = max(0, c);
+  vector<vi> seed_greens;
+  if (seeds)
+    FOR(k, 0, num_seeds)
+      seed_greens.emplace_back(seeds + k * num_lights, seeds + (k + 1) * num_lights);
+
+  OptimizerConfig cfg;
+  cfg.seed = rng_seed ? *rng_seed : NO_SEED;
+  cfg.islands = max(1, islands);
+  vector<population_element> history;
+  SolveInfo run;
+  auto solve_start = chrono::steady_clock::now();
+  population_element best = solve(lane_cars, exact != 0, cfg, false, &history, deadline_ms, &run,
+                                  seed_greens);
+  if (rng_seed)
+    *rng_seed = run.seed;
+  if (solve_us)
+    *solve_us = chrono::duration_cast<chrono::microseconds>(
+                    chrono::steady_clock::now() - solve_start).count();
+  if (best.first.empty())
+    return 2;
+
+  copy(best.first.begin(), best.first.end(), greens);
+  *delay = best.second;
+  if (info) {
+    info[0] = run.iterations;
+    info[1] = run.converged;
+    info[2] = run.deadline_hit;
+    info[3] = run.seeded;
+  }
+  if (config) {
+    int values[5] = {cfg.pop_size, cfg.max_iter, cfg.green_min, cfg.green_max, cfg.cycle_time};
+    copy(values, values + 5, config);
+  }
+  int n = 0;
+  if (trace_delays && trace_len) {
+    n = min((int)history.size(), max(0, trace_capacity));
+    FOR(k, 0, n) {
+      trace_delays[k] = history[k].second;
+      if (trace_greens)
+        copy(history[k].first.begin(), history[k].first.end(), trace_greens + k * num_lights);
+    }
+    *trace_len = n;
+  }
+  return 0;
+}
+
+/* Batch variant: cars is count x num_lights and indices[count] their input positions
+   (nullptr = 0..count-1). Fills greens (count x num_lights), delays[count], optionally
+   iterations[count] and item_seeds[count], and status[count] (0 ok, 2 infeasible).
+   rng_seed is the batch seed (NO_SEED = fresh; pass the same one for every call of a batch).
+   Returns 0 on success, 1 on bad input. */
+extern "C" int algo_solve_batch(const int *cars, int count, int num_lights, int exact,
+                                const int *indices, int *greens, double *delays,
+                                int *iterations, unsigned long long *item_seeds,
+                                unsigned long long rng_seed, int islands, int *status) {
+  if (cars == nullptr || count < 0 || num_lights <= 0 || greens == nullptr ||
+      delays == nullptr || status == nullptr)
+    return 1;
+  vector<vi> batch(count);
+  vector<size_t> positions(count);
+  FOR(i, 0, count) {
+    batch[i].assign(cars + i * num_lights, cars + (i + 1) * num_lights);
+    for (int &c : batch[i])
+      c = max(0, c);
+    positions[i] = indices ? (size_t)indices[i] : (size_t)i;
+  }
+  OptimizerConfig cfg;
+  cfg.seed = rng_seed == NO_SEED ? fresh_seed() : rng_seed;
+  cfg.islands = max(1, islands);
+  vector<population_element> best;
+  vector<SolveInfo> infos;
+  solve_batch(batch, positions, exact != 0, cfg, best, infos);
+  FOR(i, 0, count) {
+    status[i] = best[i].first.empty() ? 2 : 0;
+    if (status[i] == 0)
+      copy(best[i].first.begin(), best[i].first.end(), greens + i * num_lights);
+    delays[i] = best[i].second;
+    if (iterations)
+      iterations[i] = infos[i].iterations;
+    if (item_seeds)
+      item_seeds[i] = infos[i].seed;
+  }
+  return 0;
+}
+
+#ifndef ALGO_LIBRARY
+/* <--- Server mode (--server): one JSON request per line on stdin, one JSON result per
+   line on stdout, in order. Request fields: id (echoed), op ("solve" | "ping"),
+   cars [N,S,W,E], solver ("ga" | "exact"), trace (bool), deadline_ms, seeds (warm-start
+   allocations flattened into one list, 4 greens each) and optional GA parameters
+   pop_size, max_iter, green_min, green_max, cycle_time, mutation_rate, seed, islands,
+   migration_interval, migrants. ---> */
+struct JsonField {
+  string raw;        // Token as written (used to echo ids)
+  string str;        // Decoded string value
+  vector<double> list;
+  double num = 0.0;
+  char kind = 0;     // 's' string, 'n' number, 'b' bool, 'a' array, 'z' null
+};
+
+// Flat objects only: string, number, bool, null and number-array values
+bool parse_flat_json(const string &line, map<string, JsonField> &out, string &err) {
+  size_t i = 0;
+  auto ws = [&]() { while (i < line.size() && isspace((unsigned char)line[i])) ++i; };
+  auto parse_string = [&](string &dst) -> bool {
+    if (i >= line.size() || line[i] != '"') return false;
+    for (++i; i < line.size() && line[i] != '"'; ++i) {
+      if (line[i] == '\\' && i + 1 < line.size()) ++i;
+      dst += line[i];
+    }
+    if (i >= line.size()) return false;
+    ++i;
+    return true;
+  };
+  auto parse_number = [&](double &dst) -> bool {
+    const char *start = line.c_str() + i;
+    char *end = nullptr;
+    dst = strtod(start, &end);
+    if (end == start) return false;
+    i += end - start;
+    return true;
+  };
+
+  ws();
+  if (i >= line.size() || line[i] != '{') { err = "expected a JSON object"; return false; }
+  ++i;
+  ws();
+  if (i < line.size() && line[i] == '}') return true;
+  while (i < line.size()) {
+    string key;
+    ws();
+    if (!parse_string(key)) { err = "expected a key"; return false; }
+    ws();
+    if (i >= line.size() || line[i] != ':') { err = "expected ':'"; return false; }
+    ++i;
+    ws();
+    JsonField f;
+    size_t start = i;
+    if (i < line.size() && line[i] == '"') {
+      f.kind = 's';
+      if (!parse_string(f.str)) { err = "bad string for " + key; return false; }
+    } else if (i < line.size() && line[i] == '[') {
+      f.kind = 'a';
+      ++i;
+      ws();
+      while (i < line.size() && line[i] != ']') {
+        double v;
+        if (!parse_number(v)) { err = "expected numbers in " + key; return false; }
+        f.list.push_back(v);
+        ws();
+        if (i < line.size() && line[i] == ',') { ++i; ws(); }
+      }
+      if (i >= line.size()) { err = "unterminated array"; return false; }
+      ++i;
+    } else if (line.compare(i, 4, "true") == 0 || line.compare(i, 5, "false") == 0) {
+      f.kind = 'b';
+      f.num = line[i] == 't';
+      i += line[i] == 't' ? 4 : 5;
+    } else if (line.compare(i, 4, "null") == 0) {
+      f.kind = 'z';
+      i += 4;
+    } else {
+      f.kind = 'n';
+      if (!parse_number(f.num)) { err = "bad value for " + key; return false; }
+    }
+    f.raw = line.substr(start, i - start);
+    out[key] = f;
+    ws();
+    if (i < line.size() && line[i] == ',') { ++i; continue; }
+    if (i < line.size() && line[i] == '}') return true;
+    err = "expected ',' or '}'";
+    return false;
+  }
+  err = "unterminated object";
+  return false;
+}
+
+string json_escape(const string &s) {
+  string out;
+  for (char ch : s) {
+    if (ch == '"' || ch == '\\') out += '\\';
+    if (ch == '\n') { out += "\\n"; continue; }
+    out += ch;
+  }
+  return out;
+}
+
+string serve_one(const string &line) {
+  map<string, JsonField> req;
+  string err;
+  bool ok = parse_flat_json(line, req, err);
+  string id = req.count("id") ? req["id"].raw : "null";
+  ostringstream out;
+  out << setprecision(12) << "{\"id\":" << id;
+  auto fail = [&](const string &msg) {
+    out << ",\"error\":\"" << json_escape(msg) << "\"}";
+    return out.str();
+  };
+  if (!ok)
+    return fail("bad request: " + err);
+
+  string op = req.count("op") ? req["op"].str : "solve";
+  if (op == "ping") {
+    out << ",\"ok\":true,\"pid\":" << getpid() << "}";
+    return out.str();
+  }
+  if (op != "solve")
+    return fail("unknown op: " + op);
+
+  if (!req.count("cars") || req["cars"].kind != 'a' || req["cars"].list.size() != 4)
+    return fail("cars must be a list of 4 counts");
+  vi cars;
+  for (double c : req["cars"].list)
+    cars.push_back(max(0, (int)c));
+
+  string solver = req.count("solver") ? req["solver"].str : "ga";
+  if (solver != "ga" && solver != "exact")
+    return fail("unknown solver: " + solver);
+
+  OptimizerConfig cfg;
+  auto param = [&](const char *name, auto &field) {
+    if (req.count(name) && req[name].kind == 'n')
+      field = (std::remove_reference_t<decltype(field)>)req[name].num;
+  };
+  param("pop_size", cfg.pop_size);
+  param("max_iter", cfg.max_iter);
+  param("green_min", cfg.green_min);
+  param("green_max", cfg.green_max);
+  param("cycle_time", cfg.cycle_time);
+  param("mutation_rate", cfg.mutation_rate);
+  param("islands", cfg.islands);
+  param("migration_interval", cfg.migration_interval);
+  param("migrants", cfg.migrants);
+  if (req.count("seed")) {
+    // A JSON number cast straight to uint64 would wrap negatives and truncate fractions
+    double seed = req["seed"].num;
+    if (req["seed"].kind != 'n' || !(seed >= 0 && seed < (double)SEED_LIMIT) || seed != floor(seed))
+      return fail(SEED_ERROR);
+    cfg.seed = (uint64_t)seed;
+  }
+  if (cfg.pop_size < 2 || cfg.max_iter < 0 || cfg.green_min < 0 || cfg.cycle_time <= 0 ||
+      cfg.islands < 1 || cfg.migrants < 0)
+    return fail("invalid GA parameters");
+  bool trace = req.count("trace") && req["trace"].num != 0;
+  double deadline_ms = req.count("deadline_ms") ? req["deadline_ms"].num : 0.0;
+  vector<vi> seeds;
+  if (req.count("seeds") && req["seeds"].kind == 'a') {
+    const vector<double> &flat = req["seeds"].list;
+    if (flat.size() % cars.size() != 0)
+      return fail("seeds must hold 4 greens per seed");
+    for (size_t k = 0; k < flat.size(); k += cars.size())
+      seeds.emplace_back(flat.begin() + k, flat.begin() + k + cars.size());
+  }
+
+  vector<population_element> history;
+  SolveInfo run;
+  auto solve_start = chrono::steady_clock::now();
+  population_element best = solve(cars, solver == "exact", cfg, false, &history, deadline_ms, &run,
+                                  seeds);
+  long long solve_us = chrono::duration_cast<chrono::microseconds>(
+                           chrono::steady_clock::now() - solve_start).count();
+  if (best.first.empty())
+    return fail("no feasible green times within the cycle");
+
+  out << ",\"north\":" << best.first[0] << ",\"south\":" << best.first[1]
+      << ",\"west\":" << best.first[2] << ",\"east\":" << best.first[3]
+      << ",\"delay\":" << best.second << ",\"solver\":\"" << solver << "\""
+      << ",\"iterations\":" << run.iterations
+      << ",\"converged\":" << (run.converged ? "true" : "false")
+      << ",\"deadline_hit\":" << (run.deadline_hit ? "true" : "false")
+      << ",\"seeded\":" << run.seeded << ",\"seed\":" << run.seed
+      << ",\"solve_us\":" << solve_us
+      << ",\"config\":[" << cfg.pop_size << "," << cfg.max_iter << "," << cfg.green_min
+      << "," << cfg.green_max << "," << cfg.cycle_time << "]";
+  if (trace) {
+    out << ",\"trace\":[";
+    FOR(k, 0, (int)history.size()) {
+      const vi &g = history[k].first;
+      out << (k ? "," : "") << "{\"iter\":" << k << ",\"delay\":" << history[k].second
+          << ",\"greens\":[" << g[0] << "," << g[1] << "," << g[2] << "," << g[3] << "]}";
+    }
+    out << "]";
+  }
+  out << "}";
+  return out.str();
+}
+
+int serve() {
+  ios::sync_with_stdio(false);
+  string line;
+  while (getline(cin, line)) {
+    if (line.find_first_not_of(" \t\r") == string::npos)
+      continue;
+    cout << serve_one(line) << "\n";
+    cout.flush();
+  }
+  return 0;
+}
+
+/* <--- Timing table (--build-table PATH [--cap N]): exact optimum for every
+   (N, S, W, E) with counts 0..cap, for O(1) lookups from a memory-mapped file.
+   Layout (little-endian): 32-byte header
+     char magic[4] = "GTAB"; uint32 version, cap, lanes, green_min, green_max,
+     cycle_time, record_size
+   then (cap+1)^4 records at index ((n*(cap+1) + s)*(cap+1) + w)*(cap+1) + e:
+     uint8 greens[4]; float32 delay ---> */
+const uint32_t TABLE_VERSION = 1;
+
+/* <--- Batch mode (--batch): count vectors on stdin, one per line, as [N,S,W,E] or
+   {"cars": [N,S,W,E], "index": i} (index defaults to the line number and keys the
+   vector's seed). Lines are collected into blocks of BATCH_BLOCK (a blank line or EOF
+   ends a block early), each block is solved in parallel and its results are written
+   in input order as one JSON line each: {"index", "north", ..., "delay", "iterations",
+   "seed"} or {"index", "error"} ---> */
+int batch(bool exact, OptimizerConfig cfg) {
+  const size_t BATCH_BLOCK = 256;
+  ios::sync_with_stdio(false);
+  if (cfg.seed == NO_SEED)
+    cfg.seed = fresh_seed();
+  size_t line_index = 0;
+  vector<string> errors;   // Per line in the block; empty = solved
+  vector<size_t> positions, block_pos;
+  vector<vi> block;
+
+  auto flush_block = [&]() {
+    vector<population_element> best;
+    vector<SolveInfo> infos;
+    solve_batch(block, block_pos, exact, cfg, best, infos);
+    size_t solved = 0;
+    ostringstream out;
+    out << setprecision(12);
+    FOR(k, 0, (int)errors.size()) {
+      out << "{\"index\":" << positions[k];
+      if (!errors[k].empty()) {
+        out << ",\"error\":\"" << json_escape(errors[k]) << "\"}\n";
+        continue;
+      }
+      const population_element &b = best[solved];
+      const SolveInfo &run = infos[solved++];
+      if (b.first.empty()) {
+        out << ",\"error\":\"no feasible green times within the cycle\"}\n";
+        continue;
+      }
+      out << ",\"north\":" << b.first[0] << ",\"south\":" << b.first[1]
+          << ",\"west\":" << b.first[2] << ",\"east\":" << b.first[3]
+          << ",\"delay\":" << b.second << ",\"iterations\":" << run.iterations
+          << ",\"seed\":" << run.seed << "}\n";
+    }
+    cout << out.str();
+    cout.flush();
+    errors.clear();
+    positions.clear();
+    block.clear();
+    block_pos.clear();
+  };
+
+  string line;
+  while (getline(cin, line)) {
+    size_t first = line.find_first_not_of(" \t\r");
+    if (first == string::npos) {
+      if (!errors.empty())
+        flush_block();
+      continue;
+    }
+    map<string, JsonField> req;
+    string err;
+    string obj = line[first] == '[' ? "{\"cars\":" + line.substr(first) + "}" : line;
+    bool ok = parse_flat_json(obj, req, err);
+    size_t position = ok && req.count("index") && req["index"].kind == 'n'
+                          ? (size_t)req["index"].num : line_index;
+    ++line_index;
+    positions.push_back(position);
+    if (!ok)
+      errors.push_back("bad request: " + err);
+    else if (!req.count("cars") || req["cars"].kind != 'a' || req["cars"].list.size() != 4)
+      errors.push_back("cars must be a list of 4 counts");
+    else {
+      vi cars;
+      for (double c : req["cars"].list)
+        cars.push_back(max(0, (int)c));
+      block.push_back(cars);
+      block_pos.push_back(position);
+      errors.emplace_back();
+    }
+    if (errors.size() >= BATCH_BLOCK)
+      flush_block();
+  }
+  if (!errors.empty())
+    flush_block();
+  return 0;
+}
+
+int build_table(const string &path, int cap) {
+  if (cap < 0 || cap > 255) {
+    cerr << "cap must be within 0..255\n";
+    return 1;
+  }
+  OptimizerConfig cfg;
+  const int lanes = 4;
+  const size_t side = cap + 1;
+  const size_t records = side * side * side * side;
+  struct Record { uint8_t greens[4]; float delay; };
+  static_assert(sizeof(Record) == 8, "packed timing record");
+  vector<Record> table(records);
+
+  // The objective is symmetric under permuting lights together with their greens,
+  // so only sorted tuples are solved and each optimum is scattered to its permutations
+  auto index = [&](const vi &c) { return ((c[0] * side + c[1]) * side + c[2]) * side + c[3]; };
+  size_t solved = 0;
+  for (int a = 0; a <= cap; ++a)
+    for (int b = a; b <= cap; ++b)
+      for (int c = b; c <= cap; ++c)
+        for (int d = c; d <= cap; ++d) {
+          vi cars = {a, b, c, d};
+          population_element best = solve(cars, true, cfg, false);
+          if (best.first.empty()) {
+            cerr << "no feasible green times within the cycle\n";
+            return 1;
+          }
+          ++solved;
+          vi order = {0, 1, 2, 3};
+          do {
+            vi permuted(lanes);
+            Record rec;
+            FOR(i, 0, lanes) {
+              permuted[i] = cars[order[i]];
+              rec.greens[i] = (uint8_t)best.first[order[i]];
+            }
+            rec.delay = (float)best.second;
+            table[index(permuted)] = rec;
+          } while (next_permutation(order.begin(), order.end()));
+        }
+
+  ofstream out(path, ios::binary);
+  if (!out) {
+    cerr << "cannot write " << path << "\n";
+    return 1;
+  }
+  uint32_t header[8] = {0, TABLE_VERSION, (uint32_t)cap, (uint32_t)lanes, (uint32_t)cfg.green_min,
+                        (uint32_t)cfg.green_max, (uint32_t)cfg.cycle_time, (uint32_t)sizeof(Record)};
+  memcpy(header, "GTAB", 4);
+  out.write(reinterpret_cast<const char *>(header), sizeof(header));
+  out.write(reinterpret_cast<const char *>(table.data()), records * sizeof(Record));
+  if (!out) {
+    cerr << "failed writing " << path << "\n";
+    return 1;
+  }
+  cerr << "[table] cap=" << cap << " records=" << records << " solved=" << solved
+       << " bytes=" << sizeof(header) + records * sizeof(Record) << " -> " << path << "\n";
+  return 0;
 }
 
 int main(int argc, char **argv) {
+  if (argc == 2 && string(argv[1]) == "--server")
+    return serve();
+  if (argc >= 3 && string(argv[1]) == "--build-table") {
+    int cap = 40;
+    if (argc >= 5 && string(argv[3]) == "--cap")
+      cap = atoi(argv[4]);
+    return build_table(argv[2], cap);
+  }
+  if (argc >= 2 && string(argv[1]) == "--batch") {
+    OptimizerConfig cfg;
+    string solver = "ga";
+    for (int i = 2; i < argc; ++i) {
+      string s = argv[i];
+      if (s.rfind("--solver=", 0) == 0)
+        solver = s.substr(9);
+      else if (s.rfind("--seed=", 0) == 0) {
+        if (!parse_seed(s.c_str() + 7, cfg.seed)) {
+          cout << "{\"error\":\"" << SEED_ERROR << "\"}\n";
+          return 1;
+        }
+      } else if (s.rfind("--islands=", 0) == 0)
+        cfg.islands = max(1, atoi(s.c_str() + 10));
+    }
+    if (solver != "ga" && solver != "exact") {
+      cout << "{\"error\":\"unknown solver: " << solver << "\"}\n";
+      return 1;
+    }
+    return batch(solver == "exact", cfg);
+  }
+
   if (argc < 5) {
     cerr << "{\"error\":\"Usage: ga_cli north south west east "
-            "[--verbose|-v]\"}\n";
+            "[--verbose|-v] [--solver=ga|exact] [--deadline-ms=N] [--warm-start=G,G,G,G ...] "
+            "[--seed=N] [--islands=N]  |  ga_cli --server  |  "
+            "ga_cli --batch [--solver=ga|exact] [--seed=N] [--islands=N] < vectors.ndjson  |  "
+            "ga_cli --build-table PATH [--cap N]\"}\n";
     return 1;
   }
 
   bool verbose = false;
+  string solver = "ga";
+  double deadline_ms = 0.0;
+  vector<vi> seeds;
+  OptimizerConfig cfg;
   for (int i = 5; i < argc; ++i) {
     string s = argv[i];
     if (s == "-v" || s == "--verbose")
       verbose = true;
+    else if (s.rfind("--solver=", 0) == 0)
+      solver = s.substr(9);
+    else if (s.rfind("--deadline-ms=", 0) == 0)
+      deadline_ms = atof(s.c_str() + 14);
+    else if (s.rfind("--warm-start=", 0) == 0) {
+      vi seed;
+      stringstream greens(s.substr(13));
+      for (string g; getline(greens, g, ',');)
+        seed.push_back(atoi(g.c_str()));
+      seeds.push_back(seed);
+    } else if (s.rfind("--seed=", 0) == 0) {
+      if (!parse_seed(s.c_str() + 7, cfg.seed)) {
+        cout << "{\"error\":\"" << SEED_ERROR << "\"}\n";
+        return 1;
+      }
+    } else if (s.rfind("--islands=", 0) == 0)
+      cfg.islands = max(1, atoi(s.c_str() + 10));
+  }
+  if (solver != "ga" && solver != "exact") {
+    cout << "{\"error\":\"unknown solver: " << solver << "\"}\n";
+    return 1;
   }
 
   vi cars(4);
@@ -306,45 +1112,39 @@ int main(int argc, char **argv) {
     }
   }
 
-  vector<LightConstants> lcs(4);
-   FOR(i,0,4) {
-    lcs[i].x = double(20 - cars[i]) / 20.0;
-    lcs[i].c = 20.0;
-    double rad = (lcs[i].x - 1.0) + (lcs[i].x - 1.0) * (lcs[i].x - 1.0) +
-                 ((16.0 * lcs[i].x) / lcs[i].c);
-    lcs[i].a2_ri1 = 173.0 * (lcs[i].x * lcs[i].x) * sqrt(max(0.0, rad));
-  }
-
-  int pop_size = 400;
-  int num_lights = 4;
-  int max_iter = 25;
-  int green_min = 10;
-  int green_max = 60;
-  int cycle_time = 160 - 12;
-  double mutation_rate = 0.15;
-  double beta = 4.0;
-
   if (verbose) {
     cerr << "Starting with cars = [" << cars[0] << "," << cars[1] << ","
          << cars[2] << "," << cars[3] << "]\n";
   }
 
-  auto res =
-      genetic_algorithm(pop_size, num_lights, max_iter, green_min, green_max,
-                        cycle_time, mutation_rate, beta, lcs, verbose);
-  population_element best = res.first;
+  SolveInfo run;
+  auto solve_start = chrono::steady_clock::now();
+  population_element best = solve(cars, solver == "exact", cfg, verbose, nullptr, deadline_ms, &run,
+                                  seeds);
+  long long solve_us = chrono::duration_cast<chrono::microseconds>(
+                           chrono::steady_clock::now() - solve_start).count();
+  if (best.first.empty()) {
+    cout << "{\"error\":\"no feasible green times within the cycle\"}\n";
+    return 1;
+  }
 
   /*Prints logs so can see the mutations*/
   cout << "{\"north\":" << best.first[0] << ",\"south\":" << best.first[1]
        << ",\"west\":" << best.first[2] << ",\"east\":" << best.first[3]
-       << ",\"delay\":" << best.second << "}\n";
+       << ",\"delay\":" << best.second << ",\"iterations\":" << run.iterations
+       << ",\"converged\":" << (run.converged ? "true" : "false")
+       << ",\"deadline_hit\":" << (run.deadline_hit ? "true" : "false")
+       << ",\"seeded\":" << run.seeded << ",\"seed\":" << run.seed << "}\n";
 
   if (verbose) {
     // also print a short summary to stderr
-    cerr << "GA finished. Final best delay = " << best.second << "\n";
+    cerr << (solver == "exact" ? "Exact" : "GA") << " finished. Final best delay = "
+         << best.second << "\n";
+    cerr << "solver=" << solver << " solve_us=" << solve_us << "\n";
     cerr << "Final greens: N=" << best.first[0] << " S=" << best.first[1]
          << " W=" << best.first[2] << " E=" << best.first[3] << "\n";
   }
 
   return 0;
 }
+#endif
@@ -0,0 +1,98 @@
+"""
+Adaptive Peak Sampling
+The lane result is the peak vehicle count, so there is no need to infer every sampled
+frame once the peak is established. Frames of the normal SKIP_FRAMES grid are visited
+coarse-to-fine across the whole clip (midpoints first), the neighbourhoods of high-count
+frames are then searched locally on the full grid, and the search stops once the peak
+has not improved for a patience budget of inferred frames or seconds.
+"""
+
+import time
+
+
+def progressive_levels(n):
+    """
+    Indices 0..n-1 grouped into coarse-to-fine levels ([0], [n/2], [n/4, 3n/4], ...);
+    after each level the visited indices cover the range with half the previous spacing.
+    """
+    stride = 1
+    while stride < n:
+        stride *= 2
+    seen = set()
+    levels = []
+    while stride >= 1:
+        level = [i for i in range(0, n, stride) if i not in seen]
+        seen.update(level)
+        if level:
+            levels.append(level)
+        stride //= 2
+    return levels
+
+
+def progressive_order(n):
+    """Indices 0..n-1 ordered coarse-to-fine so any prefix covers the range evenly."""
+    return [i for level in progressive_levels(n) for i in level]
+
+
+def adaptive_peak(grid, infer, coarse=8, patience=12, patience_seconds=0, margin=1):
+    """
+    Estimate max(infer(f) for f in grid) while inferring as few frames as possible.
+    infer(frame_idx) returns a count, or None if the frame cannot be read.
+    Returns (peak, counts) where counts maps every inferred frame index to its count.
+    """
+    counts = {}
+    state = {'best': 0, 'since': 0, 'improved_at': time.perf_counter()}
+
+    def visit(pos):
+        frame_idx = grid[pos]
+        if frame_idx in counts:
+            return False
+        count = infer(frame_idx)
+        if count is None:
+            counts[frame_idx] = None
+            return False
+        counts[frame_idx] = count
+        if count > state['best'] or len(counts) == 1:
+            state.update(best=count, since=0, improved_at=time.perf_counter())
+        else:
+            state['since'] += 1
+        return True
+
+    def stable():
+        if patience and state['since'] >= patience:
+            return True
+        return bool(patience_seconds) and time.perf_counter() - state['improved_at'] >= patience_seconds
+
+    # <!--- Coarse pass over the whole grid, coarse-to-fine --->
+    # Only stop between levels, so the visited frames always cover the clip evenly
+    coarse_positions = list(range(0, len(grid), max(1, coarse)))
+    for level in progressive_levels(len(coarse_positions)):
+        for i in level:
+            visit(coarse_positions[i])
+        if stable():
+            break
+
+    # <!--- Refine around frames close to the peak: local coarse-to-fine search on the full grid --->
+    state['since'] = 0
+    position = {frame_idx: pos for pos, frame_idx in enumerate(grid)}
+    refined = set()
+    while not stable():
+        candidates = [f for f, c in counts.items()
+                      if c is not None and c >= state['best'] - margin and f not in refined]
+        if not candidates:
+            break
+        frame_idx = max(candidates, key=lambda f: counts[f])    # Highest counts first
+        refined.add(frame_idx)
+        center = position[frame_idx]
+        stride = max(1, coarse) // 2
+        while stride >= 1 and not stable():
+            for neighbour in (center - stride, center + stride):
+                if 0 <= neighbour < len(grid):
+                    visit(neighbour)
+            # Move to the best of center and its two neighbours
+            center = max((p for p in (center - stride, center, center + stride)
+                          if 0 <= p < len(grid) and counts.get(grid[p]) is not None),
+                         key=lambda p: counts[grid[p]])
+            stride //= 2
+
+    return state['best'], {f: c for f, c in counts.items() if c is not None}
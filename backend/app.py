@@ -43,6 +43,11 @@ def create_app():
     from src.routes import api
     app.register_blueprint(api)
 
+    # --- Optionally start the detection pool now so the first /upload is warm ---
+    if os.environ.get("YOLO_POOL_PREWARM", "0") == "1":
+        from detector_pool import get_pool
+        get_pool()   # Sized by YOLO_WORKERS / the autotune file
+
     return app
 
 app = create_app()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Detection Autotuner
+Benchmarks worker count x DNN threads per worker x OpenCL on/off x input size on
+this host and writes the highest-throughput configuration to the tuning file
+(YOLO_TUNING_FILE, default data/autotune.json). yolov4.py reads that file at import,
+so create_model and detect_cars_parallel pick it up on the next start.
+Explicit environment variables (YOLO_WORKERS, YOLO_DNN_THREADS, YOLO_OPENCL,
+YOLO_INPUT_SIZE) still take precedence over the file.
+
+Usage: python autotune.py [--video uploads/video_0.mp4] [--seconds 5] [--input-sizes 416 320]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TUNING_FILE = os.environ.get("YOLO_TUNING_FILE", os.path.join(BASE_DIR, 'data', 'autotune.json'))
+TUNED_KEYS = ('workers', 'threads', 'opencl', 'input_size')
+
+
+def load_tuning(path=TUNING_FILE):
+    """Tuned settings from a previous autotune run ({} if missing or unreadable)."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {k: data[k] for k in TUNED_KEYS if k in data}
+
+
+def tuned_setting(tuning, env_name, key, default, cast=int):
+    """Environment variable > tuning file > built-in default."""
+    if env_name in os.environ:
+        return cast(os.environ[env_name])
+    if key in tuning:
+        return cast(tuning[key])
+    return default
+
+
+def parse_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def candidate_configs(cpu_count, workers, threads, opencl, input_sizes):
+    """All combinations that do not put more DNN threads than cores on the host."""
+    configs = []
+    for w in workers:
+        for t in threads:
+            if w * t > cpu_count:
+                continue
+            for o in opencl:
+                for s in input_sizes:
+                    configs.append({'workers': w, 'threads': t, 'opencl': o, 'input_size': s})
+    return configs
+
+
+def sample_frames(video=None, count=32):
+    """Detection-ready (ROI-cropped) frames from a video, or deterministic synthetic road frames."""
+    import numpy as np
+    import yolov4
+
+    frames = []
+    if video:
+        with yolov4.open_frame_source(video) as source:
+            for _, frame in source:
+                frames.append(frame.copy())
+                if len(frames) >= count:
+                    break
+    rng = np.random.default_rng(0)
+    while len(frames) < count:
+        frame = np.full((yolov4.INPUT_SIZE, yolov4.INPUT_SIZE, 3), 90, np.uint8)
+        for _ in range(12):
+            x, y = rng.integers(0, yolov4.INPUT_SIZE - 60, 2)
+            frame[y:y + 30, x:x + 60] = rng.integers(0, 255, 3, dtype=np.uint8)
+        frames.append(frame)
+    return frames
+
+
+def _bench_worker(config, frames, seconds, start_barrier, results):
+    """One benchmark process: run detection on the sample frames for `seconds`."""
+    import cv2 as cv
+    import yolov4
+    from inference_engine import OpenCVEngine
+
+    cv.setNumThreads(config['threads'])
+    cv.ocl.setUseOpenCL(config['opencl'])
+    yolov4.USE_OPENCL = config['opencl']
+    net, class_names = yolov4.load_net()
+    engine = OpenCVEngine(net, config['input_size'])
+    engine.detect(frames[0], yolov4.CONF_THRESHOLD, yolov4.NMS_THRESHOLD)   # Warm-up
+
+    start_barrier.wait()
+    processed, counts = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = frames[processed % len(frames)]
+        classes, scores, boxes = engine.detect(frame, yolov4.CONF_THRESHOLD, yolov4.NMS_THRESHOLD)
+        if processed < len(frames):
+            counts.append(yolov4.count_vehicles(classes, scores, boxes, class_names))
+        processed += 1
+    results.put((processed, counts))
+
+
+def bench_config(config, frames, seconds):
+    """Aggregate frames per second of config['workers'] concurrent processes, plus per-frame counts."""
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(config['workers'] + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_bench_worker, args=(config, frames, seconds, barrier, results), daemon=True)
+             for _ in range(config['workers'])]
+    for p in procs:
+        p.start()
+    barrier.wait()
+    start = time.perf_counter()
+    outcomes = [results.get(timeout=seconds + 120) for _ in procs]
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join(timeout=5)
+    total = sum(processed for processed, _ in outcomes)
+    return total / elapsed if elapsed > 0 else 0.0, outcomes[0][1]
+
+
+def count_drift(counts, reference):
+    """Mean absolute per-frame vehicle count difference against the reference input size."""
+    n = min(len(counts), len(reference))
+    return sum(abs(a - b) for a, b in zip(counts[:n], reference[:n])) / n if n else 0.0
+
+
+def main():
+    import cv2 as cv
+    import yolov4
+
+    cpu_count = mp.cpu_count()
+    parser = argparse.ArgumentParser(description="Benchmark detection settings and persist the fastest")
+    parser.add_argument('--video', help='Sample video (synthetic frames if omitted)')
+    parser.add_argument('--frames', type=int, default=32, help='Sample frames per run')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Measurement time per configuration')
+    parser.add_argument('--workers', type=int, nargs='+', default=list(range(1, min(4, cpu_count) + 1)))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--input-sizes', type=int, nargs='+', default=[yolov4.INPUT_SIZE],
+                        help='Input sizes to try; sizes other than the current one must pass --max-drift')
+    parser.add_argument('--max-drift', type=float, default=0.5,
+                        help='Max mean per-frame count difference vs the current input size')
+    parser.add_argument('--out', default=TUNING_FILE)
+    parser.add_argument('--dry-run', action='store_true', help='Print results without writing the tuning file')
+    args = parser.parse_args()
+
+    opencl = [False, True] if cv.ocl.haveOpenCL() else [False]
+    configs = candidate_configs(cpu_count, args.workers, args.threads, opencl, args.input_sizes)
+    frames = sample_frames(args.video, args.frames)
+    print(f"[Autotune] {len(configs)} configurations, {cpu_count} cores, {len(frames)} sample frames "
+          f"({'video' if args.video else 'synthetic'}), {args.seconds:.0f}s each", flush=True)
+
+    results = []
+    reference = None
+    for config in configs:
+        fps, counts = bench_config(config, frames, args.seconds)
+        if config['input_size'] == yolov4.INPUT_SIZE and reference is None:
+            reference = counts
+        results.append((config, fps, counts))
+        print(f"[Autotune] workers={config['workers']} threads={config['threads']} opencl={int(config['opencl'])} "
+              f"size={config['input_size']}: {fps:.1f} FPS", flush=True)
+
+    admissible = []
+    for config, fps, counts in results:
+        drift = count_drift(counts, reference) if reference is not None else 0.0
+        if config['input_size'] != yolov4.INPUT_SIZE:
+            if not args.video:
+                print(f"[Autotune] Rejecting size {config['input_size']} (count drift needs --video)", flush=True)
+                continue
+            if reference is None or drift > args.max_drift:
+                print(f"[Autotune] Rejecting size {config['input_size']} (count drift {drift:.2f})", flush=True)
+                continue
+        admissible.append((fps, config, drift))
+    if not admissible:
+        raise SystemExit("[Autotune] No admissible configuration")
+
+    fps, best, drift = max(admissible, key=lambda item: item[0])
+    tuning = dict(best, fps=round(fps, 2), count_drift=round(drift, 3), tuned_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  host={'cpu_count': cpu_count, 'platform': platform.platform(), 'opencv': cv.__version__})
+    print(f"[Autotune] Best: {json.dumps(tuning)}", flush=True)
+
+    if not args.dry_run:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(tuning, f, indent=2)
+        print(f"[Autotune] Written to {args.out}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
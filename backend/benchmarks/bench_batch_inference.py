@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Batched inference benchmark.
+Compares forward-pass batch sizes (default 1, 4, 8) in frames per second and
+frames per second per core, using the same engine (YOLO_ENGINE) and post-processing as /upload.
+
+Usage: python benchmarks/bench_batch_inference.py [--video uploads/video_0.mp4] [--batches 1 4 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+
+
+def load_frames(video_path, count):
+    """Sampled, ROI-cropped, resized frames from a video (or random noise frames)."""
+    frames = []
+    if video_path:
+        cap = cv.VideoCapture(video_path)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_roi, _ = yolov4.extract_roi(frame)
+            frames.append(cv.resize(frame_roi, (yolov4.INPUT_SIZE, yolov4.INPUT_SIZE)))
+        cap.release()
+    rng = np.random.default_rng(0)
+    while len(frames) < count:
+        frames.append(rng.integers(0, 255, (yolov4.INPUT_SIZE, yolov4.INPUT_SIZE, 3), dtype=np.uint8))
+    return frames
+
+
+def bench(engine, frames, batch_size, rounds):
+    # <!--- One warm-up pass so allocation/layer setup is not timed --->
+    engine.detect_batch(frames[:batch_size], yolov4.CONF_THRESHOLD, yolov4.NMS_THRESHOLD)
+
+    processed = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(frames) - batch_size + 1, batch_size):
+            engine.detect_batch(frames[i:i + batch_size], yolov4.CONF_THRESHOLD, yolov4.NMS_THRESHOLD)
+            processed += batch_size
+    elapsed = time.perf_counter() - start
+    return processed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare YOLO forward-pass batch sizes")
+    parser.add_argument('--video', help='Video to sample frames from (random frames if omitted)')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--frames', type=int, default=64, help='Frames per round (multiple of every batch size)')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    engine, _ = yolov4.create_engine()
+    frames = load_frames(args.video, args.frames)
+    cores = max(1, cv.getNumThreads())
+
+    print(f"[Bench] engine={engine.name} model={yolov4.MODEL_TYPE} input={engine.input_size} threads={cores} frames={len(frames)}x{args.rounds}")
+    print(f"{'batch':>6} {'frames':>7} {'seconds':>8} {'fps':>8} {'fps/core':>9}")
+    baseline = None
+    for batch_size in args.batches:
+        processed, elapsed = bench(engine, frames, batch_size, args.rounds)
+        fps = processed / elapsed if elapsed > 0 else 0
+        baseline = baseline or fps
+        print(f"{batch_size:>6} {processed:>7} {elapsed:>8.2f} {fps:>8.1f} {fps / cores:>9.2f}  ({fps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
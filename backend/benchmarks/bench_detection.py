@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Detection stage benchmark suite.
+Renders synthetic traffic clips (see synthetic.py) and measures frames per second of:
+  - decode, roi_resize, inference, postprocess: per-stage throughput over every frame
+  - scan:  end-to-end yolov4._scan_video (what a detection worker runs per lane/segment)
+  - demo:  end-to-end demo_detection.process_video (annotated output video)
+Results are written as JSON. With --baseline, any FPS metric that dropped by more
+than --max-regression fails the run (exit code 1). Without the YOLO weights (or with
+--engine stub) a stub engine that finds the synthetic vehicles stands in for YOLO.
+
+Usage: python benchmarks/bench_detection.py [--resolutions 640x360 1280x720] [--frames 150]
+           [--densities 4 12] [--engine auto|real|stub] [--baseline results/old.json] [--max-regression 0.2]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2 as cv
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+import demo_detection
+from benchmarks.synthetic import StubEngine, clip_name, make_clip
+from detection_core import count_vehicles
+from frame_source import roi_box
+from inference_engine import decode_detections
+from preprocess import FramePreprocessor
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+STAGES = ('decode', 'roi_resize', 'inference', 'postprocess')
+FPS_METRICS = STAGES + ('scan', 'demo')
+
+
+def load_engine(kind='auto'):
+    """(engine, class_names): the configured YOLO engine, or StubEngine when weights are missing."""
+    if kind != 'stub':
+        try:
+            return yolov4.create_engine()
+        except (FileNotFoundError, cv.error) as e:
+            if kind == 'real':
+                raise SystemExit(f"[Bench] Cannot load YOLO: {e}")
+            print(f"[Bench] YOLO unavailable ({e}) - using stub engine", flush=True)
+    return StubEngine(yolov4.INPUT_SIZE), yolov4.load_class_names()
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Swallow the per-frame progress logs of the code under test."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_stages(engine, class_names, clip):
+    """Per-stage FPS over every frame of the clip, plus the mean vehicle count."""
+    cap = cv.VideoCapture(clip)
+    width, height = int(cap.get(cv.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
+    roi = roi_box(width, height, (yolov4.ROI_TOP, yolov4.ROI_BOTTOM, yolov4.ROI_LEFT, yolov4.ROI_RIGHT))
+    pre = FramePreprocessor(width, height, engine.input_size, roi, letterbox=yolov4.LETTERBOX)
+
+    seconds = dict.fromkeys(STAGES, 0.0)
+    frames = vehicles = 0
+    raw = None
+    while True:
+        t0 = time.perf_counter()
+        ret, raw = cap.read(raw)
+        t1 = time.perf_counter()
+        if not ret:
+            break
+        prepared = pre.prepare(raw)
+        t2 = time.perf_counter()
+        rows = engine.forward_rows([prepared])
+        t3 = time.perf_counter()
+        classes, scores, boxes = decode_detections(rows[0], engine.input_size, engine.input_size,
+                                                   yolov4.CONF_THRESHOLD, yolov4.NMS_THRESHOLD)
+        vehicles += count_vehicles(classes, scores, boxes, class_names, pre.area_scale)
+        t4 = time.perf_counter()
+        for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            seconds[stage] += dt
+        frames += 1
+    cap.release()
+
+    result = {stage: frames / seconds[stage] if seconds[stage] else 0.0 for stage in STAGES}
+    result['frames'] = frames
+    result['mean_vehicles'] = vehicles / frames if frames else 0.0
+    return result
+
+
+def bench_scan(engine, class_names, clip, frames, verbose=False):
+    """End-to-end lane scan: sampled frames per second and source-video frames per second."""
+    start = time.perf_counter()
+    with quiet(not verbose):
+        stats, error = yolov4._scan_video(engine, class_names, clip, worker_id=0)
+    elapsed = time.perf_counter() - start
+    if error:
+        raise SystemExit(f"[Bench] Scan failed: {error}")
+    return {'scan': stats['frames'] / elapsed, 'scan_video_fps': frames / elapsed, 'scan_max': stats['max']}
+
+
+def bench_demo(engine, class_names, clip, frames, verbose=False):
+    """End-to-end annotated demo video, frames per second."""
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with quiet(not verbose):
+            demo_detection.process_video(clip, os.path.join(tmp, 'demo.mp4'), model=engine, class_names=class_names)
+        elapsed = time.perf_counter() - start
+    return {'demo': frames / elapsed}
+
+
+def compare(results, baseline, max_regression):
+    """[(clip, metric, baseline_fps, fps)] for every FPS metric that dropped by more than max_regression."""
+    regressions = []
+    for clip, metrics in results['results'].items():
+        base = baseline.get('results', {}).get(clip, {})
+        for metric in FPS_METRICS:
+            if metric in metrics and base.get(metric):
+                if metrics[metric] < base[metric] * (1 - max_regression):
+                    regressions.append((clip, metric, base[metric], metrics[metric]))
+    return regressions
+
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection stages on synthetic clips")
+    parser.add_argument('--resolutions', nargs='+', default=['640x360', '1280x720'], help='WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=150, help='Frames per clip')
+    parser.add_argument('--densities', type=int, nargs='+', default=[4, 12], help='Vehicles on screen')
+    parser.add_argument('--engine', choices=('auto', 'real', 'stub'), default='auto')
+    parser.add_argument('--skip-demo', action='store_true', help='Do not time demo_detection.process_video')
+    parser.add_argument('--out', help='Result JSON (default: benchmarks/results/detection-<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier result JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='Allowed FPS drop vs baseline (0.2 = 20%%)')
+    parser.add_argument('--verbose', action='store_true', help='Show the logs of the code under test')
+    args = parser.parse_args()
+
+    engine, class_names = load_engine(args.engine)
+    results = {
+        'meta': {
+            'engine': engine.name, 'model_type': yolov4.MODEL_TYPE, 'input_size': engine.input_size,
+            'skip_frames': yolov4.SKIP_FRAMES, 'letterbox': yolov4.LETTERBOX, 'frame_source': yolov4.FRAME_SOURCE,
+            'cpu_count': os.cpu_count(), 'platform': platform.platform(), 'opencv': cv.__version__,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+    print(f"[Bench] engine={engine.name} input={engine.input_size} frames={args.frames}", flush=True)
+    print(f"{'clip':<22}" + ''.join(f"{m:>12}" for m in FPS_METRICS), flush=True)
+
+    for resolution in args.resolutions:
+        width, height = parse_resolution(resolution)
+        for density in args.densities:
+            name = clip_name(width, height, args.frames, density)
+            clip = make_clip(width, height, args.frames, density)
+            metrics = bench_stages(engine, class_names, clip)
+            metrics.update(bench_scan(engine, class_names, clip, metrics['frames'], args.verbose))
+            if not args.skip_demo:
+                metrics.update(bench_demo(engine, class_names, clip, metrics['frames'], args.verbose))
+            results['results'][name] = {k: round(v, 3) if isinstance(v, float) else v for k, v in metrics.items()}
+            print(f"{name:<22}" + ''.join(f"{metrics[m]:>12.1f}" if m in metrics else f"{'-':>12}"
+                                          for m in FPS_METRICS), flush=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"detection-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"[Bench] Results written to {out}", flush=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('engine') != engine.name:
+            print(f"[Bench] Warning: baseline engine {baseline.get('meta', {}).get('engine')} != {engine.name}", flush=True)
+        regressions = compare(results, baseline, args.max_regression)
+        for clip, metric, before, now in regressions:
+            print(f"[Bench] REGRESSION {clip} {metric}: {before:.1f} -> {now:.1f} FPS "
+                  f"({now / before - 1:+.0%}, limit -{args.max_regression:.0%})", flush=True)
+        if regressions:
+            raise SystemExit(1)
+        print(f"[Bench] No regressions beyond {args.max_regression:.0%} vs {args.baseline}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
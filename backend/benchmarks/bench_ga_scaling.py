@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+GA scaling across cores and islands.
+Runs the C++ optimizer with a fixed --seed for every (islands, OMP_NUM_THREADS)
+combination and reports solve time, iterations and delay. Runs with the same seed
+and island count must match bit for bit across thread counts; any mismatch is
+reported and fails the run, so results can be compared between builds.
+
+Usage: python benchmarks/bench_ga_scaling.py [--threads 1 2 4 8] [--islands 1 2 4 8]
+           [--seeds 1 2 3] [--binary ./Algo1] [--out results/ga-scaling.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_optimizer import RESULTS_DIR, solve, summarize
+from src.optimizer import GA_BINARY
+
+CASES = ([5, 10, 15, 20], [0, 0, 30, 30], [12, 3, 25, 8], [20, 20, 20, 20], [30, 1, 1, 16])
+
+
+def run(binary, threads, islands, seeds):
+    """(outputs, solve_us list) for every case x seed at one configuration."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    outputs, times = [], []
+    for cars in CASES:
+        for seed in seeds:
+            result, solve_us, _ = solve(binary, cars, 'ga', extra=[f"--seed={seed}", f"--islands={islands}"])
+            outputs.append(result)
+            times.append(solve_us)
+    return outputs, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GA scaling and reproducibility across threads and islands")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--islands', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--binary', default=GA_BINARY, help='Optimizer binary built from Algo.cpp')
+    parser.add_argument('--out', help='Result JSON (default: benchmarks/results/ga-scaling-<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.binary):
+        raise SystemExit(f"[Bench] Optimizer binary not found: {args.binary} (g++ -O3 -fopenmp -o Algo1 Algo.cpp)")
+    threads = sorted(set(args.threads))
+    print(f"[Bench] {os.cpu_count()} CPUs; threads {threads}, islands {args.islands}, "
+          f"{len(CASES)} cases x {len(args.seeds)} seeds", flush=True)
+
+    rows, mismatches = [], []
+    print(f"{'islands':>8}{'threads':>8}{'solve us p50':>14}{'speedup':>9}{'iterations':>12}{'delay mean':>12}", flush=True)
+    for islands in args.islands:
+        reference, base_us = None, None
+        for t in threads:
+            outputs, times = run(args.binary, t, islands, args.seeds)
+            if reference is None:
+                reference = outputs
+            elif outputs != reference:
+                mismatches.append({'islands': islands, 'threads': t})
+            us = summarize(times)
+            base_us = base_us or us['p50']
+            row = {'islands': islands, 'threads': t, 'solve_us': us,
+                   'speedup': base_us / us['p50'] if us['p50'] else None,
+                   'iterations': statistics.fmean(r['iterations'] for r in outputs),
+                   'delay': statistics.fmean(r['delay'] for r in outputs)}
+            rows.append(row)
+            print(f"{islands:>8}{t:>8}{us['p50']:>14.0f}{row['speedup']:>9.2f}"
+                  f"{row['iterations']:>12.1f}{row['delay']:>12.3f}", flush=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"ga-scaling-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({'cpus': os.cpu_count(), 'rows': rows, 'mismatches': mismatches}, f, indent=2)
+    print(f"[Bench] Results written to {out}", flush=True)
+    if mismatches:
+        raise SystemExit(f"[Bench] Results differ across thread counts: {mismatches}")
+    print("[Bench] Results identical across thread counts for every island count", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Motion gate tuning.
+Runs one video with motion gating at several thresholds, auditing every skipped
+frame against a real detector run, and prints skip ratio, count error and the
+reported lane maximum next to an ungated run.
+
+Usage: python benchmarks/bench_motion_gate.py --video uploads/video_0.mp4 [--thresholds 2 4 8] [--max-reuse 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+
+
+def run(model, class_names, video):
+    start = time.perf_counter()
+    stats, error = yolov4._scan_video(model, class_names, video, worker_id=0)
+    if error:
+        raise SystemExit(f"[Bench] {error}")
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the motion gate threshold")
+    parser.add_argument('--video', required=True)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[2.0, 4.0, 8.0])
+    parser.add_argument('--max-reuse', type=int, default=yolov4.MOTION_MAX_REUSE)
+    args = parser.parse_args()
+
+    model, class_names = yolov4.create_model()
+
+    yolov4.MOTION_GATING = False
+    full, full_seconds = run(model, class_names, args.video)
+
+    # Gate timing is measured without the audit, error with it
+    rows = []
+    yolov4.MOTION_GATING = True
+    yolov4.MOTION_MAX_REUSE = args.max_reuse
+    for threshold in args.thresholds:
+        yolov4.MOTION_THRESHOLD = threshold
+        yolov4.MOTION_AUDIT = False
+        gated, seconds = run(model, class_names, args.video)
+        yolov4.MOTION_AUDIT = True
+        audited, _ = run(model, class_names, args.video)
+        rows.append((threshold, gated, seconds, audited['motion']))
+
+    print(f"\n[Bench] {args.video}: {full['frames']} sampled frames, max={full['max']}, {full_seconds:.2f}s ungated")
+    print(f"{'thresh':>7} {'skip%':>6} {'seconds':>8} {'speedup':>8} {'mean_err':>9} {'max_err':>8} {'max':>4} {'full':>5}")
+    for threshold, gated, seconds, motion in rows:
+        mean_error = motion.get('abs_error_sum', 0) / motion['frames'] if motion['frames'] else 0.0
+        print(f"{threshold:>7.1f} {motion['skip_ratio'] * 100:>5.1f}% {seconds:>8.2f} {full_seconds / seconds:>7.2f}x "
+              f"{mean_error:>9.3f} {motion.get('max_abs_error', 0):>8} {gated['max']:>4} {full['max']:>5}")
+
+
+if __name__ == "__main__":
+    main()
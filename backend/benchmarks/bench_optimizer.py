@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Optimizer solver comparison: GA vs exact (DP) green-time allocation.
+Runs the C++ optimizer with both solvers for every combination of per-lane car
+counts on a grid and reports the delay gap (how far the GA lands above the optimum)
+and runtime, both in-binary solve time and wall time including process start.
+The GA is randomised, so each count vector is solved --ga-runs times. With --deadlines
+the GA is also run under each latency budget (ms) to show what a deadline costs in delay.
+With --drift N every count vector is also perturbed by up to N cars per lane, as in
+consecutive live cycles, and the GA is run cold and warm-started from the previous plan.
+
+Usage: python benchmarks/bench_optimizer.py [--counts 0 4 8 12 16 20 30] [--ga-runs 3]
+           [--deadlines 0.1 0.5 1] [--drift 2] [--binary ./Algo1] [--out results/optimizer.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.optimizer import GA_BINARY, parse_log_lines_to_events
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+REL_TOLERANCE = 1e-6    # The binary prints delays with 6 significant digits
+
+
+def solve(binary, cars, solver, deadline_ms=None, seed=None, extra=()):
+    """(result dict, solve_us, wall_seconds) of one optimizer run; extra = more CLI flags."""
+    args = [binary] + [str(c) for c in cars] + [f"--solver={solver}", "--verbose"] + list(extra)
+    if deadline_ms:
+        args.append(f"--deadline-ms={deadline_ms}")
+    if seed:
+        args.append("--warm-start=" + ",".join(str(g) for g in seed))
+    start = time.perf_counter()
+    proc = subprocess.run(args, capture_output=True, text=True, timeout=30)
+    wall = time.perf_counter() - start
+    result = json.loads(proc.stdout)
+    if proc.returncode != 0 or 'error' in result:
+        raise SystemExit(f"[Bench] {solver} failed for {cars}: {proc.stdout.strip() or proc.stderr.strip()}")
+    events, _ = parse_log_lines_to_events(proc.stderr.splitlines())
+    solve_us = next((e['solve_us'] for e in events if e['type'] == 'timing'), None)
+    return result, solve_us, wall
+
+
+def summarize(values):
+    return {'mean': statistics.fmean(values), 'p50': statistics.median(values), 'max': max(values)}
+
+
+def compare(binary, counts, ga_runs, deadlines=(), drift=0):
+    cases = []
+    rand = random.Random(0)
+    for cars in itertools.product(counts, repeat=4):
+        exact, exact_us, exact_wall = solve(binary, cars, 'exact')
+        ga = [solve(binary, cars, 'ga') for _ in range(ga_runs)]
+        ga_delays = [r['delay'] for r, _, _ in ga]
+        case = {
+            'cars': list(cars),
+            'exact_delay': exact['delay'],
+            'exact_greens': [exact[k] for k in ('north', 'south', 'west', 'east')],
+            'ga_delays': ga_delays,
+            'exact_us': exact_us, 'exact_wall': exact_wall,
+            'ga_us': [us for _, us, _ in ga], 'ga_wall': [w for _, _, w in ga],
+        }
+        for deadline in deadlines:
+            runs = [solve(binary, cars, 'ga', deadline)[0] for _ in range(ga_runs)]
+            case[f'deadline_{deadline:g}'] = [(r['delay'], r['iterations'], r['deadline_hit']) for r in runs]
+        if drift:
+            # Next cycle: counts drift a little; compare a cold GA with one seeded by this plan
+            plan = [ga[0][0][k] for k in ('north', 'south', 'west', 'east')]
+            next_cars = [max(0, c + rand.randint(-drift, drift)) for c in cars]
+            cold = [solve(binary, next_cars, 'ga') for _ in range(ga_runs)]
+            warm = [solve(binary, next_cars, 'ga', seed=plan) for _ in range(ga_runs)]
+            case['drift'] = {'cars': next_cars,
+                             'cold': [(r['iterations'], us, r['delay']) for r, us, _ in cold],
+                             'warm': [(r['iterations'], us, r['delay']) for r, us, _ in warm]}
+        cases.append(case)
+
+    gaps = [(d - c['exact_delay']) / c['exact_delay'] for c in cases for d in c['ga_delays']]
+    suboptimal = [g > REL_TOLERANCE for g in gaps]
+    worst = max(cases, key=lambda c: max(c['ga_delays']) - c['exact_delay'])
+    return {
+        'cases': len(cases),
+        'ga_runs': len(gaps),
+        'ga_suboptimal_rate': sum(suboptimal) / len(gaps),
+        'ga_gap_pct': summarize([100 * g for g in gaps]),
+        'ga_better_than_exact': sum(g < -REL_TOLERANCE for g in gaps),
+        'worst_case': {'cars': worst['cars'], 'exact_delay': worst['exact_delay'],
+                       'ga_delay': max(worst['ga_delays'])},
+        'exact_solve_us': summarize([c['exact_us'] for c in cases]),
+        'ga_solve_us': summarize([us for c in cases for us in c['ga_us']]),
+        'exact_wall_ms': summarize([1000 * c['exact_wall'] for c in cases]),
+        'ga_wall_ms': summarize([1000 * w for c in cases for w in c['ga_wall']]),
+        'deadlines': {f'{d:g}': summarize_deadline(cases, d) for d in deadlines},
+        'warm_start': summarize_warm_start(cases) if drift else None,
+    }, cases
+
+
+def summarize_warm_start(cases):
+    """Iterations, solve time and delay of cold vs warm-started GA runs on drifted counts."""
+    summary = {}
+    for start in ('cold', 'warm'):
+        runs = [run for c in cases for run in c['drift'][start]]
+        summary[start] = {'iterations': summarize([it for it, _, _ in runs]),
+                          'solve_us': summarize([us for _, us, _ in runs]),
+                          'delay': statistics.fmean(delay for _, _, delay in runs)}
+    summary['iterations_saved'] = summary['cold']['iterations']['mean'] - summary['warm']['iterations']['mean']
+    return summary
+
+
+def summarize_deadline(cases, deadline):
+    """Delay gap to the optimum, iterations and hit rate of GA runs under one deadline."""
+    runs = [(c['exact_delay'], run) for c in cases for run in c[f'deadline_{deadline:g}']]
+    return {
+        'gap_pct': summarize([100 * (delay - exact) / exact for exact, (delay, _, _) in runs]),
+        'iterations': summarize([iterations for _, (_, iterations, _) in runs]),
+        'deadline_hit_rate': sum(hit for _, (_, _, hit) in runs) / len(runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the GA and exact optimizer solvers")
+    parser.add_argument('--counts', type=int, nargs='+', default=[0, 4, 8, 12, 16, 20, 30],
+                        help='Car counts per lane; every 4-lane combination is solved')
+    parser.add_argument('--ga-runs', type=int, default=3, help='GA runs per count vector')
+    parser.add_argument('--deadlines', type=float, nargs='*', default=[], help='GA latency budgets in ms')
+    parser.add_argument('--drift', type=int, default=0, help='Max per-lane count change for the warm-start comparison')
+    parser.add_argument('--binary', default=GA_BINARY, help='Optimizer binary built from Algo.cpp')
+    parser.add_argument('--out', help='Result JSON (default: benchmarks/results/optimizer-<timestamp>.json)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.binary):
+        raise SystemExit(f"[Bench] Optimizer binary not found: {args.binary} (g++ -O3 -o Algo1 Algo.cpp)")
+    print(f"[Bench] {len(args.counts) ** 4} count vectors x (1 exact + {args.ga_runs} GA)", flush=True)
+    summary, cases = compare(args.binary, args.counts, args.ga_runs, args.deadlines, args.drift)
+
+    print(f"GA suboptimal in {summary['ga_suboptimal_rate']:.1%} of {summary['ga_runs']} runs; "
+          f"gap mean {summary['ga_gap_pct']['mean']:.3f}%, max {summary['ga_gap_pct']['max']:.3f}% "
+          f"(worst {summary['worst_case']['cars']}: {summary['worst_case']['ga_delay']} vs "
+          f"{summary['worst_case']['exact_delay']})", flush=True)
+    print(f"{'solver':<8}{'solve us p50':>14}{'solve us max':>14}{'wall ms p50':>14}", flush=True)
+    for solver in ('exact', 'ga'):
+        us, wall = summary[f'{solver}_solve_us'], summary[f'{solver}_wall_ms']
+        print(f"{solver:<8}{us['p50']:>14.0f}{us['max']:>14.0f}{wall['p50']:>14.2f}", flush=True)
+    for deadline, stats in summary['deadlines'].items():
+        print(f"GA deadline {deadline} ms: hit {stats['deadline_hit_rate']:.0%}, "
+              f"iterations p50 {stats['iterations']['p50']:.0f}, gap mean {stats['gap_pct']['mean']:.3f}% "
+              f"max {stats['gap_pct']['max']:.3f}%", flush=True)
+    if summary['warm_start']:
+        warm = summary['warm_start']
+        for start in ('cold', 'warm'):
+            print(f"GA {start} start: iterations mean {warm[start]['iterations']['mean']:.1f}, "
+                  f"solve us p50 {warm[start]['solve_us']['p50']:.0f}, delay mean {warm[start]['delay']:.3f}",
+                  flush=True)
+        print(f"Warm start saved {warm['iterations_saved']:.1f} iterations per solve", flush=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"optimizer-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({'counts': args.counts, 'summary': summary, 'cases': cases}, f, indent=2)
+    print(f"[Bench] Results written to {out}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Preprocessing microbenchmark.
+Compares the old per-frame path (ROI slice, new cv.resize output, new blob from
+cv.dnn.blobFromImage) with the preallocated path (FramePreprocessor + BlobBuffer),
+reporting time per frame and bytes allocated per frame (tracemalloc, which also
+sees NumPy/OpenCV array allocations).
+
+Usage: python benchmarks/bench_preprocess.py [--video uploads/video_0.mp4] [--frames 200] [--letterbox]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2 as cv
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+from frame_source import roi_box
+from preprocess import BlobBuffer, FramePreprocessor
+
+
+def load_frames(video, count):
+    """Decoded full-resolution frames from a video, or synthetic 1080p road frames."""
+    frames = []
+    if video:
+        cap = cv.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    rng = np.random.default_rng(0)
+    while len(frames) < min(count, 8):
+        frames.append(rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8))
+    return frames
+
+
+def old_path(frame):
+    roi, _ = yolov4.extract_roi(frame)
+    resized = cv.resize(roi, (yolov4.INPUT_SIZE, yolov4.INPUT_SIZE))
+    return cv.dnn.blobFromImage(resized, 1/255, (yolov4.INPUT_SIZE, yolov4.INPUT_SIZE), swapRB=True, crop=False)
+
+
+def measure(name, step, frames, n):
+    for frame in frames[:3]:    # Warm-up (first-call allocations are not per-frame churn)
+        step(frame)
+
+    start = time.perf_counter()
+    for i in range(n):
+        step(frames[i % len(frames)])
+    per_frame_ms = (time.perf_counter() - start) / n * 1000
+
+    tracemalloc.start()
+    allocated = 0
+    for i in range(n):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step(frames[i % len(frames)])
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    print(f"[Bench] {name:<13} {per_frame_ms:7.3f} ms/frame  {allocated / n / 1024:9.1f} KiB allocated/frame", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame preprocessing time and allocations")
+    parser.add_argument('--video', help='Source video (synthetic 1080p frames if omitted)')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--letterbox', action='store_true', help='Letterbox instead of stretching (new path)')
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    height, width = frames[0].shape[:2]
+    roi = roi_box(width, height, (yolov4.ROI_TOP, yolov4.ROI_BOTTOM, yolov4.ROI_LEFT, yolov4.ROI_RIGHT))
+    preprocessor = FramePreprocessor(width, height, yolov4.INPUT_SIZE, roi, letterbox=args.letterbox)
+    blob = BlobBuffer(yolov4.INPUT_SIZE)
+
+    print(f"[Bench] {width}x{height} -> {yolov4.INPUT_SIZE}x{yolov4.INPUT_SIZE}, {args.frames} frames"
+          f"{' (letterbox)' if args.letterbox else ''}", flush=True)
+    measure('allocating', old_path, frames, args.frames)
+    measure('preallocated', lambda frame: blob.fill([preprocessor.prepare(frame)]), frames, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
 import cv2 as cv
+import numpy as np
 import sys
 import os
 import time
 
+import inference_engine
+from detection_core import vehicle_detections
+from frame_source import roi_box
+from preprocess import FramePreprocessor
+from tracker import Tracker
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CLASS_FILE = os.path.join(BASE_DIR, 'classes.txt')
 CONFIG_FILE = os.path.join(BASE_DIR, 'yolov4-tiny.cfg')
@@ -13,32 +20,20 @@ WEIGHTS_FILE = os.path.join(BASE_DIR, 'yolov4-tiny.weights')
 CONF_THRESHOLD = 0.4         # Lower for catching more bikes in crowds
 NMS_THRESHOLD = 0.45         # Lower to allow overlapping bikes
 INPUT_SIZE = 416
+LETTERBOX = os.environ.get("YOLO_LETTERBOX", "0") == "1"         # Keep the ROI aspect ratio (pad) instead of stretching
+TRACKING = os.environ.get("YOLO_TRACKING", "0") == "1"           # Track boxes between detector runs
+DETECT_EVERY = int(os.environ.get("YOLO_TRACK_DETECT_EVERY", "3"))   # With tracking: run YOLO every Nth frame
+TRACK_MAX_AGE = int(os.environ.get("YOLO_TRACK_MAX_AGE", "2"))
+TRACK_MIN_HITS = int(os.environ.get("YOLO_TRACK_MIN_HITS", "2"))
+TRACK_IOU = float(os.environ.get("YOLO_TRACK_IOU", "0.3"))
 
-# Per-class thresholds for fine-tuned detection
-PER_CLASS_CONF = {
-    'car': 0.5,              # Strict for cars (avoid false positives)
-    'truck': 0.5,            # Strict for trucks
-    'bus': 0.5,              # Strict for buses
-    'motorbike': 0.35,       # Loose for bikes (catch all in crowds)
-    'bicycle': 0.4           # Loose for bicycles
-}
-
-# Per-class minimum box area (motorcycles are smaller than cars)
-MIN_BOX_AREA_DEFAULT = 600
-MIN_BOX_AREA = {
-    'car': 600,
-    'truck': 800,
-    'bus': 800,
-    'motorbike': 300,      # Much smaller than cars
-    'bicycle': 250         # Smallest
-}
+# Per-class confidence / minimum box area: shared with yolov4 and stream_ingest (detection_core.py)
 
 # <!--- Region of Interest (ROI) - focus on traffic lanes --->
 ROI_TOP = 0.15     # Skip top 15% (sky)
 ROI_BOTTOM = 1.0   # Use full bottom (road)
 ROI_LEFT = 0.0     # Use full left
 ROI_RIGHT = 1.0    # Use full right 
-VEHICLE_CLASSES = {'car', 'motorbike', 'bus', 'truck', 'bicycle'}
 
 COLORS = {
     'car': (0, 255, 0),       # Green
@@ -50,7 +45,17 @@ COLORS = {
 
 
 def create_model():
-    """Initialize YOLO model."""
+    """Initialize YOLO model (OpenCV DNN, or ONNX Runtime when YOLO_ENGINE=onnxruntime)."""
+    if inference_engine.ENGINE == 'onnxruntime':
+        try:
+            model = inference_engine.create_onnx_engine('tiny', INPUT_SIZE)
+            print(f"[YOLO] Using ONNX Runtime: {model.model_path}")
+            with open(CLASS_FILE, 'r') as f:
+                class_names = [c.strip() for c in f.readlines()]
+            return model, class_names
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"[YOLO] ONNX Runtime unavailable ({e}) - using OpenCV DNN")
+
     if not os.path.exists(WEIGHTS_FILE):
         raise FileNotFoundError(f"Missing weights: {WEIGHTS_FILE}")
     if not os.path.exists(CONFIG_FILE):
@@ -80,8 +85,7 @@ def create_model():
         net.setPreferableBackend(cv.dnn.DNN_BACKEND_DEFAULT)
         net.setPreferableTarget(cv.dnn.DNN_TARGET_CPU)
     
-    model = cv.dnn_DetectionModel(net)
-    model.setInputParams(size=(INPUT_SIZE, INPUT_SIZE), scale=1/255, swapRB=True)
+    model = inference_engine.OpenCVEngine(net, INPUT_SIZE)
     
     with open(CLASS_FILE, 'r') as f:
         class_names = [c.strip() for c in f.readlines()]
@@ -99,11 +103,17 @@ def extract_roi(frame):
     return frame[y1:y2, x1:x2], (x1, y1, x2, y2)
 
 
-def process_video(input_path, output_path):
-    """Process video and create output with detections."""
+def process_video(input_path, output_path, tracking=TRACKING, model=None, class_names=None):
+    """
+    Process video and create output with detections.
+    With tracking, YOLO runs every DETECT_EVERY frames and boxes in between come
+    from the tracker, so they move smoothly and keep their IDs.
+    An already-loaded model (and its class names) can be passed in, e.g. by benchmarks.
+    """
     
-    print(f"[Demo] Loading model...")
-    model, class_names = create_model()
+    if model is None:
+        print(f"[Demo] Loading model...")
+        model, class_names = create_model()
     
     print(f"[Demo] Opening video: {input_path}")
     cap = cv.VideoCapture(input_path)
@@ -126,65 +136,52 @@ def process_video(input_path, output_path):
     start_time = time.time()
     total_vehicles = 0
     max_vehicles = 0
+    tracker = Tracker(TRACK_MAX_AGE, TRACK_MIN_HITS, TRACK_IOU, frame_size=(INPUT_SIZE, INPUT_SIZE)) if tracking else None
+    
+    # ROI crop/resize into a preallocated input frame; boxes are mapped back with the same geometry
+    roi_coords = roi_box(width, height, (ROI_TOP, ROI_BOTTOM, ROI_LEFT, ROI_RIGHT))
+    preprocessor = FramePreprocessor(width, height, INPUT_SIZE, roi_coords, letterbox=LETTERBOX)
+    frame = None
+    overlay = np.empty((height, width, 3), np.uint8)
     
-    print(f"[Demo] Processing frames...")
+    print(f"[Demo] Processing frames{f' (tracking, YOLO every {DETECT_EVERY} frames)' if tracking else ''}...")
     
     while True:
-        ret, frame = cap.read()
+        ret, frame = cap.read(frame)    # Decodes into the previous frame's array
         if not ret:
             break
         
         frame_count += 1
         
-        # Extract ROI to focus on traffic lanes
-        frame_roi, roi_coords = extract_roi(frame)
-        roi_x1, roi_y1, roi_x2, roi_y2 = roi_coords
-        
-        # Get dimensions for coordinate scaling
-        roi_h = roi_y2 - roi_y1
-        roi_w = roi_x2 - roi_x1
-        scale_x = roi_w / INPUT_SIZE
-        scale_y = roi_h / INPUT_SIZE
+        # Extract ROI to focus on traffic lanes and resize it for faster processing
+        frame_resized = preprocessor.prepare(frame)
         
-        # Resize ROI for faster processing
-        frame_resized = cv.resize(frame_roi, (INPUT_SIZE, INPUT_SIZE))
+        # Detect objects (with tracking only every DETECT_EVERY frames)
+        if tracker is None or (frame_count - 1) % max(1, DETECT_EVERY) == 0:
+            classes, scores, boxes = model.detect(frame_resized, CONF_THRESHOLD, NMS_THRESHOLD)
+            vehicles = vehicle_detections(classes, scores, boxes, class_names, preprocessor.area_scale)
+        else:
+            vehicles = None
         
-        # Detect objects
-        classes, scores, boxes = model.detect(frame_resized, CONF_THRESHOLD, NMS_THRESHOLD)
+        if tracker is not None:
+            vehicles = [(t.box, t.label, t.score, t.id) for t in tracker.step(vehicles)]
+        else:
+            vehicles = [(box, class_name, score, None) for box, class_name, score in vehicles]
         
-        # Count and draw vehicles
-        vehicle_count = 0
-        for classid, score, box in zip(classes, scores, boxes):
-            class_name = class_names[classid]
-            if class_name in VEHICLE_CLASSES:
-                # Apply per-class confidence threshold
-                class_conf_threshold = PER_CLASS_CONF.get(class_name, CONF_THRESHOLD)
-                if score < class_conf_threshold:
-                    continue
-                
-                x, y, w, h = box
-                # Filter out tiny detections using per-class minimum area
-                min_area = MIN_BOX_AREA.get(class_name, MIN_BOX_AREA_DEFAULT)
-                if w * h < min_area:
-                    continue
-                
-                # Scale coordinates back to original frame
-                x_orig = int(x * scale_x) + roi_x1
-                y_orig = int(y * scale_y) + roi_y1
-                w_orig = int(w * scale_x)
-                h_orig = int(h * scale_y)
-                
-                vehicle_count += 1
-                color = COLORS.get(class_name, (0, 255, 0))
-                
-                # Draw bounding box on original frame
-                cv.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), color, 2)
-                
-                # Draw label
-                label = f"{class_name}: {score:.2f}"
-                label_size, _ = cv.getTextSize(label, cv.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                cv.rectangle(frame, (x_orig, y_orig - 20), (x_orig + label_size[0], y_orig), color, -1)
-                cv.putText(frame, label, (x_orig, y_orig - 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+        # Count and draw vehicles (coordinates scaled back to the original frame)
+        vehicle_count = len(vehicles)
+        frame_boxes = preprocessor.to_frame([box for box, _, _, _ in vehicles]).tolist()
+        for (_, class_name, score, track_id), (x_orig, y_orig, w_orig, h_orig) in zip(vehicles, frame_boxes):
+            color = COLORS.get(class_name, (0, 255, 0))
+            
+            # Draw bounding box on original frame
+            cv.rectangle(frame, (x_orig, y_orig), (x_orig + w_orig, y_orig + h_orig), color, 2)
+            
+            # Draw label
+            label = f"{class_name}: {score:.2f}" if track_id is None else f"{class_name} #{track_id}"
+            label_size, _ = cv.getTextSize(label, cv.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            cv.rectangle(frame, (x_orig, y_orig - 20), (x_orig + label_size[0], y_orig), color, -1)
+            cv.putText(frame, label, (x_orig, y_orig - 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
         
         total_vehicles += vehicle_count
         max_vehicles = max(max_vehicles, vehicle_count)
@@ -194,9 +191,9 @@ def process_video(input_path, output_path):
         current_fps = frame_count / elapsed if elapsed > 0 else 0
         
         # Semi-transparent overlay
-        overlay = frame.copy()
-        cv.rectangle(overlay, (10, 10), (300, 120), (0, 0, 0), -1)
-        frame = cv.addWeighted(overlay, 0.6, frame, 0.4, 0)
+        np.copyto(overlay, frame)
+        cv.rectangle(overlay, (10, 10), (300, 150 if tracker is not None else 120), (0, 0, 0), -1)
+        cv.addWeighted(overlay, 0.6, frame, 0.4, 0, dst=frame)
         
         cv.putText(frame, f"Vehicles in frame: {vehicle_count}", (20, 40), 
                    cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
@@ -204,6 +201,9 @@ def process_video(input_path, output_path):
                    cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         cv.putText(frame, f"FPS: {current_fps:.1f} | Frame: {frame_count}/{total_frames}", (20, 100), 
                    cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        if tracker is not None:
+            cv.putText(frame, f"Unique vehicles: {tracker.unique_count}", (20, 130), 
+                       cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
         
         out.write(frame)
         
@@ -226,6 +226,9 @@ def process_video(input_path, output_path):
     print(f"       - Average FPS: {frame_count/elapsed:.1f}")
     print(f"       - Max vehicles in frame: {max_vehicles}")
     print(f"       - Average vehicles per frame: {avg_vehicles:.1f}")
+    if tracker is not None:
+        print(f"       - YOLO frames: {tracker.detected_frames}/{frame_count}")
+        print(f"       - Unique vehicles: {tracker.unique_count}")
     
     return output_path
 
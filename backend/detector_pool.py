@@ -0,0 +1,456 @@
+"""
+Persistent YOLO Detection Worker Pool
+Workers are spawned once, load the model once, then take video jobs from a shared queue.
+Completion is signalled per job with an Event; workers are recycled after N jobs or
+when their RSS grows past a limit, and a watchdog enforces per-job timeouts.
+Cancelled and timed-out jobs are published in a shared ring of job ids: workers skip
+queued tasks found there and abort running ones at their next progress report, and are
+only killed if they have not let go after CANCEL_GRACE seconds.
+With pipelined decode each worker gets its own decoder process feeding a shared-memory
+frame ring (see frame_pipeline.py).
+Workers time their own jobs and send the timings back with the result; the collector
+records them in the API process metrics (src/metrics.py), along with timeouts and restarts.
+"""
+
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+
+from src.metrics import DETECTION_FPS, DETECTION_JOB_SECONDS, TIMEOUTS, WORKER_RESTARTS
+
+# <!--- Pool configuration --->
+MAX_JOBS_PER_WORKER = int(os.environ.get("YOLO_MAX_JOBS_PER_WORKER", "50"))     # Recycle after N videos
+MAX_WORKER_RSS_MB = int(os.environ.get("YOLO_MAX_WORKER_RSS_MB", "1536"))       # Recycle above this RSS (0 = off)
+JOB_TIMEOUT = int(os.environ.get("YOLO_JOB_TIMEOUT", "300"))                    # Seconds per video once started
+WATCHDOG_INTERVAL = 0.5                                                         # Seconds between timeout/liveness checks
+CANCEL_GRACE = float(os.environ.get("YOLO_CANCEL_GRACE", "10"))                 # Seconds for a worker to abort a cancelled job
+CANCEL_SLOTS = 1024                                                             # Recently cancelled job ids shared with workers
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its current job has been cancelled by the pool."""
+
+
+def _rss_mb():
+    """Resident set size of the current process in MB (0 if unavailable)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def _is_cancelled(cancelled, job_id):
+    with cancelled.get_lock():
+        return job_id in cancelled.get_obj()
+
+
+def _worker_main(worker_id, task_queue, result_queue, max_jobs, max_rss_mb, pipeline=None, cancelled=None):
+    """
+    Worker process entry point.
+    Loads the model once and serves (job_id, kind, payload) tasks until told to stop
+    or until it decides to retire itself. pipeline is the spec of this worker's
+    decoder process and frame ring (None = decode in-process). cancelled is the pool's
+    shared ring of cancelled job ids.
+    """
+    import yolov4
+
+    try:
+        engine, class_names = yolov4.create_engine()
+        model = yolov4.create_cascade(engine) if yolov4.CASCADE else engine
+        load_error = None
+        print(f"[YOLO-W{worker_id}] Model loaded (pid {os.getpid()})", flush=True)
+    except Exception as e:
+        engine, model, class_names = None, None, None
+        load_error = str(e)
+        print(f"[YOLO-W{worker_id}] Model load failed: {e}", flush=True)
+
+    jobs_done = 0
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        job_id, kind, payload = task
+        if cancelled is not None and _is_cancelled(cancelled, job_id):
+            continue    # Abandoned while queued: the pool has already reported it
+        result_queue.put(('started', worker_id, job_id))
+        job_start = time.perf_counter()
+        lane_frames = {}    # lane -> last reported sampled frames (batch jobs report every lane)
+
+        def report(frames, fps, lane=None, _job_id=job_id, _lane_frames=lane_frames):
+            if cancelled is not None and _is_cancelled(cancelled, _job_id):
+                raise JobCancelled(f"job {_job_id} cancelled")
+            _lane_frames[lane] = frames
+            result_queue.put(('progress', worker_id, _job_id, (frames, fps, lane)))
+
+        if load_error:
+            result, error = None, load_error
+        else:
+            try:
+                if kind == 'batch':
+                    # Per-lane (counts, errors) come back as the job result
+                    result = yolov4._detect_videos_batched(engine, class_names, payload, worker_id, progress=report)
+                    error = None
+                elif kind == 'segment':
+                    video_file, start_frame, end_frame = payload
+                    result, error = yolov4._scan_video(model, class_names, video_file, worker_id,
+                                                       start_frame, end_frame, progress=report, pipeline=pipeline)
+                else:
+                    result, error = yolov4._detect_video(model, class_names, payload, worker_id,
+                                                         progress=report, pipeline=pipeline)
+            except JobCancelled:
+                print(f"[YOLO-W{worker_id}] Job {job_id} cancelled - stopping it", flush=True)
+                result, error = None, "Cancelled"
+            except Exception as e:
+                print(f"[YOLO-W{worker_id}] Error: {e}", flush=True)
+                result, error = None, str(e)
+
+        job_metrics = {'seconds': time.perf_counter() - job_start, 'frames': sum(lane_frames.values())}
+        result_queue.put(('done', worker_id, job_id, result, error, job_metrics))
+        jobs_done += 1
+        if pipeline is not None:
+            ring_stats = pipeline[0].stall_stats()
+            print(f"[YOLO-W{worker_id}] Ring stalls: decoder={ring_stats['decoder_stalls']} "
+                  f"({ring_stats['decoder_stall_seconds']}s), inference={ring_stats['inference_stalls']} "
+                  f"({ring_stats['inference_stall_seconds']}s)", flush=True)
+
+        # <!--- Recycle instead of relying on gc inside a long-lived process --->
+        rss = _rss_mb()
+        if jobs_done >= max_jobs or (max_rss_mb and rss > max_rss_mb):
+            print(f"[YOLO-W{worker_id}] Retiring after {jobs_done} jobs (rss={rss:.0f} MB)", flush=True)
+            result_queue.put(('retired', worker_id, None))
+            break
+
+
+class DetectionJob:
+    """Handle for one submitted job; `done` is set once result/error are final."""
+
+    def __init__(self, job_id, video_file, kind='video', on_progress=None):
+        self.job_id = job_id
+        self.video_file = video_file
+        self.kind = kind
+        self.on_progress = on_progress     # called as on_progress(frames, fps, lane)
+        self.result = None
+        self.error = None
+        self.worker_id = None
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class DetectionPool:
+    """Fixed-size pool of warm detection workers (spawn context)."""
+
+    def __init__(self, size, max_jobs_per_worker=MAX_JOBS_PER_WORKER,
+                 max_rss_mb=MAX_WORKER_RSS_MB, job_timeout=JOB_TIMEOUT, pipelined=False, ring_depth=8):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.job_timeout = job_timeout
+        self.pipelined = pipelined
+        self.ring_depth = ring_depth
+        self.restarts = 0
+
+        self._ctx = mp.get_context('spawn')
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._workers = {}      # worker_id -> Process
+        self._pipelines = {}    # worker_id -> FramePipeline (pipelined mode)
+        self._running = {}      # worker_id -> DetectionJob
+        self._jobs = {}         # job_id -> DetectionJob (pending or running)
+        self._cancelling = {}   # worker_id -> (job_id, kill deadline, reason) for abandoned running jobs
+        self._cancelled = self._ctx.Array('q', [-1] * CANCEL_SLOTS)   # Shared with workers
+        self._cancel_slot = 0
+        self._job_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._closed = False
+
+        for _ in range(size):
+            self._spawn_worker()
+
+        self._collector = threading.Thread(target=self._collect, name="yolo-pool-collector", daemon=True)
+        self._collector.start()
+
+    # <!--- Worker lifecycle --->
+    def _spawn_worker(self):
+        worker_id = next(self._worker_ids)
+        spec = None
+        if self.pipelined:
+            # A fresh ring per worker: a killed worker may leave the old one mid-frame
+            from frame_pipeline import FramePipeline
+            from yolov4 import INPUT_SIZE
+            pipeline = FramePipeline(self._ctx, self.ring_depth, (INPUT_SIZE, INPUT_SIZE, 3))
+            self._pipelines[worker_id] = pipeline
+            spec = pipeline.spec()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._tasks, self._results, self.max_jobs_per_worker, self.max_rss_mb, spec,
+                  self._cancelled),
+            daemon=True
+        )
+        proc.start()
+        self._workers[worker_id] = proc
+        return worker_id
+
+    def _stop_pipeline(self, worker_id):
+        pipeline = self._pipelines.pop(worker_id, None)
+        if pipeline is not None:
+            pipeline.stop()
+
+    def _replace_worker(self, worker_id, kill=False, reason='retired'):
+        """
+        Drop a worker (optionally killing it) and start a fresh one. Caller holds the lock.
+        A worker that was already replaced (e.g. reaped before its 'retired' message
+        arrived) is left alone, so the pool never grows past its size.
+        """
+        proc = self._workers.pop(worker_id, None)
+        self._cancelling.pop(worker_id, None)
+        if proc is None:
+            return
+        if kill and proc.is_alive():
+            proc.terminate()
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.kill()
+        else:
+            proc.join(timeout=1)
+        self._stop_pipeline(worker_id)
+        if not self._closed:
+            self._spawn_worker()
+            self.restarts += 1
+            WORKER_RESTARTS.inc(reason=reason)
+
+    def _finish(self, job, result, error):
+        """Record the outcome of a job exactly once. Caller holds the lock."""
+        if job.done.is_set():
+            return
+        self._jobs.pop(job.job_id, None)
+        if job.worker_id is not None and self._running.get(job.worker_id) is job:
+            del self._running[job.worker_id]
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.done.set()
+
+    def _abandon(self, job, worker_id, reason):
+        """
+        Tell workers to drop a finished-by-the-pool job: skipped if still queued, aborted at
+        its next progress report if running (killed after CANCEL_GRACE). Caller holds the lock.
+        """
+        with self._cancelled.get_lock():
+            self._cancelled[self._cancel_slot] = job.job_id
+        self._cancel_slot = (self._cancel_slot + 1) % CANCEL_SLOTS
+        if worker_id is not None and worker_id in self._workers:
+            self._cancelling[worker_id] = (job.job_id, time.time() + CANCEL_GRACE, reason)
+
+    # <!--- Collector / watchdog thread --->
+    def _collect(self):
+        while not self._closed:
+            try:
+                msg = self._results.get(timeout=WATCHDOG_INTERVAL)
+            except queue.Empty:
+                msg = None
+            except (EOFError, OSError):
+                break
+
+            callback = None
+            with self._lock:
+                if msg is not None:
+                    callback = self._handle_message(msg)
+                self._check_workers()
+            if callback is not None:
+                # Outside the lock: callbacks may be slow or call back into the pool
+                job_id, on_progress, args = callback
+                try:
+                    on_progress(*args)
+                except Exception as e:
+                    print(f"[YOLO] Progress callback failed for job {job_id}: {e}", flush=True)
+
+    def _handle_message(self, msg):
+        """Apply one worker message; returns (job_id, on_progress, args) for a progress callback to run."""
+        kind, worker_id, job_id = msg[0], msg[1], msg[2]
+        if kind in ('started', 'done') and worker_id in self._cancelling:
+            # The worker let go of the abandoned job (finished it, aborted it or moved on)
+            del self._cancelling[worker_id]
+        if kind == 'started':
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.worker_id = worker_id
+                job.started_at = time.time()
+                self._running[worker_id] = job
+        elif kind == 'done':
+            job = self._jobs.get(job_id)
+            if job is not None:
+                _, _, _, result, error = msg[:5]
+                self._finish(job, result, error)
+                self._record_job(job, msg[5] if len(msg) > 5 else None)
+                print(f"[YOLO] Worker {worker_id} completed job {job_id}: result={result} (errors: {error})", flush=True)
+            self._running.pop(worker_id, None)
+        elif kind == 'progress':
+            job = self._jobs.get(job_id)
+            if job is not None and job.on_progress is not None:
+                return job_id, job.on_progress, msg[3]
+        elif kind == 'retired':
+            self._replace_worker(worker_id, reason='retired')
+        return None
+
+    @staticmethod
+    def _record_job(job, job_metrics):
+        """Observe the timings a worker measured for one finished job."""
+        if not job_metrics:
+            return
+        seconds = job_metrics.get('seconds') or 0.0
+        DETECTION_JOB_SECONDS.observe(seconds, kind=job.kind)
+        if job.error is None and seconds > 0 and job_metrics.get('frames'):
+            DETECTION_FPS.observe(job_metrics['frames'] / seconds, kind=job.kind)
+
+    def _check_workers(self):
+        now = time.time()
+        for worker_id, proc in list(self._workers.items()):
+            job = self._running.get(worker_id)
+            cancelling = self._cancelling.get(worker_id)
+            if job is not None and self.job_timeout and now - job.started_at > self.job_timeout:
+                print(f"[YOLO] Timeout - stopping worker {worker_id} on {job.video_file}", flush=True)
+                self._finish(job, 0, "Timeout")
+                TIMEOUTS.inc(stage='detection_job')
+                self._abandon(job, worker_id, 'timeout')
+            elif cancelling is not None and now > cancelling[1] and proc.is_alive():
+                print(f"[YOLO] Worker {worker_id} still on cancelled job {cancelling[0]} - terminating", flush=True)
+                self._replace_worker(worker_id, kill=True, reason=cancelling[2])
+            elif not proc.is_alive():
+                # A clean exit is a retirement whose message is still queued; anything else is a crash
+                if job is not None:
+                    self._finish(job, None, f"Worker exited unexpectedly (code {proc.exitcode})")
+                if proc.exitcode == 0 and job is None:
+                    self._replace_worker(worker_id, reason='retired')
+                else:
+                    print(f"[YOLO] Worker {worker_id} died (code {proc.exitcode}) - restarting", flush=True)
+                    self._replace_worker(worker_id, reason='crashed')
+
+    # <!--- Public API --->
+    def submit(self, video_file, kind='video', on_progress=None):
+        """
+        Queue one job; returns a DetectionJob.
+        kind='video' detects one file, kind='segment' a (file, start_frame, end_frame)
+        range and kind='batch' takes a list of lane files.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Detection pool is shut down")
+            job = DetectionJob(next(self._job_ids), video_file, kind, on_progress)
+            self._jobs[job.job_id] = job
+        self._tasks.put((job.job_id, kind, video_file))
+        return job
+
+    def cancel(self, job, reason="Cancelled"):
+        """
+        Give up on a job: it is reported with `reason` right away, dropped from the queue
+        and stopped on its worker (see _abandon).
+        """
+        with self._lock:
+            if job.done.is_set():
+                return
+            worker_id = job.worker_id
+            self._finish(job, 0, reason)
+            self._abandon(job, worker_id, 'cancelled')
+
+    def wait_all(self, jobs, timeout=None):
+        """Wait for jobs under one overall deadline; stragglers are cancelled as timeouts."""
+        deadline = time.time() + timeout if timeout else None
+
+        for job in jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            if not job.wait(remaining):
+                print(f"[YOLO] Overall timeout - abandoning {job.video_file}", flush=True)
+                if not job.done.is_set():
+                    TIMEOUTS.inc(stage='detection_overall')
+                self.cancel(job, "Timeout")
+
+    def map(self, video_files, timeout=None):
+        """
+        Detect all videos and wait for them.
+        Returns (results, errors) lists aligned with video_files.
+        """
+        jobs = [self.submit(v) for v in video_files]
+        self.wait_all(jobs, timeout)
+
+        results = [job.result if job.result is not None else 0 for job in jobs]
+        errors = [job.error for job in jobs]
+        return results, errors
+
+    def pipeline_stats(self):
+        """Decoder/inference stall counters summed over live frame rings (None if not pipelined)."""
+        if not self.pipelined:
+            return None
+        totals = {'depth': self.ring_depth, 'decoder_stalls': 0, 'decoder_stall_seconds': 0.0,
+                  'inference_stalls': 0, 'inference_stall_seconds': 0.0}
+        for pipeline in self._pipelines.values():
+            for key, value in pipeline.ring.stall_stats().items():
+                if key != 'depth':
+                    totals[key] += value
+        totals['decoder_stall_seconds'] = round(totals['decoder_stall_seconds'], 3)
+        totals['inference_stall_seconds'] = round(totals['inference_stall_seconds'], 3)
+        return totals
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': len(self._workers),
+                'running': len(self._running),
+                'pending': len(self._jobs) - len(self._running),
+                'restarts': self.restarts,
+                'pipeline': self.pipeline_stats(),
+            }
+
+    def shutdown(self, timeout=5):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            procs = list(self._workers.values())
+            pipelines = list(self._pipelines.values())
+            self._workers.clear()
+            self._pipelines.clear()
+            for job in list(self._jobs.values()):
+                self._finish(job, 0, "Pool shut down")
+        for _ in procs:
+            self._tasks.put(None)
+        for proc in procs:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.terminate()
+        for pipeline in pipelines:
+            pipeline.stop()
+        self._collector.join(timeout=timeout)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size=None):
+    """Return the process-wide detection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from yolov4 import MAX_PARALLEL_WORKERS, PIPELINED_DECODE, RING_DEPTH
+            _pool = DetectionPool(size or MAX_PARALLEL_WORKERS, pipelined=PIPELINED_DECODE, ring_depth=RING_DEPTH)
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
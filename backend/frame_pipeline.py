@@ -0,0 +1,218 @@
+"""
+Pipelined Decode -> Inference over Shared Memory
+A dedicated decoder process writes sampled, ROI-cropped, resized frames into a
+multiprocessing.shared_memory ring buffer; the inference worker reads them as NumPy
+views (no pickling, no copies) so decoding the next frame overlaps model.detect.
+Each ring is single-producer/single-consumer and counts stalls on both sides.
+"""
+
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frame_source import FrameSource
+
+END_OF_STREAM = -1
+
+# <!--- Indices into SharedFrameRing.counters --->
+DECODER_STALLS, DECODER_STALL_SECONDS, INFERENCE_STALLS, INFERENCE_STALL_SECONDS = range(4)
+
+
+class SharedFrameRing:
+    """
+    Fixed-depth ring of equally shaped uint8 frames in shared memory.
+    `free` counts empty slots, `filled` counts frames ready for the consumer;
+    each side keeps its own slot cursor, so no lock is held while copying or reading.
+    """
+
+    def __init__(self, ctx, depth, shape):
+        self.depth = depth
+        self.shape = tuple(shape)
+        self.frame_bytes = int(np.prod(self.shape))
+        self.free = ctx.Semaphore(depth)
+        self.filled = ctx.Semaphore(0)
+        self.frame_ids = ctx.Array('q', depth, lock=False)
+        self.counters = ctx.Array('d', 4, lock=False)    # each side only writes its own two
+        self.abort = ctx.Value('b', 0, lock=False)
+        self._shm = shared_memory.SharedMemory(create=True, size=depth * self.frame_bytes)
+        self._owner = True
+        self._attach_views()
+
+    def _attach_views(self):
+        self._put_slot = 0
+        self._get_slot = 0
+        self._views = np.ndarray((self.depth,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm_name'] = self._shm.name
+        for key in ('_shm', '_views', '_put_slot', '_get_slot', '_owner'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        name = state.pop('_shm_name')
+        self.__dict__.update(state)
+        # Spawned children share the parent's resource tracker, so attaching does not
+        # add a second registration; only the creating process unlinks the segment
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = False
+        self._attach_views()
+
+    @staticmethod
+    def _acquire(sem, counters, count_idx, seconds_idx):
+        if sem.acquire(False):
+            return
+        t0 = time.perf_counter()
+        sem.acquire()
+        counters[count_idx] += 1
+        counters[seconds_idx] += time.perf_counter() - t0
+
+    # <!--- Producer side (decoder process) --->
+    def put(self, frame_idx, frame):
+        self._acquire(self.free, self.counters, DECODER_STALLS, DECODER_STALL_SECONDS)
+        self._views[self._put_slot][...] = frame
+        self.frame_ids[self._put_slot] = frame_idx
+        self.filled.release()
+        self._put_slot = (self._put_slot + 1) % self.depth
+
+    def put_end(self):
+        self._acquire(self.free, self.counters, DECODER_STALLS, DECODER_STALL_SECONDS)
+        self.frame_ids[self._put_slot] = END_OF_STREAM
+        self.filled.release()
+        self._put_slot = (self._put_slot + 1) % self.depth
+
+    # <!--- Consumer side (inference worker) --->
+    def get(self):
+        """Next (frame_idx, view); the view stays valid until release()."""
+        self._acquire(self.filled, self.counters, INFERENCE_STALLS, INFERENCE_STALL_SECONDS)
+        return self.frame_ids[self._get_slot], self._views[self._get_slot]
+
+    def release(self):
+        self.free.release()
+        self._get_slot = (self._get_slot + 1) % self.depth
+
+    def stall_stats(self):
+        c = self.counters
+        return {
+            'depth': self.depth,
+            'decoder_stalls': int(c[DECODER_STALLS]),
+            'decoder_stall_seconds': round(c[DECODER_STALL_SECONDS], 3),
+            'inference_stalls': int(c[INFERENCE_STALLS]),
+            'inference_stall_seconds': round(c[INFERENCE_STALL_SECONDS], 3),
+        }
+
+    def close(self):
+        self._views = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _decoder_main(ring, commands, replies):
+    """Decoder process: serve (video_file, start, end, source_options) requests into the ring."""
+    while True:
+        cmd = commands.get()
+        if cmd is None:
+            break
+        video_file, start_frame, end_frame, options = cmd
+        ring.abort.value = 0
+        try:
+            source = FrameSource(video_file, start_frame=start_frame, end_frame=end_frame, **options)
+        except Exception as e:
+            replies.put(('error', str(e)))
+            continue
+
+        replies.put(('info', source.frame_count, source.fps, source.mode, source.area_scale))
+        decoded, error = 0, None
+        try:
+            with source:
+                for frame_idx, frame in source:
+                    if ring.abort.value:
+                        break
+                    ring.put(frame_idx, frame)
+                    decoded += 1
+        except Exception as e:
+            error = str(e)
+        ring.put_end()
+        replies.put(('done', decoded, error))
+    ring.close()
+
+
+class FramePipeline:
+    """Parent-side owner of one ring buffer and the decoder process feeding it."""
+
+    def __init__(self, ctx, depth, frame_shape):
+        self.ring = SharedFrameRing(ctx, depth, frame_shape)
+        self.commands = ctx.Queue()
+        self.replies = ctx.Queue()
+        self.decoder = ctx.Process(target=_decoder_main, args=(self.ring, self.commands, self.replies),
+                                   daemon=True)
+        self.decoder.start()
+
+    def spec(self):
+        """Picklable handle passed to the inference worker at spawn time."""
+        return self.ring, self.commands, self.replies
+
+    def stop(self, timeout=2):
+        if self.decoder.is_alive():
+            self.commands.put(None)
+            self.decoder.join(timeout=timeout)
+            if self.decoder.is_alive():
+                self.decoder.terminate()
+                self.decoder.join(timeout=timeout)
+        self.ring.close()
+
+
+class PipelinedSource:
+    """
+    Worker-side frame source backed by the decoder process.
+    Same interface as FrameSource: frame_count/fps/mode, iteration, context manager.
+    """
+
+    def __init__(self, spec, video_file, start_frame=0, end_frame=None, **options):
+        self.ring, self._commands, self._replies = spec
+        self.video_file = video_file
+        self._commands.put((video_file, start_frame, end_frame, options))
+        reply = self._replies.get()
+        if reply[0] == 'error':
+            raise IOError(reply[1])
+        _, self.frame_count, self.fps, mode, self.area_scale = reply
+        self.mode = f"{mode}+pipelined"
+        self.error = None
+        self._finished = False
+
+    def __iter__(self):
+        while True:
+            frame_idx, view = self.ring.get()
+            if frame_idx == END_OF_STREAM:
+                self.ring.release()
+                self._finish()
+                return
+            try:
+                yield frame_idx, view
+            finally:
+                self.ring.release()
+
+    def _finish(self):
+        _, decoded, self.error = self._replies.get()
+        self._finished = True
+
+    def release(self):
+        """Stop the decoder early if needed and drain to the end marker to keep the ring in sync."""
+        if self._finished:
+            return
+        self.ring.abort.value = 1
+        while True:
+            frame_idx, _ = self.ring.get()
+            self.ring.release()
+            if frame_idx == END_OF_STREAM:
+                break
+        self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
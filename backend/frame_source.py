@@ -0,0 +1,225 @@
+"""
+Sampled Frame Sources for Detection
+Yield only the frames detection will look at, already ROI-cropped and resized.
+Modes:
+  - 'grab':   cv.VideoCapture, skipped frames are grab()bed (no retrieve/colour conversion)
+  - 'seek':   cv.VideoCapture, jump straight to each sampled frame with CAP_PROP_POS_FRAMES
+  - 'ffmpeg': ffmpeg pipe with select/crop/scale filters, so only small sampled frames reach Python
+With buffers > 0 frames are written into a ring of preallocated arrays (see preprocess.py),
+so a yielded frame is only valid until `buffers` more frames have been read.
+"""
+
+import functools
+import re
+import shutil
+import subprocess
+
+import cv2 as cv
+import numpy as np
+
+from preprocess import FramePreprocessor, PAD_VALUE
+
+FRAME_SOURCE_MODES = ('grab', 'seek', 'ffmpeg')
+
+
+def find_ffmpeg():
+    """Path to an ffmpeg binary (system or imageio-ffmpeg), or None."""
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def passthrough_args(version_text):
+    """
+    Frame-rate passthrough option for an ffmpeg whose `-version` output is version_text:
+    `-fps_mode` from 5.1 on, `-vsync` (removed later) before. Unversioned git builds are new.
+    """
+    match = re.search(r"ffmpeg version n?(\d+)\.(\d+)", version_text)
+    if match and (int(match.group(1)), int(match.group(2))) < (5, 1):
+        return ['-vsync', 'passthrough']
+    return ['-fps_mode', 'passthrough']
+
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_passthrough_args(ffmpeg):
+    """passthrough_args() for the ffmpeg binary at this path (probed once)."""
+    try:
+        out = subprocess.run([ffmpeg, '-hide_banner', '-version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        out = ''
+    return passthrough_args(out)
+
+
+def roi_box(width, height, roi):
+    """Pixel ROI (x1, y1, x2, y2) for fractional roi=(top, bottom, left, right); same math as extract_roi."""
+    top, bottom, left, right = roi
+    return int(width * left), int(height * top), int(width * right), int(height * bottom)
+
+
+class FrameSource:
+    """
+    Iterate (frame_idx, frame) over every step-th frame of a video.
+    Frames are cropped to the ROI and resized (stretched, or letterboxed) to
+    size x size (BGR, uint8); self.preprocessor maps boxes back to the video frame.
+    """
+
+    def __init__(self, video_file, step=1, size=416, roi=(0.0, 1.0, 0.0, 1.0),
+                 mode='grab', start_frame=0, end_frame=None, letterbox=False, buffers=0):
+        if mode not in FRAME_SOURCE_MODES:
+            raise ValueError(f"Unknown frame source mode: {mode}")
+        self.video_file = video_file
+        self.step = max(1, int(step))
+        self.size = size
+        self.roi = roi
+        self.start_frame = start_frame
+
+        cap = cv.VideoCapture(video_file)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {video_file}")
+        self.width = int(cap.get(cv.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
+        self.fps = cap.get(cv.CAP_PROP_FPS) or 30
+        self.frame_count = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+        self.end_frame = end_frame
+        self.roi_coords = roi_box(self.width, self.height, roi)
+        self.buffers = buffers
+        self.preprocessor = FramePreprocessor(self.width, self.height, size, self.roi_coords,
+                                              letterbox=letterbox, buffers=max(1, buffers))
+
+        if mode == 'ffmpeg' and not find_ffmpeg():
+            print("[Frames] ffmpeg not available - falling back to grab()", flush=True)
+            mode = 'grab'
+        self.mode = mode
+
+        if mode == 'ffmpeg':
+            cap.release()
+            self._cap = None
+        else:
+            self._cap = cap
+
+    # <!--- Helpers --->
+    def _new_frame(self):
+        """Output array for the next frame: a ring buffer, or a fresh array when buffers=0."""
+        return None if self.buffers else np.empty((self.size, self.size, 3), np.uint8)
+
+    def _prepare(self, frame):
+        return self.preprocessor.prepare(frame, out=self._new_frame())
+
+    def _in_range(self, frame_idx):
+        return self.end_frame is None or frame_idx < self.end_frame
+
+    # <!--- Modes --->
+    def _iter_grab(self):
+        cap = self._cap
+        if self.start_frame:
+            cap.set(cv.CAP_PROP_POS_FRAMES, self.start_frame)
+        frame_idx = self.start_frame
+        raw = None
+        while self._in_range(frame_idx):
+            ret, raw = cap.read(raw)    # Decode into the previous frame's array
+            if not ret:
+                break
+            yield frame_idx, self._prepare(raw)
+            # <!--- Demux/decode skipped frames without retrieving them --->
+            for _ in range(self.step - 1):
+                frame_idx += 1
+                if not self._in_range(frame_idx) or not cap.grab():
+                    return
+            frame_idx += 1
+
+    def _iter_seek(self):
+        cap = self._cap
+        frame_idx = self.start_frame
+        end = self.end_frame if self.end_frame is not None else self.frame_count
+        raw = None
+        while frame_idx < end:
+            cap.set(cv.CAP_PROP_POS_FRAMES, frame_idx)
+            ret, raw = cap.read(raw)
+            if not ret:
+                break
+            yield frame_idx, self._prepare(raw)
+            frame_idx += self.step
+
+    def _iter_ffmpeg(self):
+        x1, y1, x2, y2 = self.roi_coords
+        pre = self.preprocessor
+        filters = [
+            f"select='not(mod(n\\,{self.step}))'",
+            f"crop={x2 - x1}:{y2 - y1}:{x1}:{y1}",
+            f"scale={pre.new_w}:{pre.new_h}:flags=bilinear",
+        ]
+        if pre.letterbox:
+            pad_color = '0x' + f"{PAD_VALUE:02x}" * 3
+            filters.append(f"pad={self.size}:{self.size}:{pre.pad_x}:{pre.pad_y}:color={pad_color}")
+        ffmpeg = find_ffmpeg()
+        args = [ffmpeg, '-v', 'error', '-nostdin']
+        if self.start_frame:
+            args += ['-ss', f"{self.start_frame / self.fps:.6f}"]
+        args += ['-i', self.video_file]
+        if self.end_frame is not None:
+            args += ['-frames:v', str(max(0, -(-(self.end_frame - self.start_frame) // self.step)))]
+        args += ['-vf', ','.join(filters), *ffmpeg_passthrough_args(ffmpeg),
+                 '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+        frame_bytes = self.size * self.size * 3
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame_bytes * 4)
+        try:
+            frame_idx = self.start_frame
+            # <!--- Read straight into preallocated frames (fresh arrays when buffers=0) --->
+            ring = [np.empty((self.size, self.size, 3), np.uint8) for _ in range(self.buffers)]
+            read = 0
+            while True:
+                frame = ring[read % len(ring)] if ring else self._new_frame()
+                read += 1
+                view = memoryview(frame).cast('B')
+                filled = 0
+                while filled < frame_bytes:
+                    n = proc.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled < frame_bytes:
+                    break
+                yield frame_idx, frame
+                frame_idx += self.step
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    @property
+    def area_scale(self):
+        """Factor from box areas in these frames to the stretched ROI (1.0 unless letterboxed)."""
+        return self.preprocessor.area_scale
+
+    def read_at(self, frame_idx):
+        """Random access: the prepared frame at frame_idx, or None past the end of the video."""
+        if self._cap is None:
+            self._cap = cv.VideoCapture(self.video_file)
+        self._cap.set(cv.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = self._cap.read()
+        return self._prepare(frame) if ret else None
+
+    def __iter__(self):
+        if self.mode == 'ffmpeg':
+            return self._iter_ffmpeg()
+        if self.mode == 'seek':
+            return self._iter_seek()
+        return self._iter_grab()
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
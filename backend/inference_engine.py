@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Pluggable Inference Engines
+Every engine exposes the cv.dnn_DetectionModel interface used across the backend:
+  detect(frame, conf, nms)        -> (classes, scores, boxes) for one frame
+  detect_batch(frames, conf, nms) -> one (classes, scores, boxes) tuple per frame
+Engines:
+  - 'opencv':      cv.dnn Darknet net (default)
+  - 'onnxruntime': exported ONNX model (optionally INT8-quantized) on ONNX Runtime CPU,
+                   with configurable intra-op / inter-op threads
+Both share the same post-processing, so counts only differ by what the network outputs.
+
+Usage (INT8 quantization of an exported model):
+  python inference_engine.py quantize yolov4-tiny.onnx [--video uploads/video_0.mp4]
+"""
+
+import argparse
+import os
+
+import cv2 as cv
+import numpy as np
+
+from preprocess import BlobBuffer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# <!--- Engine configuration --->
+ENGINE = os.environ.get("YOLO_ENGINE", "opencv")                     # 'opencv' or 'onnxruntime'
+ONNX_MODEL_FILES = {
+    'tiny': os.environ.get("YOLO_ONNX_MODEL", os.path.join(BASE_DIR, 'yolov4-tiny.onnx')),
+    'full': os.environ.get("YOLO_ONNX_FULL_MODEL", os.path.join(BASE_DIR, 'yolov4.onnx')),
+}
+ONNX_INT8 = os.environ.get("YOLO_ONNX_INT8", "0") == "1"             # Use the *.int8.onnx sibling of the model
+ORT_INTRA_OP_THREADS = int(os.environ.get("YOLO_ORT_INTRA_THREADS", "0"))  # 0 = ONNX Runtime default
+ORT_INTER_OP_THREADS = int(os.environ.get("YOLO_ORT_INTER_THREADS", "0"))
+
+ENGINES = ('opencv', 'onnxruntime')
+
+_EMPTY = (np.empty(0, np.int32), np.empty(0, np.float32), np.empty((0, 4), np.int32))
+
+
+def decode_detections(rows, frame_w, frame_h, conf_threshold, nms_threshold):
+    """
+    Turn raw YOLO rows [cx, cy, w, h, obj, class scores...] for one image into
+    (classes, scores, boxes) exactly like DetectionModel.detect does.
+    """
+    if len(rows) == 0:
+        return _EMPTY
+
+    class_scores = rows[:, 5:]
+    class_ids = class_scores.argmax(axis=1)
+    confidences = class_scores[np.arange(len(rows)), class_ids]
+    keep = confidences > conf_threshold
+    rows, class_ids, confidences = rows[keep], class_ids[keep], confidences[keep]
+    if len(rows) == 0:
+        return _EMPTY
+
+    # <!--- Same integer box math as cv::dnn::DetectionModel --->
+    cx = (rows[:, 0] * frame_w).astype(np.int32)
+    cy = (rows[:, 1] * frame_h).astype(np.int32)
+    bw = (rows[:, 2] * frame_w).astype(np.int32)
+    bh = (rows[:, 3] * frame_h).astype(np.int32)
+    left = np.clip(cx - bw // 2, 0, frame_w - 1)
+    top = np.clip(cy - bh // 2, 0, frame_h - 1)
+    bw = np.maximum(1, np.minimum(bw, frame_w - left))
+    bh = np.maximum(1, np.minimum(bh, frame_h - top))
+    boxes = np.stack([left, top, bw, bh], axis=1)
+
+    # <!--- Per-class NMS (DetectionModel does not suppress across classes) --->
+    idx = cv.dnn.NMSBoxesBatched(boxes.tolist(), confidences.tolist(), class_ids.tolist(),
+                                 conf_threshold, nms_threshold)
+    idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+    return class_ids[idx].astype(np.int32), confidences[idx].astype(np.float32), boxes[idx]
+
+
+def make_blob(frames, input_size):
+    """NCHW float32 blob exactly as DetectionModel prepares it (resize, BGR->RGB, 1/255)."""
+    return cv.dnn.blobFromImages(frames, 1/255, (input_size, input_size), swapRB=True, crop=False)
+
+
+def rows_from_outputs(outs, n):
+    """
+    Normalise network outputs to Darknet rows [n, boxes, 5 + classes].
+    Accepts Darknet/OpenCV YOLO layer outputs, or the two-output ONNX export layout
+    (boxes [n, k, 1, 4] as normalised x1, y1, x2, y2 and class confidences [n, k, classes]).
+    """
+    if len(outs) == 2 and outs[0].shape[-1] == 4 and outs[1].ndim == 3:
+        boxes = outs[0].reshape(n, -1, 4)
+        confs = outs[1].reshape(n, boxes.shape[1], -1)
+        xywh = np.concatenate([(boxes[..., :2] + boxes[..., 2:]) / 2, boxes[..., 2:] - boxes[..., :2]], axis=-1)
+        return np.concatenate([xywh, np.ones(boxes.shape[:2] + (1,), np.float32), confs], axis=-1)
+    return np.concatenate([o.reshape(n, -1, o.shape[-1]) for o in outs], axis=1)
+
+
+class InferenceEngine:
+    """Base engine: subclasses implement forward_rows(frames), filling self.blob for the input."""
+
+    name = None
+
+    def __init__(self, input_size):
+        self.input_size = input_size
+        self.blob = BlobBuffer(input_size)     # Reused across calls instead of a new blob per frame
+
+    def forward_rows(self, frames):
+        raise NotImplementedError
+
+    def detect_batch(self, frames, conf_threshold, nms_threshold):
+        if not frames:
+            return []
+        rows = self.forward_rows(frames)
+        return [decode_detections(rows[i], f.shape[1], f.shape[0], conf_threshold, nms_threshold)
+                for i, f in enumerate(frames)]
+
+    def detect(self, frame, conf_threshold, nms_threshold):
+        return self.detect_batch([frame], conf_threshold, nms_threshold)[0]
+
+
+class OpenCVEngine(InferenceEngine):
+    """cv.dnn net; same pre/post-processing as DetectionModel, with a preallocated input blob."""
+
+    name = 'opencv'
+
+    def __init__(self, net, input_size):
+        super().__init__(input_size)
+        self.net = net
+        self.output_names = net.getUnconnectedOutLayersNames()
+
+    def forward_rows(self, frames):
+        self.net.setInput(self.blob.fill(frames))
+        outs = self.net.forward(self.output_names)
+        return rows_from_outputs(outs, len(frames))
+
+
+class OnnxRuntimeEngine(InferenceEngine):
+    """Exported YOLO ONNX model on the ONNX Runtime CPU provider."""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, input_size, intra_op_threads=0, inter_op_threads=0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Missing ONNX model: {model_path}")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = intra_op_threads
+        opts.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        self.session = ort.InferenceSession(model_path, opts, providers=['CPUExecutionProvider'])
+        self.model_path = model_path
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # Exported models often fix batch and resolution; follow the model when they do
+        self.fixed_batch = inp.shape[0] if isinstance(inp.shape[0], int) else None
+        if isinstance(inp.shape[2], int):
+            input_size = inp.shape[2]
+        super().__init__(input_size)
+
+    def forward_rows(self, frames):
+        if self.fixed_batch == 1 and len(frames) > 1:
+            return np.concatenate([self.forward_rows([f]) for f in frames], axis=0)
+        outs = self.session.run(None, {self.input_name: self.blob.fill(frames)})
+        return rows_from_outputs(outs, len(frames))
+
+
+def onnx_model_path(model_type='tiny', int8=None):
+    path = ONNX_MODEL_FILES[model_type]
+    if ONNX_INT8 if int8 is None else int8:
+        path = os.path.splitext(path)[0] + '.int8.onnx'
+    return path
+
+
+def create_onnx_engine(model_type='tiny', input_size=416):
+    """ONNX Runtime engine for the configured model file and thread counts."""
+    return OnnxRuntimeEngine(onnx_model_path(model_type), input_size,
+                             ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS)
+
+
+# <!--- INT8 quantization --->
+def quantize_model(src, dst, calibration_frames=None, input_size=416):
+    """
+    Quantize an exported ONNX model to INT8.
+    With calibration frames: static QDQ quantization (activations too, fastest on CPU);
+    without: dynamic quantization of weights only.
+    """
+    from onnxruntime import quantization as q
+
+    if not calibration_frames:
+        q.quantize_dynamic(src, dst, weight_type=q.QuantType.QInt8)
+        return dst
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(src, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class FrameReader(q.CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(calibration_frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            return None if frame is None else {input_name: make_blob([frame], input_size)}
+
+    q.quantize_static(src, dst, FrameReader(), quant_format=q.QuantFormat.QDQ, per_channel=True,
+                      activation_type=q.QuantType.QUInt8, weight_type=q.QuantType.QInt8)
+    return dst
+
+
+def _sample_frames(video_path, count):
+    cap = cv.VideoCapture(video_path)
+    total = int(cap.get(cv.CAP_PROP_FRAME_COUNT)) or count
+    frames = []
+    for idx in np.linspace(0, max(0, total - 1), count).astype(int):
+        cap.set(cv.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference engine utilities")
+    sub = parser.add_subparsers(dest='command', required=True)
+    quant = sub.add_parser('quantize', help='Quantize an ONNX model to INT8')
+    quant.add_argument('model', help='Exported ONNX model')
+    quant.add_argument('--out', help='Output path (default: <model>.int8.onnx)')
+    quant.add_argument('--video', help='Calibration video (static quantization); dynamic if omitted')
+    quant.add_argument('--frames', type=int, default=64, help='Calibration frames to sample')
+    quant.add_argument('--input-size', type=int, default=416)
+    args = parser.parse_args()
+
+    out = args.out or os.path.splitext(args.model)[0] + '.int8.onnx'
+    frames = _sample_frames(args.video, args.frames) if args.video else None
+    quantize_model(args.model, out, frames, args.input_size)
+    print(f"[Engine] INT8 model written to {out} ({'static' if frames else 'dynamic'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Motion-Gated Inference
+Cheap pre-stage in front of YOLO: a sampled frame is compared (downscaled, greyscale)
+against the last frame the detector actually ran on. If the mean absolute pixel change
+stays under a threshold the previous vehicle count is reused instead of running the net.
+An optional audit runs the detector anyway on skipped frames to measure the count error.
+"""
+
+import cv2 as cv
+import numpy as np
+
+THUMB_SIZE = 64    # Side of the greyscale thumbnail used for differencing
+
+
+class MotionGate:
+    """
+    Per-stream gate. Call should_infer(frame) for every sampled frame; after running
+    the detector call record(count), otherwise reuse last_count.
+    """
+
+    def __init__(self, threshold=4.0, max_reuse=10, size=THUMB_SIZE):
+        self.threshold = threshold      # Mean |diff| in grey levels (0-255) that counts as motion
+        self.max_reuse = max_reuse      # Force a detector run after this many reused frames
+        self.size = size
+        self.last_count = 0
+        self.frames = 0
+        self.skipped = 0
+        self._reference = None
+        self._reused = 0
+        # <!--- Audit (skipped-frame count vs. a real detector run) --->
+        self.audited = 0
+        self.abs_error_sum = 0
+        self.max_abs_error = 0
+        self.full_max = 0
+
+    def _thumbnail(self, frame):
+        grey = cv.cvtColor(frame, cv.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv.resize(grey, (self.size, self.size), interpolation=cv.INTER_AREA).astype(np.int16)
+
+    def should_infer(self, frame):
+        """True if the detector must run on this frame (scene changed, first frame, or reuse limit hit)."""
+        self.frames += 1
+        thumb = self._thumbnail(frame)
+        if (self._reference is None or self._reused >= self.max_reuse
+                or np.abs(thumb - self._reference).mean() > self.threshold):
+            # Compare against the last *inferred* frame so slow drift still triggers
+            self._reference = thumb
+            self._reused = 0
+            return True
+        self._reused += 1
+        self.skipped += 1
+        return False
+
+    def record(self, count):
+        self.last_count = count
+        self.full_max = max(self.full_max, count)
+
+    def audit(self, full_count):
+        """Compare the reused count of a skipped frame with what the detector actually sees."""
+        error = abs(full_count - self.last_count)
+        self.audited += 1
+        self.abs_error_sum += error
+        self.max_abs_error = max(self.max_abs_error, error)
+        self.full_max = max(self.full_max, full_count)
+
+    def stats(self):
+        stats = {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / self.frames, 3) if self.frames else 0.0,
+        }
+        if self.audited:
+            stats.update(audited=self.audited, abs_error_sum=self.abs_error_sum,
+                         max_abs_error=self.max_abs_error, full_max=self.full_max)
+        return stats
+
+
+def merge_motion_stats(parts):
+    """Combine MotionGate.stats() of several segments of one lane."""
+    frames = sum(p['frames'] for p in parts)
+    skipped = sum(p['skipped'] for p in parts)
+    merged = {'frames': frames, 'skipped': skipped,
+              'skip_ratio': round(skipped / frames, 3) if frames else 0.0}
+    audited = [p for p in parts if p.get('audited')]
+    if audited:
+        merged.update(audited=sum(p['audited'] for p in audited),
+                      abs_error_sum=sum(p['abs_error_sum'] for p in audited),
+                      max_abs_error=max(p['max_abs_error'] for p in audited),
+                      full_max=max(p['full_max'] for p in audited))
+    return merged
+
+
+def describe(motion, gated_max):
+    """One-line summary of skip ratio and (when audited) count error for logs."""
+    text = f"skipped {motion['skipped']}/{motion['frames']} frames ({motion['skip_ratio']:.0%})"
+    if motion.get('audited'):
+        mean_error = motion['abs_error_sum'] / motion['frames'] if motion['frames'] else 0.0
+        text += (f", count error mean={mean_error:.2f} max={motion['max_abs_error']}"
+                 f", peak {gated_max} vs full {motion['full_max']}")
+    return text
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Batch optimization CLI for historical replay and what-if runs.
+Reads count vectors from data/results.csv (north_cars..east_cars columns), a JSON
+array, or NDJSON (file or stdin), solves them in chunks through src/batch.py and
+writes one NDJSON result per vector, in input order. Throughput goes to stderr.
+
+Usage: python optimize_batch.py [data/results.csv | vectors.json | vectors.ndjson | -]
+           [--solver ga|exact] [--seed N] [--scale 1.2] [--out results.ndjson]
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import sys
+
+from src.batch import OPTIMIZER_BATCH_CHUNK, BatchStats, optimize_batch, parse_ndjson
+from src.optimizer import SOLVERS
+
+CSV_COLUMNS = ('north_cars', 'south_cars', 'west_cars', 'east_cars')
+
+
+def read_vectors(path):
+    """Count vectors (or per-line errors) from a results CSV, a JSON array or NDJSON."""
+    if path == '-':
+        yield from parse_ndjson(sys.stdin)
+        return
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                try:
+                    yield [int(float(row[c])) for c in CSV_COLUMNS]
+                except (KeyError, TypeError, ValueError) as e:
+                    yield ValueError(f"bad CSV row: {e}")
+        elif path.endswith('.json'):
+            yield from json.load(f)
+        else:
+            yield from parse_ndjson(f)
+
+
+def scaled(items, factor):
+    """What-if: every count multiplied by factor."""
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('cars')
+        if isinstance(item, list):
+            try:
+                item = [round(c * factor) for c in item]
+            except TypeError as e:
+                item = ValueError(str(e))
+        yield item
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize many count vectors in one run")
+    parser.add_argument('input', nargs='?', default='-', help='results CSV, JSON array or NDJSON (default: stdin)')
+    parser.add_argument('--solver', choices=SOLVERS, help='Optimizer solver (default: OPTIMIZER_SOLVER)')
+    parser.add_argument('--seed', type=int, help='Batch seed; the same seed replays the same GA results')
+    parser.add_argument('--scale', type=float, default=1.0, help='What-if factor applied to every count')
+    parser.add_argument('--chunk', type=int, default=OPTIMIZER_BATCH_CHUNK, help='Vectors per optimizer call')
+    parser.add_argument('--out', help='Output NDJSON file (default: stdout)')
+    args = parser.parse_args()
+
+    items = read_vectors(args.input)
+    if args.scale != 1.0:
+        items = scaled(items, args.scale)
+    stats = BatchStats()
+    out = open(args.out, 'w') if args.out else sys.stdout
+    try:
+        # Keep stdout pure NDJSON: optimizer status prints go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            for result in optimize_batch(items, solver=args.solver, seed=args.seed, chunk_size=args.chunk,
+                                         stats=stats):
+                out.write(json.dumps(result) + "\n")
+    finally:
+        if args.out:
+            out.close()
+
+    summary = stats.summary()
+    print(f"[Batch] {summary['count']} vectors ({summary['errors']} errors) in {summary['seconds']:.2f}s - "
+          f"{summary['solves_per_second']} solves/s, seed {summary['seed']}", file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Frame Preprocessing
+Crop the ROI and resize it to the network input without per-frame allocations:
+destination frames and NCHW blobs are preallocated once and written in place.
+Resizing either stretches the ROI to the square input (the historical behaviour)
+or letterboxes it (aspect ratio kept, padded), with box coordinates mapped back
+to the source frame either way. Box areas are scaled back to the stretched input
+(area_scale) before the MIN_BOX_AREA filter, so counts do not depend on the mode.
+"""
+
+import cv2 as cv
+import numpy as np
+
+PAD_VALUE = 114     # Grey padding, as used when training YOLO with letterboxed inputs
+_SCALE = np.float32(1 / 255)
+
+
+class FramePreprocessor:
+    """
+    ROI crop + resize for frames of one fixed source size.
+    prepare() writes into a small ring of preallocated buffers and returns one of
+    them, so a returned frame stays valid for the next `buffers - 1` calls.
+    """
+
+    def __init__(self, width, height, size, roi_coords=None, letterbox=False, buffers=1, pad_value=PAD_VALUE):
+        self.size = size
+        self.source_size = (width, height)
+        self.roi_coords = roi_coords or (0, 0, width, height)
+        x1, y1, x2, y2 = self.roi_coords
+        roi_w, roi_h = max(1, x2 - x1), max(1, y2 - y1)
+        self.letterbox = letterbox
+        if letterbox:
+            scale = min(size / roi_w, size / roi_h)
+            self.new_w = max(1, min(size, round(roi_w * scale)))
+            self.new_h = max(1, min(size, round(roi_h * scale)))
+            self.pad_x = (size - self.new_w) // 2
+            self.pad_y = (size - self.new_h) // 2
+        else:
+            self.new_w = self.new_h = size
+            self.pad_x = self.pad_y = 0
+        self.scale_x = self.new_w / roi_w
+        self.scale_y = self.new_h / roi_h
+        # Input box area -> area in the stretched ROI, where the MIN_BOX_AREA thresholds apply
+        self.area_scale = (size / roi_w) * (size / roi_h) / (self.scale_x * self.scale_y)
+
+        self._buffers = [np.full((size, size, 3), pad_value, np.uint8) for _ in range(max(1, buffers))]
+        self._next = 0
+
+    def _target(self, canvas):
+        return canvas[self.pad_y:self.pad_y + self.new_h, self.pad_x:self.pad_x + self.new_w]
+
+    def prepare(self, frame, out=None):
+        """ROI of `frame` resized into `out` (or the next internal buffer); returns that buffer."""
+        if out is None:
+            out = self._buffers[self._next]
+            self._next = (self._next + 1) % len(self._buffers)
+        elif self.letterbox:
+            out[...] = PAD_VALUE
+        x1, y1, x2, y2 = self.roi_coords
+        # The ROI is a view; cv.resize writes straight into the (padded) destination
+        cv.resize(frame[y1:y2, x1:x2], (self.new_w, self.new_h), dst=self._target(out))
+        return out
+
+    def to_frame(self, boxes):
+        """Boxes (x, y, w, h) in network-input pixels -> int32 boxes in source frame pixels."""
+        boxes = np.asarray(boxes, np.float64).reshape(-1, 4)
+        x1, y1 = self.roi_coords[:2]
+        mapped = np.empty_like(boxes)
+        mapped[:, 0] = (boxes[:, 0] - self.pad_x) / self.scale_x + x1
+        mapped[:, 1] = (boxes[:, 1] - self.pad_y) / self.scale_y + y1
+        mapped[:, 2] = boxes[:, 2] / self.scale_x
+        mapped[:, 3] = boxes[:, 3] / self.scale_y
+        return mapped.astype(np.int32)
+
+
+class BlobBuffer:
+    """
+    Reusable NCHW float32 blob; fill() does what cv.dnn.blobFromImages(frames, 1/255,
+    (size, size), swapRB=True) does, but into the same memory every call.
+    """
+
+    def __init__(self, size, capacity=1):
+        self.size = size
+        self._blob = np.empty((capacity, 3, size, size), np.float32)
+        self._resized = np.empty((size, size, 3), np.uint8)
+
+    def fill(self, frames):
+        n = len(frames)
+        if n > len(self._blob):
+            self._blob = np.empty((n, 3, self.size, self.size), np.float32)
+        for i, frame in enumerate(frames):
+            if frame.shape[:2] != (self.size, self.size):
+                frame = cv.resize(frame, (self.size, self.size), dst=self._resized)
+            # BGR HWC uint8 -> RGB CHW float32, then scale in place (float32 throughout: no cast buffers)
+            np.copyto(self._blob[i], frame[..., ::-1].transpose(2, 0, 1), casting='unsafe')
+            np.multiply(self._blob[i], _SCALE, out=self._blob[i])
+        return self._blob[:n]
@@ -0,0 +1,218 @@
+"""
+Batch optimization for historical replay and what-if runs.
+Many count vectors are solved per optimizer call instead of one HTTP request, process
+and GA run each: chunks go to `algo_solve_batch` in libalgo.so (or one long-lived
+`Algo1 --batch` process), which spreads the vectors of a chunk over the OpenMP
+threads. Results are yielded in input order as each chunk finishes, so callers can
+stream them. Exact solves for in-range counts are answered from the timing table.
+"""
+
+import ctypes
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+
+from src import optimizer
+from src.metrics import OPTIMIZER_BATCH_SOLVES
+from src.timing_table import get_timing_table
+
+OPTIMIZER_BATCH_CHUNK = 256     # Vectors per optimizer call; matches BATCH_BLOCK in Algo.cpp
+OPTIMIZER_BATCH_MAX_ITEMS = int(os.environ.get("OPTIMIZER_BATCH_MAX_ITEMS", "100000"))  # Vectors per /optimize_batch request
+
+
+def parse_vector(item):
+    """[N, S, W, E] from a list or {"cars": [...]}; raises ValueError otherwise."""
+    cars = item.get("cars") if isinstance(item, dict) else item
+    if not isinstance(cars, (list, tuple)) or len(cars) != len(optimizer.LANES):
+        raise ValueError("cars must be a list of 4 counts")
+    return [max(0, int(c)) for c in cars]
+
+
+def parse_ndjson(lines):
+    """Count vectors (or ValueError instances for bad lines) from NDJSON text lines."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"bad JSON: {e}")
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _load_batch_symbol(lib):
+    fn = lib.algo_solve_batch
+    c_int_p = ctypes.POINTER(ctypes.c_int)
+    fn.argtypes = [c_int_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, c_int_p, c_int_p,
+                   ctypes.POINTER(ctypes.c_double), c_int_p, ctypes.POINTER(ctypes.c_ulonglong),
+                   ctypes.c_ulonglong, ctypes.c_int, c_int_p]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+def _solve_in_process(fn, pending, solver, seed):
+    """Results for one chunk of (index, cars) through the library; one call solves it all."""
+    n, count = len(optimizer.LANES), len(pending)
+    cars = (ctypes.c_int * (count * n))(*[c for _, v in pending for c in v])
+    indices = (ctypes.c_int * count)(*[i for i, _ in pending])
+    greens = (ctypes.c_int * (count * n))()
+    delays = (ctypes.c_double * count)()
+    iterations = (ctypes.c_int * count)()
+    seeds = (ctypes.c_ulonglong * count)()
+    status = (ctypes.c_int * count)()
+    rc = fn(cars, count, n, int(solver == "exact"), indices, greens, delays, iterations, seeds,
+            seed, optimizer.OPTIMIZER_ISLANDS, status)
+    if rc != 0:
+        return [{"error": f"algo_solve_batch failed (code {rc})"} for _ in pending]
+    results = []
+    for i in range(count):
+        if status[i]:
+            results.append({"error": "no feasible green times within the cycle"})
+            continue
+        result = dict(zip(optimizer.LANES, greens[i * n:(i + 1) * n]))
+        result.update(delay=delays[i], iterations=iterations[i], seed=seeds[i])
+        results.append(result)
+    return results
+
+
+class _BatchProcess:
+    """One `Algo1 --batch` process; a chunk is written followed by a blank line to flush it."""
+
+    def __init__(self, solver, seed):
+        args = [optimizer.GA_BINARY, "--batch", f"--solver={solver}", f"--seed={seed}"]
+        if optimizer.OPTIMIZER_ISLANDS > 1:
+            args.append(f"--islands={optimizer.OPTIMIZER_ISLANDS}")
+        self.proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, bufsize=1)
+
+    def solve(self, pending):
+        # Write from a thread: a large chunk can fill the pipe before we start reading
+        lines = "".join(json.dumps({"cars": v, "index": i}) + "\n" for i, v in pending) + "\n"
+        writer = threading.Thread(target=self._write, args=(lines,), daemon=True)
+        writer.start()
+        results = []
+        for _ in pending:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{optimizer.GA_BINARY} --batch exited (code {self.proc.poll()})")
+            result = json.loads(line)
+            result.pop("index", None)
+            results.append(result)
+        writer.join()
+        return results
+
+    def _write(self, text):
+        try:
+            self.proc.stdin.write(text)
+            self.proc.stdin.flush()
+        except (OSError, ValueError):
+            pass
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+def optimize_batch(items, solver=None, seed=None, chunk_size=OPTIMIZER_BATCH_CHUNK, stats=None):
+    """
+    Yields one result per input item, in order: {"index", "cars", north/south/west/east,
+    "delay", "iterations", "seed"} or {"index", "error"}. items are [N, S, W, E] lists,
+    {"cars": [...]} dicts or exceptions (reported as that item's error). seed fixes the
+    batch's random streams (None = fresh); each GA result reports the seed that replays
+    it alone. stats (a BatchStats) is updated as results are produced.
+    """
+    solver = solver or optimizer.OPTIMIZER_SOLVER
+    if solver not in optimizer.SOLVERS:
+        raise ValueError(f"unknown optimizer solver {solver!r}")
+    if seed is not None and not 0 <= int(seed) < optimizer.SEED_LIMIT:
+        raise ValueError(f"seed must be an integer in [0, 2^53), got {seed!r}")
+    # One batch seed for every chunk; vector seeds derive from it and the input index
+    seed = int(seed) if seed is not None else random.getrandbits(53) | 1
+    if stats is not None:
+        stats.seed = seed
+    table = get_timing_table() if solver == "exact" else None
+    fn, proc = None, None
+    lib = optimizer.load_library()
+    if lib is not None:
+        try:
+            fn = _load_batch_symbol(lib)
+        except AttributeError:
+            fn = None
+
+    index = 0
+    try:
+        for chunk in _chunks(items, max(1, chunk_size)):
+            results, pending = [None] * len(chunk), []
+            for k, item in enumerate(chunk):
+                try:
+                    if isinstance(item, Exception):
+                        raise item
+                    cars = parse_vector(item)
+                except (TypeError, ValueError) as e:
+                    results[k] = {"error": str(e)}
+                    continue
+                hit = table.lookup(cars) if table is not None else None
+                if hit:
+                    results[k] = dict(hit, iterations=0, seed=0, cars=cars)
+                else:
+                    pending.append((index + k, cars))
+            if pending:
+                if fn is not None:
+                    solved = _solve_in_process(fn, pending, solver, seed)
+                else:
+                    if proc is None:
+                        proc = _BatchProcess(solver, seed)
+                    solved = proc.solve(pending)
+                for (i, cars), result in zip(pending, solved):
+                    results[i - index] = dict(result, cars=cars)
+            for k, result in enumerate(results):
+                result = dict(result, index=index + k)
+                OPTIMIZER_BATCH_SOLVES.inc(solver=solver, result="error" if "error" in result else "ok")
+                if stats is not None:
+                    stats.add(result)
+                yield result
+            index += len(chunk)
+    finally:
+        if proc is not None:
+            proc.close()
+
+
+class BatchStats:
+    """Counts and throughput of one batch run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.solved = 0
+        self.errors = 0
+        self.seed = None
+
+    def add(self, result):
+        if "error" in result:
+            self.errors += 1
+        else:
+            self.solved += 1
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        total = self.solved + self.errors
+        return {"count": total, "solved": self.solved, "errors": self.errors, "seed": self.seed,
+                "seconds": round(seconds, 4),
+                "solves_per_second": round(total / seconds, 1) if seconds > 0 else None}
@@ -0,0 +1,128 @@
+"""
+Content-addressed cache of lane detection results.
+Keys are a streaming SHA-256 of the video bytes plus the detection parameters, so a
+re-uploaded clip skips YOLO entirely while any change to model/thresholds/ROI misses.
+Entries are small JSON files on disk, evicted least-recently-used beyond a size bound.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+CACHE_DIR = os.environ.get(
+    "DETECTION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'detection_cache'))
+CACHE_MAX_ENTRIES = int(os.environ.get("DETECTION_CACHE_MAX_ENTRIES", "2000"))
+CACHE_ENABLED = os.environ.get("DETECTION_CACHE", "1") == "1"
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_and_hash(file_storage, path):
+    """Stream an uploaded file to disk, hashing it on the way. Returns the hex digest."""
+    digest = hashlib.sha256()
+    stream = file_storage.stream
+    with open(path, 'wb') as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """Streaming SHA-256 of a file already on disk."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """Disk-backed LRU map of (video digest, detection params) -> lane result."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_digest, params):
+        payload = json.dumps(params, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f"{video_digest}:{payload}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Cached result for key, or None. A hit refreshes the entry's LRU position."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry.get('result')
+
+    def put(self, key, result):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'result': result}, f)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.json')]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+                with self._lock:
+                    self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'max_entries': self.max_entries,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance (None when DETECTION_CACHE=0)."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DetectionCache()
+        return _cache
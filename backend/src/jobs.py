@@ -0,0 +1,126 @@
+"""
+Background upload jobs.
+/upload?async=1 saves the videos, registers an UploadJob and returns at once; detection,
+optimization and logging run on a small thread pool. Each job keeps an event log that
+/jobs/<id>/events streams as server-sent events.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+UPLOAD_JOB_WORKERS = int(os.environ.get("UPLOAD_JOB_WORKERS", "2"))   # Uploads processed concurrently
+MAX_FINISHED_JOBS = int(os.environ.get("MAX_FINISHED_JOBS", "200"))    # Finished jobs kept for polling
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class UploadJob:
+    """State, per-lane progress and event log of one asynchronous upload."""
+
+    def __init__(self, num_lanes):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'          # queued -> running -> done | error
+        self.created_at = time.time()
+        self.finished_at = None
+        self.lanes = [{'frames': 0, 'fps': 0.0, 'cars': None, 'cached': False, 'done': False}
+                      for _ in range(num_lanes)]
+        self.result = None
+        self.status_code = None
+        self.events = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'error')
+
+    def emit(self, event):
+        with self._cond:
+            event = dict(event, seq=len(self.events), ts=round(time.time(), 3))
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def set_status(self, status):
+        self.status = status
+        self.emit({'type': 'status', 'status': status})
+
+    def lane_progress(self, lane, frames, fps):
+        self.lanes[lane].update(frames=frames, fps=round(fps, 2))
+        self.emit({'type': 'progress', 'lane': lane, 'frames': frames, 'fps': round(fps, 2)})
+
+    def lane_done(self, lane, cars, cached=False, error=None):
+        self.lanes[lane].update(cars=cars, cached=cached, done=True)
+        self.emit({'type': 'lane_done', 'lane': lane, 'cars': cars, 'cached': cached, 'error': error})
+
+    def finish(self, result, status_code):
+        self.result = result
+        self.status_code = status_code
+        self.finished_at = time.time()
+        self.set_status('done' if status_code < 400 else 'error')
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'lanes': self.lanes,
+        }
+        if include_result and self.finished:
+            data['status_code'] = self.status_code
+            data['result'] = self.result
+        return data
+
+    def stream(self):
+        """Yield SSE frames for all events (past and future) until the job finishes."""
+        seq = 0
+        while True:
+            with self._cond:
+                if seq >= len(self.events) and not self.finished:
+                    self._cond.wait(SSE_KEEPALIVE_SECONDS)
+                pending = self.events[seq:]
+                finished = self.finished
+            if not pending and not finished:
+                yield ": keepalive\n\n"
+                continue
+            for event in pending:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            seq += len(pending)
+            if finished and seq >= len(self.events):
+                yield f"event: end\ndata: {json.dumps(self.to_dict())}\n\n"
+                return
+
+
+class JobStore:
+    """In-memory registry of upload jobs plus the executor that runs them."""
+
+    def __init__(self, workers=UPLOAD_JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-job")
+
+    def create(self, num_lanes):
+        job = UploadJob(num_lanes)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, job, fn, *args):
+        """Run fn(job, *args) in the background."""
+        return self._executor.submit(fn, job, *args)
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+
+job_store = JobStore()
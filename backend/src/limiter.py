@@ -3,6 +3,8 @@ from functools import wraps
 import time
 from flask import request, jsonify, current_app
 
+from src.metrics import RATE_LIMITED
+
 RATE_LIMIT_REQUESTS = 10  # Max requests
 RATE_LIMIT_WINDOW = 60    # Per 60 seconds
 request_counts = defaultdict(list)  # IP -> list of timestamps
@@ -35,6 +37,7 @@ def rate_limit(func):
         # Check rate limit
         if len(request_counts[client_ip]) >= RATE_LIMIT_REQUESTS:
             current_app.logger.warning(f"Rate limit exceeded for {client_ip}")
+            RATE_LIMITED.inc(endpoint=request.endpoint or 'unknown')
             return jsonify({
                 'error': 'Rate limit exceeded',
                 'detail': f'Max {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds',
@@ -0,0 +1,184 @@
+"""
+In-process metrics in the Prometheus text exposition format (served by /metrics).
+Histograms and counters are plain thread-safe objects in the API process. Detection
+workers run in spawned subprocesses, so they do not touch these objects: each job
+reports its own timings back with its result and the pool records them here.
+With several API processes (e.g. gunicorn workers) every process exposes its own
+series; scrape each one or aggregate with sum() in Prometheus.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+FPS_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000)
+ITERATION_BUCKETS = (0, 1, 2, 3, 5, 7, 10, 15, 20, 25, 50, 100)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key in sorted(self._series):
+                lines.extend(self._render_series(key, self._series[key]))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, key, value):
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} of one series (zeros if never observed)."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return {'count': series['count'], 'sum': series['sum']} if series else {'count': 0, 'sum': 0.0}
+
+    def _render_series(self, key, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series['counts']):
+            cumulative += count
+            le = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+        lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+# <!--- /upload stages --->
+UPLOAD_SECONDS = REGISTRY.register(Histogram(
+    'traffic_upload_seconds', 'End-to-end /upload processing time', ['status']))
+UPLOAD_SAVE_SECONDS = REGISTRY.register(Histogram(
+    'traffic_upload_save_seconds', 'Time to stream and hash one uploaded lane video to disk'))
+DETECTION_LANE_SECONDS = REGISTRY.register(Histogram(
+    'traffic_detection_lane_seconds', 'Wall time until all segments of a lane were detected'))
+DETECTION_JOB_SECONDS = REGISTRY.register(Histogram(
+    'traffic_detection_job_seconds', 'Time a detection worker spent on one job', ['kind']))
+DETECTION_FPS = REGISTRY.register(Histogram(
+    'traffic_detection_fps', 'Sampled frames per second of one detection job', ['kind'], buckets=FPS_BUCKETS))
+OPTIMIZER_SECONDS = REGISTRY.register(Histogram(
+    'traffic_optimizer_seconds', 'C++ optimizer time (in-process call or subprocess)'))
+OPTIMIZER_ITERATIONS = REGISTRY.register(Histogram(
+    'traffic_optimizer_iterations', 'GA generations per solve, by cold or warm (seeded) start', ['start'],
+    buckets=ITERATION_BUCKETS))
+RL_SECONDS = REGISTRY.register(Histogram(
+    'traffic_rl_seconds', 'RL recommendation time'))
+CSV_LOG_SECONDS = REGISTRY.register(Histogram(
+    'traffic_csv_log_seconds', 'Time to append results and analytics to the CSV logs'))
+
+# <!--- Failures --->
+RATE_LIMITED = REGISTRY.register(Counter(
+    'traffic_rate_limited', 'Requests rejected by the rate limiter', ['endpoint']))
+TIMEOUTS = REGISTRY.register(Counter(
+    'traffic_timeouts', 'Timed out work', ['stage']))
+WORKER_RESTARTS = REGISTRY.register(Counter(
+    'traffic_worker_restarts', 'Detection workers replaced', ['reason']))
+OPTIMIZER_RESTARTS = REGISTRY.register(Counter(
+    'traffic_optimizer_restarts', 'Optimizer server processes replaced', ['reason']))
+OPTIMIZER_TABLE_LOOKUPS = REGISTRY.register(Counter(
+    'traffic_optimizer_table_lookups', 'Exact solves answered from the timing table (hit) or live (miss)', ['result']))
+OPTIMIZER_BATCH_SOLVES = REGISTRY.register(Counter(
+    'traffic_optimizer_batch_solves', 'Count vectors processed by batch optimization', ['solver', 'result']))
+
+
+def render():
+    return REGISTRY.render()
@@ -1,10 +1,27 @@
+import ctypes
 import os
 import subprocess
 import json
 import re
+import threading
+
+from src.metrics import OPTIMIZER_ITERATIONS, OPTIMIZER_SECONDS, OPTIMIZER_TABLE_LOOKUPS, TIMEOUTS
+from src.plan_history import get_plan_history
+from src.timing_table import get_timing_table
 
 GA_BINARY = os.path.abspath("./Algo1")
 MAX_LOG_LINES = 500
+SOLVERS = ("ga", "exact")
+OPTIMIZER_SOLVER = os.environ.get("OPTIMIZER_SOLVER", "ga")   # ga = genetic algorithm, exact = DP optimum
+OPTIMIZER_ISLANDS = int(os.environ.get("OPTIMIZER_ISLANDS", "1"))   # GA subpopulations with ring migration
+SEED_LIMIT = 2 ** 53    # Seeds are integers in [0, SEED_LIMIT) so they round-trip through JSON numbers
+NO_SEED = 2 ** 64 - 1   # Library argument for "pick a fresh seed" (0 is an ordinary seed)
+
+# <!--- In-process optimizer (Algo.cpp built with -DALGO_LIBRARY -shared -fPIC) --->
+OPTIMIZER_LIB = os.environ.get("OPTIMIZER_LIB", os.path.abspath("./libalgo.so"))
+OPTIMIZER_BACKEND = os.environ.get("OPTIMIZER_BACKEND", "auto")   # auto | library | server | subprocess
+LANES = ("north", "south", "west", "east")
+TRACE_CAPACITY = 256    # Best-so-far entries kept per solve (the GA runs at most max_iter + 1)
 
 _RE_INVOC = re.compile(r"cars\s*=\s*\[?([\d,\s]+)\]?")
 _RE_START = re.compile(r"pop_size=(\d+)\s+max_iter=(\d+)\s+green_min=(\d+)\s+green_max=(\d+)\s+cycle_time=(\d+)")
@@ -12,6 +29,7 @@ _RE_STARTING_BEST = re.compile(r"starting best delay\s*=\s*([0-9.]+)")
 _RE_ITER_NEW = re.compile(r"\[iter\s*(\d+)\]\s*new best delay\s*=\s*([0-9.]+)\s*(?:\s+green\s*=\s*\[([0-9,\s]+)\])?")
 _RE_ITER_BEST = re.compile(r"\[iter\s*(\d+)\]\s*best delay\s*=\s*([0-9.]+)")
 _RE_END_FINAL = re.compile(r"Final greens:\s*N=(\d+)\s*S=(\d+)\s*W=(\d+)\s*E=(\d+)")
+_RE_SOLVE_TIME = re.compile(r"solver=(\w+)\s+solve_us=(\d+)")
 
 def parse_log_lines_to_events(lines):
     events = []
@@ -68,31 +86,248 @@ def parse_log_lines_to_events(lines):
             events.append({"type": "end", "final_greens": greens})
             continue
 
+        m = _RE_SOLVE_TIME.search(s)
+        if m:
+            events.append({"type": "timing", "solver": m.group(1), "solve_us": int(m.group(2))})
+            continue
+
         leftover.append(s)
 
     return events, leftover
 
-def run_cpp_optimizer(cars, timeout_seconds=20, verbose=True):
+_lib = None
+_lib_error = None
+_lib_lock = threading.Lock()
+
+
+def load_library():
+    """ctypes handle of the optimizer library, or None if it is not built or cannot be loaded."""
+    global _lib, _lib_error
+    with _lib_lock:
+        if _lib is None and _lib_error is None:
+            try:
+                lib = ctypes.CDLL(OPTIMIZER_LIB)   # CDLL releases the GIL for the duration of each call
+                c_int_p = ctypes.POINTER(ctypes.c_int)
+                c_double_p = ctypes.POINTER(ctypes.c_double)
+                lib.algo_solve.argtypes = [c_int_p, ctypes.c_int, ctypes.c_int, c_int_p, c_double_p,
+                                           c_double_p, c_int_p, ctypes.c_int, c_int_p, c_int_p,
+                                           ctypes.POINTER(ctypes.c_longlong), ctypes.c_double, c_int_p,
+                                           ctypes.c_int, ctypes.POINTER(ctypes.c_ulonglong), ctypes.c_int,
+                                           c_int_p]
+                lib.algo_solve.restype = ctypes.c_int
+                _lib = lib
+            except (OSError, AttributeError) as e:
+                _lib_error = str(e)
+                print(f"[Optimizer] In-process library unavailable ({e}) - using {GA_BINARY}", flush=True)
+        return _lib
+
+
+def trace_to_events(cars, solver, trace, config, solve_us):
     """
-    Runs GA C++ binary; returns parsed stdout (or raw) and structured logs:
-      - _logs_events: list of parsed event dicts (iter/new_best/start/end etc.)
-      - _logs_text: leftover text lines not parsed
-      - _logs_raw: joined stderr (trimmed)
+    Structured log events of an in-process solve, in the same shape
+    parse_log_lines_to_events() builds from the binary's --verbose output.
+    trace is a list of (best_delay, greens) per GA iteration (index 0 = initial population).
     """
-    if not os.path.exists(GA_BINARY):
-        return {"error": "C++ binary not found", "path": GA_BINARY}
+    events = [{"type": "invocation", "cars": list(cars)}]
+    if solver == "ga" and trace:
+        pop_size, max_iter, green_min, green_max, cycle_time = config
+        events.append({"type": "start", "pop_size": pop_size, "max_iter": max_iter,
+                       "green_min": green_min, "green_max": green_max, "cycle_time": cycle_time})
+        events.append({"type": "starting_best", "best_delay": trace[0][0]})
+        for it in range(1, len(trace)):
+            best, greens = trace[it]
+            if best < trace[it - 1][0]:
+                events.append({"type": "iter", "iter": it, "event": "new_best", "best_delay": best, "greens": greens})
+            else:
+                events.append({"type": "iter", "iter": it, "event": "best_unchanged", "best_delay": best})
+    events.append({"type": "timing", "solver": solver, "solve_us": solve_us})
+    if trace:
+        events.append({"type": "end", "final_greens": trace[-1][1]})
+    return events
+
+
+def _run_in_process(lib, cars, solver, verbose, deadline_ms=None, seeds=(), seed=None):
+    """One solve through the library; same result keys as the subprocess path."""
+    n = len(cars)
+    seeds_arr = (ctypes.c_int * (len(seeds) * n))(*[g for seed in seeds for g in seed])
+    cars_arr = (ctypes.c_int * n)(*cars)
+    greens = (ctypes.c_int * n)()
+    delay = ctypes.c_double()
+    trace_delays = (ctypes.c_double * TRACE_CAPACITY)()
+    trace_greens = (ctypes.c_int * (TRACE_CAPACITY * n))()
+    trace_len = ctypes.c_int()
+    config = (ctypes.c_int * 5)()
+    solve_us = ctypes.c_longlong()
+    info = (ctypes.c_int * 4)()
+    rng_seed = ctypes.c_ulonglong(NO_SEED if seed is None else seed)
+
+    # The GA keeps no shared RNG state, so concurrent calls need no lock
+    with OPTIMIZER_SECONDS.time():
+        status = lib.algo_solve(cars_arr, n, int(solver == "exact"), greens, ctypes.byref(delay),
+                                trace_delays, trace_greens, TRACE_CAPACITY, ctypes.byref(trace_len),
+                                config, ctypes.byref(solve_us), float(deadline_ms or 0),
+                                seeds_arr, len(seeds), ctypes.byref(rng_seed), OPTIMIZER_ISLANDS, info)
+    if status == 2:
+        return {"error": "no feasible green times within the cycle", "_backend": "library"}
+    if status != 0:
+        return {"error": "invalid input for optimizer", "detail": f"algo_solve returned {status}",
+                "_backend": "library"}
+
+    result = dict(zip(LANES, greens))
+    result["delay"] = delay.value
+    result["iterations"], result["converged"], result["deadline_hit"] = info[0], bool(info[1]), bool(info[2])
+    result["seeded"], result["seed"] = info[3], rng_seed.value
+    trace = [(trace_delays[k], list(trace_greens[k * n:(k + 1) * n])) for k in range(trace_len.value)]
+    result["_logs_events"] = trace_to_events(cars, solver, trace, list(config), solve_us.value) if verbose else []
+    result["_logs_text"] = []
+    result["_logs_raw"] = ""
+    result["_backend"] = "library"
+    return result
+
+
+def _run_on_server(cars, timeout_seconds, verbose, solver, deadline_ms=None, seeds=(), seed=None):
+    """One solve on the persistent `Algo1 --server` pool. Raises OptimizerServerError."""
+    from src.optimizer_server import get_server_pool
+
+    params = {"islands": OPTIMIZER_ISLANDS}
+    if seed is not None:
+        params["seed"] = seed
+    if deadline_ms:
+        params["deadline_ms"] = deadline_ms
+    if seeds:
+        params["seeds"] = [g for seed in seeds for g in seed]
+    with OPTIMIZER_SECONDS.time():
+        response = get_server_pool().solve(cars, solver, params=params, trace=verbose, timeout=timeout_seconds)
+    if "error" in response:
+        return {"error": response["error"], "_backend": "server"}
+
+    result = {k: response[k] for k in LANES + ("delay", "iterations", "converged", "deadline_hit", "seeded", "seed")}
+    trace = [(t["delay"], t["greens"]) for t in response.get("trace", [])]
+    result["_logs_events"] = (trace_to_events(cars, solver, trace, response["config"], response["solve_us"])
+                              if verbose else [])
+    result["_logs_text"] = []
+    result["_logs_raw"] = ""
+    result["_backend"] = "server"
+    return result
+
+
+def run_cpp_optimizer(cars, timeout_seconds=20, verbose=True, solver=None, backend=None, deadline_ms=None,
+                      warm_start=None, intersection=None, seed=None):
+    """
+    Runs the C++ optimizer with the given solver ("ga" or "exact", default OPTIMIZER_SOLVER).
+    backend "library" calls Algo.cpp in-process (libalgo.so via ctypes), "server" uses the
+    pool of persistent `Algo1 --server` processes (src/optimizer_server.py), "subprocess"
+    runs Algo1 once per call. "auto" (default OPTIMIZER_BACKEND) tries them in that order,
+    after answering exact solves for in-range counts from the timing table (src/timing_table.py).
+    deadline_ms makes the GA anytime: no iteration starts after the deadline (measured in
+    the solver) and the best solution so far is returned. timeout_seconds remains the hard
+    limit for server and subprocess calls; the in-process GA is bounded by max_iter.
+    warm_start is a list of [N, S, W, E] green allocations injected into the GA's initial
+    population. With an intersection key the last plans for that intersection
+    (src/plan_history.py) are added as seeds and the new plan is recorded.
+    seed fixes the GA's random streams (None = fresh); the same seed and OPTIMIZER_ISLANDS
+    give the same result on any thread count, and every GA result reports its seed.
+    Returns the result (north/south/west/east/delay, iterations, converged, deadline_hit,
+    seeded, seed) and structured logs:
+      - _logs_events: list of event dicts (iter/new_best/start/end etc.)
+      - _logs_text: leftover text lines not parsed (subprocess only)
+      - _logs_raw: joined stderr (trimmed, subprocess only)
+      - _backend: "table", "library", "server" or "subprocess"
+    """
+    solver = solver or OPTIMIZER_SOLVER
+    if solver not in SOLVERS:
+        return {"error": "unknown optimizer solver", "detail": f"{solver!r} not in {SOLVERS}"}
 
     try:
-        args = [GA_BINARY] + [str(int(x)) for x in cars]
+        cars = [max(0, int(x)) for x in cars]
     except Exception as e:
         return {"error": "invalid input for optimizer", "detail": str(e)}
 
+    if seed is not None and not (isinstance(seed, int) and 0 <= seed < SEED_LIMIT):
+        return {"error": "invalid seed", "detail": f"seed must be an integer in [0, 2^53), got {seed!r}"}
+
+    try:
+        seeds = [[int(g) for g in seed] for seed in warm_start or ()]
+    except Exception as e:
+        return {"error": "invalid warm start", "detail": str(e)}
+    if any(len(seed) != len(cars) for seed in seeds):
+        return {"error": "invalid warm start", "detail": f"each seed needs {len(cars)} greens"}
+    plans = get_plan_history() if intersection is not None else None
+    if plans is not None:
+        seeds += [seed for seed in plans.seeds(intersection) if seed not in seeds]
+    if solver != "ga":
+        seeds = []
+
+    result = _solve(cars, timeout_seconds, verbose, solver, backend or OPTIMIZER_BACKEND, deadline_ms, seeds, seed)
+    if "error" not in result:
+        if solver == "ga" and "iterations" in result:
+            OPTIMIZER_ITERATIONS.observe(result["iterations"], start="warm" if result.get("seeded") else "cold")
+        if plans is not None and all(k in result for k in LANES):
+            plans.record(intersection, [result[k] for k in LANES])
+    return result
+
+
+def _solve(cars, timeout_seconds, verbose, solver, backend, deadline_ms, seeds, seed):
+    """Answer from the timing table or the first usable backend (see run_cpp_optimizer)."""
+    if backend == "auto" and solver == "exact":
+        table = get_timing_table()
+        if table is not None:
+            hit = table.lookup(cars)
+            OPTIMIZER_TABLE_LOOKUPS.inc(result="hit" if hit else "miss")
+            if hit:
+                events = [{"type": "invocation", "cars": cars},
+                          {"type": "end", "final_greens": [hit[k] for k in LANES]}] if verbose else []
+                return dict(hit, iterations=0, converged=True, deadline_hit=False, seeded=0, seed=0,
+                            _logs_events=events, _logs_text=[], _logs_raw="", _backend="table")
+    if backend in ("auto", "library"):
+        lib = load_library()
+        if lib is not None:
+            return _run_in_process(lib, cars, solver, verbose, deadline_ms, seeds, seed)
+        if backend == "library":
+            return {"error": "optimizer library not available", "path": OPTIMIZER_LIB, "detail": _lib_error}
+    if backend in ("auto", "server"):
+        from src.optimizer_server import OptimizerServerError
+        try:
+            return _run_on_server(cars, timeout_seconds, verbose, solver, deadline_ms, seeds, seed)
+        except OptimizerServerError as e:
+            if backend == "server":
+                return {"error": "optimizer server not available", "detail": str(e)}
+            _note_server_unavailable(e)
+    return _run_subprocess(cars, timeout_seconds, verbose, solver, deadline_ms, seeds, seed)
+
+
+_server_warned = False
+
+
+def _note_server_unavailable(error):
+    global _server_warned
+    if not _server_warned:
+        _server_warned = True
+        print(f"[Optimizer] Server pool unavailable ({error}) - running {GA_BINARY} per call", flush=True)
+
+
+def _run_subprocess(cars, timeout_seconds, verbose, solver, deadline_ms=None, seeds=(), seed=None):
+    """Fork the Algo1 binary and parse its JSON stdout and --verbose stderr."""
+    if not os.path.exists(GA_BINARY):
+        return {"error": "C++ binary not found", "path": GA_BINARY}
+
+    args = [GA_BINARY] + [str(x) for x in cars]
+    args.append(f"--solver={solver}")
+    if deadline_ms:
+        args.append(f"--deadline-ms={deadline_ms}")
+    args += ["--warm-start=" + ",".join(str(g) for g in s) for s in seeds]
+    if seed is not None:
+        args.append(f"--seed={seed}")
+    if OPTIMIZER_ISLANDS > 1:
+        args.append(f"--islands={OPTIMIZER_ISLANDS}")
     if verbose:
         args.append("--verbose")
 
     try:
-        proc = subprocess.run(args, capture_output=True, text=True, timeout=timeout_seconds)
+        with OPTIMIZER_SECONDS.time():
+            proc = subprocess.run(args, capture_output=True, text=True, timeout=timeout_seconds)
     except subprocess.TimeoutExpired:
+        TIMEOUTS.inc(stage='optimizer')
         return {"error": "C++ optimizer timed out"}
     except Exception as e:
         return {"error": "failed to run C++ binary", "detail": str(e)}
@@ -126,4 +361,5 @@ def run_cpp_optimizer(cars, timeout_seconds=20, verbose=True):
         parsed_stdout["error"] = "C++ returned non-zero exit code"
         parsed_stdout["_returncode"] = proc.returncode
 
+    parsed_stdout["_backend"] = "subprocess"
     return parsed_stdout
@@ -0,0 +1,279 @@
+"""
+Pool of long-lived optimizer processes (`Algo1 --server`).
+Each process reads one JSON request per line on stdin and answers with one JSON line,
+so a request costs a pipe round trip instead of fork/exec + dynamic loading, and
+several requests can be in flight per process (answers come back in order and are
+matched by id). Results carry the GA trace as structured records, no stderr parsing.
+Dead processes are restarted on the next request, outside the pool lock so other slots
+keep serving; a request whose process dies mid-flight is retried once on a fresh one.
+A health thread pings idle ones.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import subprocess
+import threading
+
+from src.metrics import OPTIMIZER_RESTARTS, TIMEOUTS
+
+# <!--- Server pool configuration --->
+OPTIMIZER_SERVERS = int(os.environ.get("OPTIMIZER_SERVERS", "2"))                      # Processes in the pool
+OPTIMIZER_PING_TIMEOUT = float(os.environ.get("OPTIMIZER_PING_TIMEOUT", "5"))          # Seconds for a health ping
+OPTIMIZER_HEALTH_INTERVAL = float(os.environ.get("OPTIMIZER_HEALTH_INTERVAL", "30"))   # Seconds between health checks (0 = off)
+
+
+class OptimizerServerError(RuntimeError):
+    """The server process could not be started, did not answer its health check or died mid-request."""
+
+
+class _Pending:
+    """Answer slot for one in-flight request."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+    def set(self, response):
+        self.response = response
+        self.done.set()
+
+    def wait(self, timeout=None):
+        """The response dict, or None if it did not arrive within timeout."""
+        return self.response if self.done.wait(timeout) else None
+
+
+class OptimizerServer:
+    """One `Algo1 --server` process with a reader thread that resolves answers by id."""
+
+    def __init__(self, binary, server_id=0):
+        self.binary = binary
+        self.server_id = server_id
+        self._lock = threading.Lock()   # Guards stdin writes and _pending
+        self._pending = {}              # request id -> _Pending
+        self._ids = itertools.count()
+        self._eof = False               # stdout closed: the process is gone even if not reaped yet
+        self.proc = subprocess.Popen([binary, "--server"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        self._reader = threading.Thread(target=self._read, name=f"optimizer-server-{server_id}", daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                pending = self._pending.pop(response.get("id"), None)
+            if pending is not None:
+                pending.set(response)
+        self._eof = True
+        self._fail_pending("optimizer server exited")
+
+    def _fail_pending(self, reason):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for slot in pending.values():
+            slot.set({"error": reason, "_server_failed": True})
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def alive(self):
+        return not self._eof and self.proc.poll() is None
+
+    def submit(self, payload):
+        """Send one request without waiting; returns its _Pending answer slot."""
+        slot = _Pending()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = slot
+            try:
+                self.proc.stdin.write(json.dumps(dict(payload, id=request_id)) + "\n")
+                self.proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                del self._pending[request_id]
+                slot.set({"error": f"optimizer server unavailable: {e}", "_server_failed": True})
+        return slot
+
+    def ping(self, timeout=OPTIMIZER_PING_TIMEOUT):
+        response = self.submit({"op": "ping"}).wait(timeout)
+        return bool(response and response.get("ok"))
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        self._fail_pending("optimizer server stopped")
+
+
+class OptimizerServerPool:
+    """Fixed number of optimizer server slots; requests go to the least busy process."""
+
+    def __init__(self, size=OPTIMIZER_SERVERS, binary=None, health_interval=OPTIMIZER_HEALTH_INTERVAL):
+        from src.optimizer import GA_BINARY
+        self.size = max(1, size)
+        self.binary = binary or GA_BINARY
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._servers = [None] * self.size
+        self._slot_locks = [threading.Lock() for _ in range(self.size)]   # Serialize (re)starts per slot
+        self._starting = set()          # Slots whose process is being (re)started
+        self._server_ids = itertools.count()
+        self._closed = threading.Event()
+        self._health = None
+        if health_interval:
+            self._health = threading.Thread(target=self._health_loop, args=(health_interval,),
+                                            name="optimizer-health", daemon=True)
+            self._health.start()
+
+    def _spawn(self):
+        """Start a server and wait for its first ping (up to OPTIMIZER_PING_TIMEOUT). Called without the lock."""
+        try:
+            server = OptimizerServer(self.binary, next(self._server_ids))
+        except OSError as e:
+            raise OptimizerServerError(f"cannot start {self.binary} --server: {e}")
+        if not server.ping():
+            server.stop(kill=True)
+            raise OptimizerServerError(f"{self.binary} --server did not answer a ping")
+        return server
+
+    def _server(self, slot):
+        """
+        Live server for a slot, (re)starting it when needed. Only the slot's own lock is
+        held while a process starts, so requests to other slots are not held up.
+        """
+        with self._slot_locks[slot]:
+            with self._lock:
+                server = self._servers[slot]
+                if server is not None and server.alive():
+                    return server
+                if server is not None:
+                    print(f"[Optimizer] Server {server.server_id} exited (code {server.proc.poll()}) - restarting",
+                          flush=True)
+                    self._record_restart('crashed')
+                    self._servers[slot] = None
+                self._starting.add(slot)
+            try:
+                server = self._spawn()
+            finally:
+                with self._lock:
+                    self._starting.discard(slot)
+            with self._lock:
+                if not self._closed.is_set():
+                    self._servers[slot] = server
+                    return server
+            server.stop(kill=True)
+            raise OptimizerServerError("optimizer server pool is shut down")
+
+    def _record_restart(self, reason):
+        self.restarts += 1
+        OPTIMIZER_RESTARTS.inc(reason=reason)
+
+    def _replace(self, server, reason):
+        """Kill a misbehaving server; its slot restarts on the next request."""
+        with self._lock:
+            for slot, current in enumerate(self._servers):
+                if current is server:
+                    self._servers[slot] = None
+                    self._record_restart(reason)
+        server.stop(kill=True)
+
+    def submit(self, payload):
+        """Dispatch without waiting; returns (server, answer slot). Raises OptimizerServerError."""
+        with self._lock:
+            if self._closed.is_set():
+                raise OptimizerServerError("optimizer server pool is shut down")
+            # Least busy slot, avoiding slots whose process is still starting
+            slot = min(range(self.size), key=lambda i: (i in self._starting,
+                                                         self._servers[i].pending if self._servers[i] else 0))
+        server = self._server(slot)
+        return server, server.submit(payload)
+
+    def request(self, payload, timeout=None):
+        """
+        One request/response round trip; a stuck process is killed on timeout. A process
+        that dies mid-request is replaced and the request retried once; if that fails
+        too, OptimizerServerError is raised so callers can fall back.
+        """
+        for attempt in range(2):
+            server, slot = self.submit(payload)
+            response = slot.wait(timeout)
+            if response is None:
+                print(f"[Optimizer] Server {server.server_id} timed out after {timeout}s - restarting", flush=True)
+                TIMEOUTS.inc(stage='optimizer')
+                self._replace(server, 'timeout')
+                return {"error": "C++ optimizer timed out"}
+            if not response.get("_server_failed"):
+                return response
+            print(f"[Optimizer] Server {server.server_id} failed mid-request ({response['error']})"
+                  f"{' - retrying on a fresh process' if attempt == 0 else ''}", flush=True)
+        raise OptimizerServerError(response["error"])
+
+    def solve(self, cars, solver="ga", params=None, trace=False, timeout=None):
+        """Solve one count vector; params are optional GA overrides (pop_size, max_iter, ...)."""
+        payload = dict(params or {}, cars=[int(c) for c in cars], solver=solver, trace=trace)
+        return self.request(payload, timeout)
+
+    def health_check(self):
+        """Ping every idle server and replace those that do not answer."""
+        with self._lock:
+            servers = [s for s in self._servers if s is not None]
+        for server in servers:
+            if server.alive() and not server.pending and not server.ping():
+                print(f"[Optimizer] Server {server.server_id} failed its health check - restarting", flush=True)
+                self._replace(server, 'unhealthy')
+
+    def _health_loop(self, interval):
+        while not self._closed.wait(interval):
+            try:
+                self.health_check()
+            except Exception as e:
+                print(f"[Optimizer] Health check failed: {e}", flush=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'servers': sum(1 for s in self._servers if s is not None and s.alive()),
+                'size': self.size,
+                'pending': sum(s.pending for s in self._servers if s is not None),
+                'restarts': self.restarts,
+            }
+
+    def shutdown(self):
+        self._closed.set()
+        with self._lock:
+            servers, self._servers = self._servers, [None] * self.size
+        for server in servers:
+            if server is not None:
+                server.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_server_pool():
+    """Return the process-wide optimizer server pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OptimizerServerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_server_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,55 @@
+"""
+Recent signal plans per intersection, used to warm-start the GA.
+Consecutive live cycles at one intersection see nearly the same counts, so the last
+plans are close to the next optimum. run_cpp_optimizer(..., intersection=key) injects
+them into the initial population and records the new plan afterwards; with the GA's
+early stop this usually ends a steady-traffic solve after the patience window.
+"""
+
+import os
+import threading
+from collections import deque
+
+OPTIMIZER_WARM_PLANS = int(os.environ.get("OPTIMIZER_WARM_PLANS", "3"))   # Plans kept per intersection (0 = cold starts)
+MAX_INTERSECTIONS = 1024    # Least recently used intersections are dropped beyond this
+
+
+class PlanHistory:
+    """Last `size` green allocations per intersection key, newest first."""
+
+    def __init__(self, size=OPTIMIZER_WARM_PLANS, max_intersections=MAX_INTERSECTIONS):
+        self.size = max(0, size)
+        self.max_intersections = max_intersections
+        self._lock = threading.Lock()
+        self._plans = {}    # key -> deque of greens lists; dict order = least recently used first
+
+    def seeds(self, intersection):
+        with self._lock:
+            return [list(g) for g in self._plans.get(intersection, ())]
+
+    def record(self, intersection, greens):
+        if not self.size:
+            return
+        greens = [int(g) for g in greens]
+        with self._lock:
+            plans = self._plans.pop(intersection, None) or deque(maxlen=self.size)
+            if greens in plans:
+                plans.remove(greens)
+            plans.appendleft(greens)
+            self._plans[intersection] = plans
+            while len(self._plans) > self.max_intersections:
+                del self._plans[next(iter(self._plans))]
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self):
+        return len(self._plans)
+
+
+_history = PlanHistory()
+
+
+def get_plan_history():
+    return _history
@@ -1,34 +1,97 @@
+import itertools
+import json
 import os
+import shutil
 import time
-from flask import request, jsonify, Blueprint, current_app
+from flask import request, jsonify, Blueprint, current_app, Response, stream_with_context
 from werkzeug.utils import secure_filename
 
-from src.optimizer import run_cpp_optimizer, GA_BINARY
+from src.optimizer import run_cpp_optimizer, GA_BINARY, SEED_LIMIT, SOLVERS
+from src.batch import OPTIMIZER_BATCH_MAX_ITEMS, BatchStats, optimize_batch, parse_ndjson
 from src.validation import is_valid_video_file, ALLOWED_VIDEO_EXTENSIONS, ALLOWED_VIDEO_MIME_PREFIXES
 from src.limiter import rate_limit
+from src.detection_cache import get_cache, save_and_hash
+from src.jobs import job_store
+from src import metrics
 from csv_logger import log_result, log_analytics, get_results_summary, get_analytics_summary, get_recent_data
 from rl_agent import get_rl_recommendation
-from yolov4 import detect_cars_parallel
+from yolov4 import detect_cars_parallel, detection_params
 
 api = Blueprint('api', __name__)
 
 @api.route('/test_optimize', methods=['POST'])
 def test_optimize():
     """
-    Quick test endpoint — POST JSON: {"cars":[N,S,W,E]}
+    Quick test endpoint — POST JSON: {"cars":[N,S,W,E], "solver":"ga"|"exact", "intersection": "id"}
+    With an intersection id the GA is warm-started from that intersection's last plans.
     Returns optimizer result (with logs).
     """
     data = request.get_json(force=True)
     cars = data.get("cars")
     if not cars or len(cars) != 4:
         return jsonify({"error":"send JSON {\"cars\":[N,S,W,E]}"}), 400
+    solver = data.get("solver")
+    if solver is not None and solver not in SOLVERS:
+        return jsonify({"error": f"solver must be one of {list(SOLVERS)}"}), 400
 
-    result = run_cpp_optimizer(cars, verbose=True)
+    intersection = data.get("intersection")
+    result = run_cpp_optimizer(cars, verbose=True, solver=solver,
+                               intersection=str(intersection) if intersection is not None else None)
     if isinstance(result, dict) and result.get("error"):
         return jsonify(result), 500
     return jsonify(result), 200
 
 
+@api.route('/optimize_batch', methods=['POST'])
+@rate_limit
+def optimize_batch_endpoint():
+    """
+    Solve many count vectors in one request. Body: a JSON array of [N,S,W,E], a JSON
+    object {"cars": [[N,S,W,E], ...], "solver": ..., "seed": ...}, or NDJSON
+    (Content-Type application/x-ndjson) with one vector per line, read as it arrives.
+    solver and seed can also be query parameters.
+    Streams NDJSON results in input order, then {"summary": {..., "solves_per_second"}}.
+    At most OPTIMIZER_BATCH_MAX_ITEMS vectors per request: a longer JSON array is
+    rejected with 413, an NDJSON stream stops there with an error line before the summary.
+    """
+    solver = request.args.get("solver")
+    seed = request.args.get("seed")
+    if request.mimetype == 'application/x-ndjson':
+        items = parse_ndjson(request.stream)
+    else:
+        data = request.get_json(force=True, silent=True)
+        if isinstance(data, dict):
+            solver, seed = data.get("solver", solver), data.get("seed", seed)
+            data = data.get("cars")
+        if not isinstance(data, list):
+            return jsonify({"error": "send a JSON array of [N,S,W,E] vectors or NDJSON (application/x-ndjson)"}), 400
+        if len(data) > OPTIMIZER_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"at most {OPTIMIZER_BATCH_MAX_ITEMS} vectors per request"}), 413
+        items = data
+    if solver is not None and solver not in SOLVERS:
+        return jsonify({"error": f"solver must be one of {list(SOLVERS)}"}), 400
+    try:
+        seed = int(seed) if seed not in (None, "") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "seed must be an integer"}), 400
+    if seed is not None and not 0 <= seed < SEED_LIMIT:
+        return jsonify({"error": "seed must be an integer in [0, 2^53)"}), 400
+
+    stats = BatchStats()
+    items = iter(items)
+
+    def generate():
+        for result in optimize_batch(itertools.islice(items, OPTIMIZER_BATCH_MAX_ITEMS), solver=solver, seed=seed,
+                                     stats=stats):
+            yield json.dumps(result) + "\n"
+        if next(items, None) is not None:
+            yield json.dumps({"error": f"at most {OPTIMIZER_BATCH_MAX_ITEMS} vectors per request; "
+                                       f"the rest of the input was not read"}) + "\n"
+        yield json.dumps({"summary": stats.summary()}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for monitoring."""
@@ -49,11 +112,19 @@ def health_check():
     return jsonify(status), 200
 
 
+@api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint: per-stage latency histograms and failure counters of this process."""
+    return Response(metrics.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+
 @api.route('/upload', methods=['POST'])
 @rate_limit
 def upload_files():
     start_ts = time.time()
     current_app.logger.info("Received /upload request")
+    # ?async=1 (or form field async=1) returns a job id instead of waiting for the result
+    async_mode = request.args.get('async', request.form.get('async', '0')) == '1'
 
     files = request.files.getlist('videos')
     if len(files) != 4:
@@ -118,21 +189,29 @@ def upload_files():
 
 
     UPLOADS_DIR = current_app.config["UPLOADS_DIR"]
+    # Async jobs get their own directory so concurrent jobs never share video_N.mp4
+    job = job_store.create(len(files)) if async_mode else None
+    if job:
+        UPLOADS_DIR = os.path.join(UPLOADS_DIR, 'jobs', job.id)
     # Ensure uploads directory exists
     try:
         os.makedirs(UPLOADS_DIR, exist_ok=True)
     except Exception as e:
         current_app.logger.error(f"Cannot create uploads directory: {e}")
+        if job:
+            job.finish({"error": "Server configuration error", "detail": str(e)}, 500)
         return jsonify({"error": "Server configuration error", "detail": f"Cannot create uploads directory: {str(e)}"}), 500
 
     video_paths = []
+    video_digests = []
     save_errors = []
     for i, file in enumerate(files):
         filename = secure_filename(f'video_{i}.mp4')
         video_path = os.path.join(UPLOADS_DIR, filename)
         try:
             current_app.logger.info(f"Attempting to save file {i} to: {video_path}")
-            file.save(video_path)
+            with metrics.UPLOAD_SAVE_SECONDS.time():
+                video_digests.append(save_and_hash(file, video_path))
             current_app.logger.info(f"Successfully saved uploaded file -> {video_path}")
             video_paths.append(video_path)
         except PermissionError as e:
@@ -143,42 +222,120 @@ def upload_files():
             save_errors.append({"index": i, "path": video_path, "error": str(e)})
 
     if save_errors:
+        if job:
+            # The job never runs, so its directory (with any files already saved) goes now
+            shutil.rmtree(UPLOADS_DIR, ignore_errors=True)
+            job.finish({"error": "Failed to save uploaded files", "details": save_errors}, 500)
         return jsonify({"error": "Failed to save uploaded files", "details": save_errors}), 500
 
-    # Use parallel processing with multiprocessing (spawn mode - no semaphore leaks)
-    current_app.logger.info("Starting parallel video detection for %d videos", len(video_paths))
+    if job:
+        app = current_app._get_current_object()
+        try:
+            job_store.submit(job, _run_upload_job, app, video_paths, video_digests, start_ts)
+        except Exception:
+            shutil.rmtree(UPLOADS_DIR, ignore_errors=True)
+            raise
+        current_app.logger.info("Queued upload job %s", job.id)
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f"/jobs/{job.id}",
+            'events_url': f"/jobs/{job.id}/events"
+        }), 202
+
+    body, status = _detect_and_optimize(video_paths, video_digests, start_ts)
+    metrics.UPLOAD_SECONDS.observe(time.time() - start_ts, status=status)
+    return jsonify(body), status
+
+
+def _run_upload_job(job, app, video_paths, video_digests, start_ts):
+    """Background body of an async upload; the per-job upload directory is removed afterwards."""
+    with app.app_context():
+        job.set_status('running')
+        try:
+            body, status = _detect_and_optimize(video_paths, video_digests, start_ts, job=job)
+        except Exception as e:
+            current_app.logger.exception("Upload job %s failed", job.id)
+            body, status = {"error": "Upload job failed", "detail": str(e)}, 500
+        # Clean up before finishing so pollers never see a done job with files left behind
+        shutil.rmtree(os.path.dirname(video_paths[0]), ignore_errors=True)
+        metrics.UPLOAD_SECONDS.observe(time.time() - start_ts, status=status)
+        job.finish(body, status)
+
+
+def _detect_and_optimize(video_paths, video_digests, start_ts, job=None):
+    """
+    Detection (cache-aware) -> C++ optimizer -> RL -> CSV logging for saved lane videos.
+    Returns (response_body, status_code). Progress is reported on job when given.
+    """
+    # Known clips come from the detection cache; identical uploads are detected once
+    cache = get_cache()
+    params = detection_params()
+    cache_keys = [cache.make_key(d, params) if cache else d for d in video_digests]
+    cached = [cache.get(key) if cache else None for key in cache_keys]
+
+    pending = {}  # cache key -> first lane index with that content
+    for i, key in enumerate(cache_keys):
+        if cached[i] is None and key not in pending:
+            pending[key] = i
+
+    current_app.logger.info("Starting parallel video detection for %d videos (%d cached)",
+                            len(pending), sum(c is not None for c in cached))
     
     try:
         # Allow up to 4 parallel workers (one per lane) to maximize CPU usage
-        results, errors = detect_cars_parallel(video_paths, max_workers=4)
+        detected = {}
+        if pending:
+            lanes = list(pending.values())
+            progress = None
+            if job:
+                # One detection may stand for several identical lanes
+                lane_groups = [[i for i, k in enumerate(cache_keys) if k == key] for key in pending]
+                def progress(idx, frames, fps):
+                    for lane in lane_groups[idx]:
+                        job.lane_progress(lane, frames, fps)
+            results, errors = detect_cars_parallel([video_paths[i] for i in lanes], progress=progress)
+            for key, count, error in zip(pending.keys(), results, errors):
+                detected[key] = (count, error)
+                if cache and not error:
+                    cache.put(key, count)
         
-        num_cars_list = results
+        num_cars_list = []
         detection_errors = []
         detect_logs = []
         
-        for i, (count, error) in enumerate(zip(results, errors)):
+        for i, key in enumerate(cache_keys):
+            if cached[i] is not None:
+                count, error = cached[i], None
+            else:
+                count, error = detected[key]
+            num_cars_list.append(count)
+            if job:
+                job.lane_done(i, count, cached=cached[i] is not None, error=error)
             if error:
                 detection_errors.append({'index': i, 'error': error})
                 detect_logs.append({"video": video_paths[i], "error": error})
                 current_app.logger.error(f"Detection error for lane {i}: {error}")
             else:
-                detect_logs.append({"video": video_paths[i], "cars": count})
+                detect_logs.append({"video": video_paths[i], "cars": count, "cached": cached[i] is not None})
                 current_app.logger.info(f"Lane {i}: {count} cars detected")
                 
     except Exception as e:
         current_app.logger.exception("Parallel detection failed")
-        return jsonify({"error": "Video detection failed", "detail": str(e)}), 500
+        return {"error": "Video detection failed", "detail": str(e)}, 500
     
     # Check if any detections failed
     if detection_errors:
-        return jsonify({
+        return {
             'error': 'Car detection failed for some lanes',
             'detection_errors': detection_errors,
             'partial_results': num_cars_list
-        }), 500
+        }, 500
 
     current_app.logger.info("All detections done: %s", num_cars_list)
 
+    if job:
+        job.emit({'type': 'stage', 'stage': 'optimizer'})
     try:
         current_app.logger.info("Calling C++ optimizer with cars=%s", num_cars_list)
         result = run_cpp_optimizer(num_cars_list, timeout_seconds=30, verbose=True)
@@ -190,17 +347,18 @@ def upload_files():
             current_app.logger.info("C++ optimizer returned: <non-dict>")
     except Exception as e:
         current_app.logger.exception("Exception while calling optimizer")
-        return jsonify({"error": "Exception while calling optimizer", "detail": str(e)}), 500
+        return {"error": "Exception while calling optimizer", "detail": str(e)}, 500
 
     if isinstance(result, dict) and result.get("error"):
         current_app.logger.error("Optimizer error: %s", result)
         result["_detect_info"] = detect_logs
         result["elapsed_seconds"] = time.time() - start_ts
-        return jsonify(result), 500
+        return result, 500
 
     # RL Recommendation
     try:
-        rl_rec = get_rl_recommendation(num_cars_list, result)
+        with metrics.RL_SECONDS.time():
+            rl_rec = get_rl_recommendation(num_cars_list, result)
         current_app.logger.info("RL Recommendation: %s", str(rl_rec))
     except Exception as e:
         current_app.logger.exception("RL Recommendation failed")
@@ -212,8 +370,9 @@ def upload_files():
     try:
         delay = result.get('delay', 0) if isinstance(result, dict) else 0
         elapsed = time.time() - start_ts
-        log_result(num_cars_list, result, rl_rec, delay, elapsed)
-        log_analytics(num_cars_list, result, 'success')
+        with metrics.CSV_LOG_SECONDS.time():
+            log_result(num_cars_list, result, rl_rec, delay, elapsed)
+            log_analytics(num_cars_list, result, 'success')
         current_app.logger.info("Results logged to CSV")
     except Exception as e:
         current_app.logger.warning("Failed to log to CSV: %s", str(e))
@@ -230,7 +389,25 @@ def upload_files():
         if isinstance(result, dict):
             response.update(result)
 
-    return jsonify(response), 200
+    return response, 200
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, per-lane progress and (once finished) the result of an async upload."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job', 'job_id': job_id}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@api.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events: status changes, per-lane frames/FPS, lane results, final result."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job', 'job_id': job_id}), 404
+    return Response(stream_with_context(job.stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @api.route('/stats', methods=['GET'])
@@ -240,10 +417,12 @@ def get_stats():
         results_summary = get_results_summary()
         analytics_summary = get_analytics_summary()
         recent_data = get_recent_data(20)
+        cache = get_cache()
         return jsonify({
             'results': results_summary,
             'analytics': analytics_summary,
-            'recent': recent_data
+            'recent': recent_data,
+            'detection_cache': cache.stats() if cache else None
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
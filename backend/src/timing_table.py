@@ -0,0 +1,80 @@
+"""
+Precomputed optimal timing table.
+`Algo1 --build-table timing_table.bin --cap N` solves the exact optimum for every
+(N, S, W, E) tuple with counts 0..N once at build time; this module memory-maps the
+file and answers those inputs in O(1) without running an optimizer at all. Counts
+above the cap return None so the caller falls back to the live solver.
+"""
+
+import mmap
+import os
+import struct
+import threading
+
+OPTIMIZER_TABLE = os.environ.get("OPTIMIZER_TABLE", os.path.abspath("./timing_table.bin"))
+
+_HEADER = struct.Struct("<4s7I")    # magic, version, cap, lanes, green_min, green_max, cycle_time, record_size
+_RECORD = struct.Struct("<4Bf")     # greens[4], delay
+MAGIC = b"GTAB"
+VERSION = 1
+LANES = ("north", "south", "west", "east")
+
+
+class TimingTableError(ValueError):
+    """The file is not a timing table this code can read."""
+
+
+class TimingTable:
+    """Read-only view of a timing table file; lookups touch one 8-byte record."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise TimingTableError(f"{path}: truncated header")
+        magic, version, cap, lanes, green_min, green_max, cycle_time, record_size = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or lanes != len(LANES) or record_size != _RECORD.size:
+            raise TimingTableError(f"{path}: unsupported table (magic={magic!r}, version={version}, lanes={lanes})")
+        self.cap = cap
+        self.green_min, self.green_max, self.cycle_time = green_min, green_max, cycle_time
+        self._side = cap + 1
+        expected = _HEADER.size + self._side ** len(LANES) * _RECORD.size
+        if len(self._map) != expected:
+            raise TimingTableError(f"{path}: {len(self._map)} bytes, expected {expected} for cap={cap}")
+
+    def lookup(self, cars):
+        """{'north', 'south', 'west', 'east', 'delay'} for in-range counts, else None."""
+        if len(cars) != len(LANES) or any(c < 0 or c > self.cap for c in cars):
+            return None
+        n, s, w, e = cars
+        index = ((n * self._side + s) * self._side + w) * self._side + e
+        *greens, delay = _RECORD.unpack_from(self._map, _HEADER.size + index * _RECORD.size)
+        result = dict(zip(LANES, greens))
+        result["delay"] = delay
+        return result
+
+    def close(self):
+        self._map.close()
+
+
+_table = None
+_table_error = None
+_table_lock = threading.Lock()
+
+
+def get_timing_table():
+    """The process-wide table from OPTIMIZER_TABLE, or None if it is missing or unreadable."""
+    global _table, _table_error
+    with _table_lock:
+        if _table is None and _table_error is None:
+            if not os.path.exists(OPTIMIZER_TABLE):
+                _table_error = "missing"
+            else:
+                try:
+                    _table = TimingTable(OPTIMIZER_TABLE)
+                    print(f"[Optimizer] Timing table loaded: counts 0..{_table.cap} ({OPTIMIZER_TABLE})", flush=True)
+                except (OSError, ValueError) as e:
+                    _table_error = str(e)
+                    print(f"[Optimizer] Timing table unusable ({e}) - solving live", flush=True)
+        return _table
@@ -2,32 +2,74 @@
 """
 Live camera ingestion helper (non-invasive to core API).
 Samples frames from RTSP/USB cameras, counts vehicles with YOLO, then runs the C++ optimizer + RL.
+Frames go through the same ROI crop and INPUT_SIZE resize as uploaded videos before
+detection, so live counts use the same thresholds on the same box scale.
 """
 
 import argparse
+import os
 import time
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2 as cv
 
-from yolov4 import create_model, VEHICLE_CLASSES, CONF_THRESHOLD, NMS_THRESHOLD
-from app import run_cpp_optimizer
+from yolov4 import create_engine, create_preprocessor, create_motion_gate, CONF_THRESHOLD, NMS_THRESHOLD
+from detection_core import count_vehicles
+from motion_gate import MotionGate, describe as describe_motion
+from preprocess import FramePreprocessor
+from src.optimizer import run_cpp_optimizer
 from rl_agent import get_rl_recommendation
 
 
-def _count_frame(model, class_names, frame) -> int:
+# Optimizer latency budget per live decision: the GA returns its best-so-far answer (0 = run to completion)
+LIVE_OPTIMIZER_DEADLINE_MS = float(os.environ.get("LIVE_OPTIMIZER_DEADLINE_MS", "200"))
+
+# Per-camera motion gates, kept across polling cycles (YOLO_MOTION_GATE=1)
+_camera_gates: Dict[str, MotionGate] = {}
+
+# Per-camera ROI crop + resize, rebuilt when a camera's resolution changes
+_camera_preprocessors: Dict[str, FramePreprocessor] = {}
+
+
+def _camera_gate(source: str) -> Optional[MotionGate]:
+    if source not in _camera_gates:
+        gate = create_motion_gate()
+        if gate is None:
+            return None
+        _camera_gates[source] = gate
+    return _camera_gates[source]
+
+
+def _camera_preprocessor(source: str, frame):
+    """FramePreprocessor for a camera (ROI crop and resize as on uploads), rebuilt when its frame size changes."""
+    h, w = frame.shape[:2]
+    pre = _camera_preprocessors.get(source)
+    if pre is None or pre.source_size != (w, h):
+        pre = _camera_preprocessors[source] = create_preprocessor(w, h)
+    return pre
+
+
+def _count_frame(model, class_names, frame, gate: Optional[MotionGate] = None, source: str = "") -> int:
+    """Vehicle count for one raw frame; with a gate, a static ROI reuses the previous count."""
+    pre = _camera_preprocessor(source, frame)
+    frame = pre.prepare(frame)
+    if gate is not None and not gate.should_infer(frame):
+        return gate.last_count
     classes, scores, boxes = model.detect(frame, CONF_THRESHOLD, NMS_THRESHOLD)
-    return int(sum(1 for cid in classes if class_names[cid] in VEHICLE_CLASSES))
+    count = count_vehicles(classes, scores, boxes, class_names, pre.area_scale)
+    if gate is not None:
+        gate.record(count)
+    return count
 
 
-def detect_single_stream(source: str, model, class_names, warmup_frames: int = 5, timeout: int = 10) -> Tuple[int, str]:
+def read_last_frame(source: str, warmup_frames: int = 5, timeout: int = 10):
     """
-    Sample a few frames from a live camera/RTSP/USB source and return a vehicle count.
-    Returns (count, error_message). On error, count is 0 and error_message is non-empty.
+    Read a few frames from a live camera/RTSP/USB source and keep the last one.
+    Returns (frame, error_message); frame is None on error.
     """
     cap = cv.VideoCapture(source)
     if not cap.isOpened():
-        return 0, f"Could not open camera source: {source}"
+        return None, f"Could not open camera source: {source}"
 
     start = time.time()
     last_frame = None
@@ -43,10 +85,21 @@ def detect_single_stream(source: str, model, class_names, warmup_frames: int = 5
     cap.release()
 
     if last_frame is None:
-        return 0, f"No frames read from source: {source}"
+        return None, f"No frames read from source: {source}"
+    return last_frame, ""
+
+
+def detect_single_stream(source: str, model, class_names, warmup_frames: int = 5, timeout: int = 10) -> Tuple[int, str]:
+    """
+    Sample a few frames from a live camera/RTSP/USB source and return a vehicle count.
+    Returns (count, error_message). On error, count is 0 and error_message is non-empty.
+    """
+    last_frame, err = read_last_frame(source, warmup_frames, timeout)
+    if last_frame is None:
+        return 0, err
 
     try:
-        count = _count_frame(model, class_names, last_frame)
+        count = _count_frame(model, class_names, last_frame, _camera_gate(source), source)
         return count, ""
     except Exception as e:
         return 0, f"Detection failed for {source}: {e}"
@@ -55,36 +108,66 @@ def detect_single_stream(source: str, model, class_names, warmup_frames: int = 5
 import concurrent.futures
 
 def detect_cameras(camera_sources: List[str]) -> Tuple[List[int], List[str]]:
-    """Detect vehicles on a list of camera sources in parallel."""
-    model, class_names = create_model()
+    """
+    Detect vehicles on a list of camera sources.
+    Frames are captured in parallel, then counted with one batched forward pass.
+    """
+    engine, class_names = create_engine()
     
     # Pre-allocate results to maintain order
     results = [0] * len(camera_sources)
     errors = [""] * len(camera_sources)
-
-    def _process_single_camera(idx, src):
-        # Note: Model is shared, but detection inside detect_single_stream 
-        # calls _count_frame which calls model.detect. 
-        # OpenCV DNN inference is generally thread-safe, but capturing is the bottleneck.
-        cnt, err = detect_single_stream(src, model, class_names)
-        return idx, cnt, err
+    frames = [None] * len(camera_sources)
+    area_scales = [1.0] * len(camera_sources)
 
     # Use ThreadPoolExecutor for I/O bound camera capture
     with concurrent.futures.ThreadPoolExecutor(max_workers=len(camera_sources)) as executor:
-        futures = [executor.submit(_process_single_camera, i, src) for i, src in enumerate(camera_sources)]
+        futures = {executor.submit(read_last_frame, src): i for i, src in enumerate(camera_sources)}
         
         for future in concurrent.futures.as_completed(futures):
-            idx, count, err = future.result()
-            results[idx] = count
-            errors[idx] = err
-            print(f"[Stream] Cam {idx}: count={count} err={err}")
+            idx = futures[future]
+            frames[idx], errors[idx] = future.result()
+
+    captured = []
+    for i, frame in enumerate(frames):
+        if frame is None:
+            continue
+        pre = _camera_preprocessor(camera_sources[i], frame)
+        area_scales[i] = pre.area_scale
+        frames[i] = pre.prepare(frame)
+        gate = _camera_gate(camera_sources[i])
+        if gate is not None and not gate.should_infer(frames[i]):
+            results[i] = gate.last_count   # Static scene since the last detection
+            continue
+        captured.append(i)
+    try:
+        detections = engine.detect_batch([frames[i] for i in captured], CONF_THRESHOLD, NMS_THRESHOLD)
+        for idx, (classes, scores, boxes) in zip(captured, detections):
+            results[idx] = count_vehicles(classes, scores, boxes, class_names, area_scales[idx])
+            gate = _camera_gate(camera_sources[idx])
+            if gate is not None:
+                gate.record(results[idx])
+    except Exception as e:
+        for idx in captured:
+            errors[idx] = f"Detection failed for {camera_sources[idx]}: {e}"
+
+    for idx in range(len(camera_sources)):
+        print(f"[Stream] Cam {idx}: count={results[idx]} err={errors[idx]}")
+        gate = _camera_gates.get(camera_sources[idx])
+        if gate is not None:
+            print(f"[Stream] Cam {idx} motion gate: {describe_motion(gate.stats(), results[idx])}")
 
     return results, errors
 
 
-def run_live_optimization(camera_sources: List[str], verbose: bool = True):
+def run_live_optimization(camera_sources: List[str], verbose: bool = True,
+                          deadline_ms: float = LIVE_OPTIMIZER_DEADLINE_MS,
+                          intersection: Optional[str] = None):
     """
     Runs detection on all cameras, then invokes GA optimizer and RL recommendation.
+    The optimizer answers within deadline_ms with its best solution so far; the result
+    carries iterations, converged and deadline_hit. The GA is warm-started from the last
+    plans for this intersection (default key: the camera sources).
     Returns (result_dict, errors).
     """
     counts, errors = detect_cameras(camera_sources)
@@ -94,7 +177,11 @@ def run_live_optimization(camera_sources: List[str], verbose: bool = True):
     if len(counts) != 4:
         return {"error": f"Expected 4 camera sources, got {len(counts)}", "counts": counts}, errors
 
-    result = run_cpp_optimizer(counts, verbose=verbose)
+    intersection = intersection or "|".join(camera_sources)
+    result = run_cpp_optimizer(counts, verbose=verbose, deadline_ms=deadline_ms or None, intersection=intersection)
+    if isinstance(result, dict) and result.get("deadline_hit"):
+        print(f"[Stream] Optimizer deadline ({deadline_ms:g} ms) hit after {result.get('iterations')} "
+              f"iterations - using best so far (delay={result.get('delay')})", flush=True)
     rl_rec = get_rl_recommendation(counts, result if isinstance(result, dict) else {})
 
     payload = {
@@ -114,10 +201,14 @@ def main():
         help="Camera source (RTSP/HTTP URL or device index). Pass exactly 4 (use multiple --camera flags).",
     )
     parser.add_argument("--verbose", action="store_true", help="Verbose optimizer output")
+    parser.add_argument("--deadline-ms", type=float, default=LIVE_OPTIMIZER_DEADLINE_MS,
+                        help="Optimizer latency budget in ms; best-so-far result when it expires (0 = none)")
+    parser.add_argument("--intersection", help="Key for warm-starting from previous plans (default: the camera list)")
     args = parser.parse_args()
 
     camera_sources = args.camera
-    payload, errors = run_live_optimization(camera_sources, verbose=args.verbose)
+    payload, errors = run_live_optimization(camera_sources, verbose=args.verbose, deadline_ms=args.deadline_ms,
+                                            intersection=args.intersection)
 
     print("\n Live Optimization Result")
     print(payload)
@@ -0,0 +1,37 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _build(tmp_path_factory, name, *flags):
+    if shutil.which('g++') is None:
+        pytest.skip("g++ not available")
+    path = str(tmp_path_factory.mktemp('optimizer') / name)
+    subprocess.run(['g++', '-std=c++17', '-O2', '-fopenmp', *flags, '-o', path, os.path.join(BACKEND_DIR, 'Algo.cpp')],
+                   check=True)
+    return path
+
+
+@pytest.fixture(scope='session')
+def binary(tmp_path_factory):
+    """Optimizer built from the current Algo.cpp (a local Algo1 may be stale)."""
+    return _build(tmp_path_factory, 'Algo')
+
+
+@pytest.fixture(scope='session')
+def library(tmp_path_factory):
+    """Algo.cpp built as the in-process shared library."""
+    return _build(tmp_path_factory, 'libalgo.so', '-shared', '-fPIC', '-DALGO_LIBRARY')
+
+
+@pytest.fixture
+def in_process(library, monkeypatch):
+    """run_cpp_optimizer and batch solves load the freshly built library."""
+    from src import optimizer
+    monkeypatch.setattr(optimizer, 'OPTIMIZER_LIB', library)
+    monkeypatch.setattr(optimizer, '_lib', None)
+    monkeypatch.setattr(optimizer, '_lib_error', None)
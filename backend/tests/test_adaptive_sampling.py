@@ -0,0 +1,40 @@
+import math
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from adaptive_sampling import adaptive_peak, progressive_order
+
+def traffic(frame_idx):
+    """Smooth synthetic lane: background level 3 with one rush peaking at 14 around frame 30000."""
+    return int(3 + 11 * math.exp(-((frame_idx - 30000) / 2000) ** 2))
+
+def test_progressive_order_covers_range_coarse_first():
+    order = progressive_order(9)
+    assert sorted(order) == list(range(9))
+    assert order[:3] == [0, 8, 4]
+
+def test_peak_found_with_few_inferences():
+    grid = list(range(0, 40000, 4))
+    visited = []
+
+    def infer(frame_idx):
+        visited.append(frame_idx)
+        return traffic(frame_idx)
+
+    peak, counts = adaptive_peak(grid, infer, coarse=8, patience=12)
+    assert peak >= max(traffic(f) for f in grid) - 1
+    assert len(visited) == len(set(visited)) == len(counts)
+    assert len(counts) < len(grid) // 20
+
+def test_short_clip_is_fully_covered():
+    grid = list(range(0, 20, 4))
+    peak, counts = adaptive_peak(grid, lambda f: f, coarse=1, patience=100)
+    assert peak == 16
+    assert sorted(counts) == grid
+
+def test_unreadable_frames_are_skipped():
+    grid = list(range(10))
+    peak, counts = adaptive_peak(grid, lambda f: None if f > 5 else f, coarse=1, patience=0)
+    assert peak == 5 and max(counts) == 5
@@ -48,3 +48,49 @@ def test_invalid_optimize_request(client):
                            data=json.dumps(payload),
                            content_type='application/json')
     assert response.status_code == 400
+
+def test_optimize_batch_streams_ndjson(client):
+    """Test /optimize_batch with a JSON array and an NDJSON body."""
+    from src.limiter import request_counts
+    request_counts.clear()
+    response = client.post('/optimize_batch?solver=exact',
+                           data=json.dumps([[10, 20, 30, 40], [1, 2]]),
+                           content_type='application/json')
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    if "error" in lines[0]:
+        pytest.skip("optimizer not built")
+    assert [l.get("index") for l in lines[:2]] == [0, 1] and "north" in lines[0] and "error" in lines[1]
+    assert lines[-1]["summary"]["count"] == 2
+
+    response = client.post('/optimize_batch', data='[1, 2, 3, 4]\n{"cars": [5, 6, 7, 8]}\n',
+                           content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [l["cars"] for l in lines[:2]] == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    assert lines[-1]["summary"]["solves_per_second"] > 0
+
+    assert client.post('/optimize_batch', data='{"cars": 3}', content_type='application/json').status_code == 400
+    assert client.post('/optimize_batch?solver=annealing', data='[]',
+                       content_type='application/json').status_code == 400
+    request_counts.clear()
+
+def test_optimize_batch_limits_vectors(client, monkeypatch):
+    """Test /optimize_batch rejects oversized arrays and bad seeds, and stops NDJSON streams at the limit."""
+    from src import routes
+    from src.limiter import request_counts
+    request_counts.clear()
+    monkeypatch.setattr(routes, 'OPTIMIZER_BATCH_MAX_ITEMS', 2)
+    vectors = [[1, 2, 3, 4]] * 3
+    response = client.post('/optimize_batch?solver=exact', data=json.dumps(vectors), content_type='application/json')
+    assert response.status_code == 413
+
+    response = client.post('/optimize_batch?solver=exact', data=''.join(json.dumps(v) + '\n' for v in vectors),
+                           content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [l.get("index") for l in lines[:2]] == [0, 1]
+    assert "at most 2 vectors" in lines[2]["error"]
+    assert lines[3]["summary"]["count"] == 2
+
+    response = client.post('/optimize_batch?seed=-1', data=json.dumps(vectors[:1]), content_type='application/json')
+    assert response.status_code == 400
+    request_counts.clear()
@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from autotune import candidate_configs, count_drift, load_tuning, parse_bool, tuned_setting
+
+def test_load_tuning_keeps_only_tuned_keys(tmp_path):
+    path = tmp_path / 'autotune.json'
+    path.write_text(json.dumps({'workers': 2, 'threads': 2, 'opencl': False, 'input_size': 320, 'fps': 41.0}))
+    assert load_tuning(str(path)) == {'workers': 2, 'threads': 2, 'opencl': False, 'input_size': 320}
+    assert load_tuning(str(tmp_path / 'missing.json')) == {}
+    (tmp_path / 'bad.json').write_text('{not json')
+    assert load_tuning(str(tmp_path / 'bad.json')) == {}
+
+def test_env_overrides_tuning_file(monkeypatch):
+    tuning = {'workers': 2, 'opencl': True}
+    monkeypatch.delenv('YOLO_WORKERS', raising=False)
+    assert tuned_setting(tuning, 'YOLO_WORKERS', 'workers', 3) == 2
+    assert tuned_setting(tuning, 'YOLO_DNN_THREADS', 'threads', 4) == 4
+    assert tuned_setting(tuning, 'YOLO_OPENCL', 'opencl', False, parse_bool) is True
+    monkeypatch.setenv('YOLO_WORKERS', '1')
+    assert tuned_setting(tuning, 'YOLO_WORKERS', 'workers', 3) == 1
+
+def test_candidates_never_oversubscribe():
+    configs = candidate_configs(4, [1, 2, 4], [1, 2, 4], [False], [416])
+    assert all(c['workers'] * c['threads'] <= 4 for c in configs)
+    assert {'workers': 4, 'threads': 1, 'opencl': False, 'input_size': 416} in configs
+    assert len(configs) == 6
+
+def test_count_drift():
+    assert count_drift([3, 4, 5], [3, 5, 7]) == 1.0
+    assert count_drift([], [1]) == 0.0
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import batch, optimizer
+from optimize_batch import read_vectors, scaled
+
+KEYS = optimizer.LANES + ("iterations", "seed", "cars", "index")
+
+
+def test_library_and_subprocess_batches_agree(binary, in_process, monkeypatch):
+    vectors = [[i % 31, (3 * i) % 29, i % 7, 9] for i in range(40)]
+    lib = list(batch.optimize_batch(vectors, solver="ga", seed=11, chunk_size=16))
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    monkeypatch.setattr(optimizer, '_lib_error', "disabled")
+    proc = list(batch.optimize_batch(vectors, solver="ga", seed=11, chunk_size=7))
+    assert [r["index"] for r in lib] == list(range(40))
+    assert [[r[k] for k in KEYS] for r in lib] == [[r[k] for k in KEYS] for r in proc]
+    assert [r["delay"] for r in lib] == pytest.approx([r["delay"] for r in proc], rel=1e-9)
+    # Any item replays alone from the seed it reports
+    single = optimizer.run_cpp_optimizer(lib[5]["cars"], verbose=False, backend="library", seed=lib[5]["seed"])
+    assert [single[k] for k in optimizer.LANES] == [lib[5][k] for k in optimizer.LANES]
+
+def test_batch_seed_zero_is_reproducible(in_process):
+    vectors = [[i, 9 - i, 4, 7] for i in range(6)]
+    runs = [list(batch.optimize_batch(vectors, solver="ga", seed=0)) for _ in range(2)]
+    assert [[r[k] for k in KEYS] for r in runs[0]] == [[r[k] for k in KEYS] for r in runs[1]]
+
+def test_errors_are_reported_in_place(in_process, monkeypatch):
+    monkeypatch.setattr(batch, 'get_timing_table', lambda: None)
+    items = [[5, 10, 15, 20], [1, 2], ValueError("bad JSON"), {"cars": [3, 3, 3, 3]}, "x"]
+    stats = batch.BatchStats()
+    results = list(batch.optimize_batch(items, solver="exact", stats=stats, chunk_size=2))
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert ["error" in r for r in results] == [False, True, True, False, True]
+    assert results[2]["error"] == "bad JSON" and results[3]["cars"] == [3, 3, 3, 3]
+    summary = stats.summary()
+    assert (summary["count"], summary["solved"], summary["errors"]) == (5, 2, 3)
+    assert summary["solves_per_second"] > 0
+
+def test_failed_library_call_marks_chunk_as_errors():
+    """A non-zero return from algo_solve_batch leaves zeroed outputs: they must not pass as plans."""
+    results = batch._solve_in_process(lambda *args: 1, [(0, [5, 10, 15, 20]), (1, [1, 1, 1, 1])], "ga", 3)
+    assert results == [{"error": "algo_solve_batch failed (code 1)"}] * 2
+
+def test_cli_reads_results_csv(tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text("timestamp,north_cars,south_cars,west_cars,east_cars,delay\n"
+                    "t0,11,5,9,11,254.8\nt1,1,2,,4,0\n")
+    items = list(read_vectors(str(path)))
+    assert items[0] == [11, 5, 9, 11] and isinstance(items[1], ValueError)
+    assert list(scaled([items[0]], 1.5)) == [[16, 8, 14, 16]]
+    ndjson = tmp_path / "v.ndjson"
+    ndjson.write_text(json.dumps([1, 2, 3, 4]) + "\n\n" + json.dumps({"cars": [5, 6, 7, 8]}) + "\n")
+    assert list(read_vectors(str(ndjson))) == [[1, 2, 3, 4], {"cars": [5, 6, 7, 8]}]
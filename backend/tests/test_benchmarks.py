@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+from benchmarks.bench_detection import bench_scan, bench_stages, compare
+from benchmarks.synthetic import StubEngine, make_clip
+
+def test_stub_engine_counts_synthetic_vehicles(tmp_path):
+    clip = make_clip(320, 180, frames=12, density=3, path=str(tmp_path / 'clip.mp4'))
+    engine, class_names = StubEngine(yolov4.INPUT_SIZE), yolov4.load_class_names()
+
+    stages = bench_stages(engine, class_names, clip)
+    assert stages['frames'] == 12
+    assert all(stages[s] > 0 for s in ('decode', 'roi_resize', 'inference', 'postprocess'))
+    assert 2 <= stages['mean_vehicles'] <= 3
+
+    scan = bench_scan(engine, class_names, clip, stages['frames'])
+    assert scan['scan_max'] == 3
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {'results': {'clip': {'decode': 100.0, 'scan': 50.0, 'demo': 20.0}}}
+    results = {'results': {'clip': {'decode': 85.0, 'scan': 30.0, 'postprocess': 10.0}}}
+    assert compare(results, baseline, 0.2) == [('clip', 'scan', 50.0, 30.0)]
+    assert compare(results, baseline, 0.5) == []
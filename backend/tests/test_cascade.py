@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import yolov4
+from yolov4 import CascadeModel
+
+CLASS_NAMES = ['person', 'bicycle', 'car', 'motorbike']
+
+class FakeModel:
+    """Returns fixed detections (class, score) per call, filtered by the requested confidence."""
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.calls = 0
+
+    def detect(self, frame, conf, nms):
+        dets = [(c, s) for c, s in self.frames[self.calls] if s > conf]
+        self.calls += 1
+        classes = np.array([c for c, _ in dets], np.int32)
+        scores = np.array([s for _, s in dets], np.float32)
+        boxes = np.array([[0, 0, 50, 50]] * len(dets), np.int32).reshape(-1, 4)
+        return classes, scores, boxes
+
+def test_confident_frames_stay_on_tiny():
+    """Clear detections below the running max are not escalated."""
+    tiny = FakeModel([[(2, 0.9)] * 3, [(2, 0.9)], [(2, 0.95)]])
+    full = FakeModel([[(2, 0.9)] * 4])
+    cascade = CascadeModel(tiny, full, CLASS_NAMES)
+    counts = [yolov4.count_vehicles(*cascade.detect(None, 0.4, 0.45), CLASS_NAMES) for _ in range(3)]
+
+    # First frame escalates (it sets the running max), the rest are far below it
+    assert counts == [4, 1, 1]
+    assert cascade.stats()['escalated'] == 1 and full.calls == 1
+
+def test_near_threshold_detections_escalate():
+    """Several motorbikes just around their 0.35 threshold send the frame to the full model."""
+    tiny = FakeModel([[(2, 0.9)] * 5, [(3, 0.33), (3, 0.37), (2, 0.9)]])
+    full = FakeModel([[(2, 0.9)] * 5, [(3, 0.8)] * 3])
+    cascade = CascadeModel(tiny, full, CLASS_NAMES)
+    cascade.detect(None, 0.4, 0.45)
+    classes, scores, boxes = cascade.detect(None, 0.4, 0.45)
+    assert yolov4.count_vehicles(classes, scores, boxes, CLASS_NAMES) == 3
+    assert cascade.escalated == 2
+
+def test_steady_traffic_rarely_escalates():
+    """Counts hovering around the same level only escalate while the peak is being set."""
+    frames = [[(2, 0.9)] * (3 + i % 2) for i in range(50)]
+    cascade = CascadeModel(FakeModel(frames), FakeModel(frames), CLASS_NAMES)
+    counts = [yolov4.count_vehicles(*cascade.detect(None, 0.4, 0.45), CLASS_NAMES) for _ in range(50)]
+    assert max(counts) == 4
+    assert cascade.escalated / cascade.frames <= 0.05
+
+def test_missing_full_weights_fall_back_to_tiny(monkeypatch):
+    monkeypatch.setattr(yolov4, 'FULL_WEIGHTS_FILE', '/nonexistent/yolov4.weights')
+    sentinel = object()
+    assert yolov4.create_cascade(sentinel) is sentinel
@@ -0,0 +1,77 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import app
+from src import routes
+from src.detection_cache import DetectionCache
+
+def test_cache_hit_miss_and_lru_eviction(tmp_path):
+    cache = DetectionCache(str(tmp_path), max_entries=2)
+    assert cache.get('a') is None
+    cache.put('a', 3)
+    time.sleep(0.01)
+    cache.put('b', 4)
+    time.sleep(0.01)
+    assert cache.get('a') == 3          # refreshes 'a'
+    time.sleep(0.01)
+    cache.put('c', 5)                   # evicts 'b', the least recently used
+    assert cache.get('b') is None
+    assert cache.get('c') == 5
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['evictions'] == 1
+
+def test_key_depends_on_params():
+    assert DetectionCache.make_key('d', {'skip_frames': 3}) != DetectionCache.make_key('d', {'skip_frames': 1})
+
+def test_key_separates_batched_counts(monkeypatch):
+    """Batched counts skip the cascade, so they never share a key with cascade counts."""
+    import yolov4
+    monkeypatch.setattr(yolov4, 'CASCADE', True)
+    cascade = yolov4.detection_params()
+    monkeypatch.setattr(yolov4, 'BATCHED_INFERENCE', True)
+    batched = yolov4.detection_params()
+    assert batched['batched'] == yolov4.BATCH_SIZE and batched['cascade'] is None
+    assert cascade['batched'] is None and cascade['cascade'] is not None
+    assert DetectionCache.make_key('d', batched) != DetectionCache.make_key('d', cascade)
+
+def test_upload_uses_cache_and_dedupes(tmp_path, monkeypatch):
+    """Cached clips skip detection; identical uncached clips are detected once."""
+    cache = DetectionCache(str(tmp_path / 'cache'))
+    known = b"known clip"
+    cache.put(cache.make_key(hashlib.sha256(known).hexdigest(), routes.detection_params()), 7)
+
+    calls = []
+    def fake_detect(paths, max_workers=None, progress=None):
+        calls.append(paths)
+        return [2] * len(paths), [None] * len(paths)
+
+    monkeypatch.setattr(routes, 'get_cache', lambda: cache)
+    monkeypatch.setattr(routes, 'detect_cars_parallel', fake_detect)
+    monkeypatch.setattr(routes, 'log_result', lambda *a, **k: True)
+    monkeypatch.setattr(routes, 'log_analytics', lambda *a, **k: True)
+    app.config['TESTING'] = True
+    monkeypatch.setitem(app.config, 'UPLOADS_DIR', str(tmp_path))
+
+    data = {'videos': [
+        (io.BytesIO(known), 'a.mp4'),
+        (io.BytesIO(b"new clip"), 'b.mp4'),
+        (io.BytesIO(b"new clip"), 'c.mp4'),
+        (io.BytesIO(known), 'd.mp4'),
+    ]}
+    with app.test_client() as client:
+        response = client.post('/upload', data=data, content_type='multipart/form-data')
+    body = json.loads(response.data)
+
+    assert len(calls) == 1 and len(calls[0]) == 1
+    logs = body.get('detect_logs') or body.get('_detect_info')
+    assert [log['cars'] for log in logs] == [7, 2, 2, 7]
+    assert [log['cached'] for log in logs] == [True, False, False, True]
+    assert cache.stats()['hits'] >= 2
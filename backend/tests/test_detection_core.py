@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detection_core import (MIN_BOX_AREA, MIN_BOX_AREA_DEFAULT, PER_CLASS_CONF, VEHICLE_CLASSES,
+                            VehicleFilter, count_vehicles, vehicle_detections)
+
+CLASS_NAMES = ['person', 'bicycle', 'car', 'motorbike', 'aeroplane', 'bus', 'train', 'truck']
+
+def loop_count(classes, scores, boxes):
+    """The per-box rule the upload and demo paths used before detection_core."""
+    count = 0
+    for cid, score, box in zip(classes, scores, boxes):
+        name = CLASS_NAMES[cid]
+        if name in VEHICLE_CLASSES and score >= PER_CLASS_CONF.get(name, 0.4) \
+                and box[2] * box[3] >= MIN_BOX_AREA.get(name, MIN_BOX_AREA_DEFAULT):
+            count += 1
+    return count
+
+def test_matches_per_box_loop():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        n = int(rng.integers(0, 200))
+        classes = rng.integers(0, len(CLASS_NAMES), n).astype(np.int32)
+        scores = rng.uniform(0.3, 1.0, n).astype(np.float32)
+        boxes = rng.integers(5, 60, (n, 4)).astype(np.int32)
+        assert count_vehicles(classes, scores, boxes, CLASS_NAMES) == loop_count(classes, scores, boxes)
+
+def test_thresholds_and_shapes():
+    # (N, 1) class/score arrays as returned by older OpenCV builds
+    classes = np.array([[2], [2], [3], [0], [7]])
+    scores = np.array([[0.5], [0.49], [0.36], [0.99], [0.9]], np.float32)
+    boxes = np.array([[0, 0, 30, 20], [0, 0, 30, 20], [0, 0, 20, 15], [0, 0, 99, 99], [0, 0, 20, 20]])
+    vehicles = vehicle_detections(classes, scores, boxes, CLASS_NAMES)
+    assert [name for _, name, _ in vehicles] == ['car', 'motorbike']
+    assert count_vehicles((), (), (), CLASS_NAMES) == 0
+
+def test_uncertain_band():
+    f = VehicleFilter(CLASS_NAMES)
+    assert f.uncertain([2, 2, 0, 3], [0.45, 0.7, 0.5, 0.3], 0.1) == 2
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+
+import cv2 as cv
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detector_pool import DetectionPool
+
+def test_pool_reports_errors_per_job():
+    """Every job completes with an error instead of hanging when detection cannot run."""
+    pool = DetectionPool(2)
+    try:
+        results, errors = pool.map(['missing_0.mp4', 'missing_1.mp4', 'missing_2.mp4'], timeout=60)
+        assert results == [0, 0, 0]
+        assert all(errors)
+    finally:
+        pool.shutdown()
+
+def test_pool_recycles_workers():
+    """Workers retire after max_jobs_per_worker jobs and are replaced."""
+    pool = DetectionPool(1, max_jobs_per_worker=1)
+    try:
+        for i in range(3):
+            job = pool.submit(f'missing_{i}.mp4')
+            assert job.wait(60)
+        assert pool.restarts >= 2
+        assert pool.stats()['workers'] == 1
+    finally:
+        pool.shutdown()
+
+def test_late_retired_message_does_not_grow_pool():
+    """A worker reaped before its 'retired' message arrives is replaced once, not twice."""
+    pool = DetectionPool(1)
+    try:
+        with pool._lock:
+            worker_id, proc = next(iter(pool._workers.items()))
+            proc.terminate()
+            proc.join(timeout=10)
+            pool._check_workers()
+            pool._handle_message(('retired', worker_id, None))
+            assert len(pool._workers) == 1 and worker_id not in pool._workers
+            assert pool.restarts == 1
+    finally:
+        pool.shutdown()
+
+def test_cancel_stops_running_and_queued_jobs(tmp_path):
+    """Cancelled jobs are dropped from the queue and aborted on their worker, which is kept."""
+    video = str(tmp_path / 'long.avi')
+    writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*'MJPG'), 25, (64, 64))
+    for i in range(800):
+        writer.write(np.full((64, 64, 3), i % 255, np.uint8))
+    writer.release()
+
+    pool = DetectionPool(1)
+    try:
+        started = threading.Event()
+        running = pool.submit(video, on_progress=lambda *_: started.set())
+        queued_progress = []
+        queued = pool.submit(video, on_progress=lambda *args: queued_progress.append(args))
+        assert started.wait(120)
+        pool.cancel(queued)
+        pool.cancel(running)
+        assert running.error == queued.error == "Cancelled"
+
+        follow = pool.submit('missing.mp4')
+        assert follow.wait(60) and follow.error
+        assert pool.restarts == 0
+        assert not queued_progress
+    finally:
+        pool.shutdown()
+
+def test_plan_segments_balances_long_lanes():
+    """A lane much longer than the others is split on the sampling grid."""
+    import yolov4
+    plan = yolov4.plan_segments([4000, 800, 600, 600], 4)
+    lane0 = sorted((start, end) for lane, start, end in plan if lane == 0)
+    assert len(lane0) > 1
+    assert lane0[0][0] == 0 and lane0[-1][1] is None
+    assert all(start % (yolov4.SKIP_FRAMES + 1) == 0 for start, _ in lane0)
+    assert all(prev[1] == nxt[0] for prev, nxt in zip(lane0, lane0[1:]))
+    assert [(start, end) for lane, start, end in plan if lane == 3] == [(0, None)]
+
+def test_batched_mode_falls_back_with_cascade():
+    """YOLO_BATCHED cannot run the cascade: it is switched off with a warning instead of ignoring the cascade."""
+    import subprocess
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, YOLO_BATCHED='1', YOLO_CASCADE='1')
+    out = subprocess.run([sys.executable, '-c', 'import yolov4; print(yolov4.BATCHED_INFERENCE)'],
+                         cwd=backend, env=env, capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    assert 'YOLO_BATCHED ignored with YOLO_CASCADE' in out.stdout
+    assert out.stdout.strip().endswith('False')
+
+def test_merge_segment_stats():
+    import yolov4
+    merged = yolov4.merge_segment_stats([
+        {'max': 4, 'mean': 2.0, 'frames': 10},
+        {'max': 7, 'mean': 5.0, 'frames': 30},
+    ])
+    assert merged == {'max': 7, 'mean': 4.25, 'frames': 40}
@@ -0,0 +1,69 @@
+import multiprocessing as mp
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_pipeline import END_OF_STREAM, FramePipeline, PipelinedSource, SharedFrameRing
+from frame_source import FrameSource
+
+@pytest.fixture
+def video(tmp_path):
+    """Small synthetic clip whose frame index is encoded in the pixel values."""
+    path = str(tmp_path / 'clip.avi')
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*'MJPG'), 25, (160, 120))
+    for i in range(22):
+        writer.write(np.full((120, 160, 3), i * 10, np.uint8))
+    writer.release()
+    return path
+
+@pytest.fixture
+def pipeline():
+    pipe = FramePipeline(mp.get_context('spawn'), 2, (32, 32, 3))
+    yield pipe
+    pipe.stop()
+
+def test_ring_wraps_and_counts_stalls():
+    """Slots are reused in order and an empty ring counts as an inference stall."""
+    ring = SharedFrameRing(mp.get_context('spawn'), 2, (4, 4, 3))
+    try:
+        for i in range(5):
+            ring.put(i, np.full((4, 4, 3), i, np.uint8))
+            frame_idx, view = ring.get()
+            assert frame_idx == i and view[0, 0, 0] == i
+            ring.release()
+        ring.put_end()
+        assert ring.get()[0] == END_OF_STREAM
+        ring.release()
+        assert ring.stall_stats()['inference_stalls'] == 0
+        assert ring.stall_stats()['decoder_stalls'] == 0
+    finally:
+        ring.close()
+
+def test_pipelined_frames_match_direct(video, pipeline):
+    """Frames read from shared memory equal the in-process FrameSource output."""
+    options = dict(step=4, size=32, roi=(0.0, 1.0, 0.0, 1.0), mode='grab')
+    with FrameSource(video, **options) as source:
+        expected = [(idx, frame.copy()) for idx, frame in source]
+    with PipelinedSource(pipeline.spec(), video, **options) as source:
+        got = [(idx, frame.copy()) for idx, frame in source]
+    assert [idx for idx, _ in got] == [idx for idx, _ in expected]
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(got, expected))
+
+def test_early_exit_keeps_ring_in_sync(video, pipeline):
+    """Abandoning a stream drains it, so the next request starts at its own first frame."""
+    options = dict(step=1, size=32, roi=(0.0, 1.0, 0.0, 1.0), mode='grab')
+    with PipelinedSource(pipeline.spec(), video, **options) as source:
+        for idx, _ in source:
+            if idx == 3:
+                break
+    with PipelinedSource(pipeline.spec(), video, start_frame=10, end_frame=13, **options) as source:
+        assert [idx for idx, _ in source] == [10, 11, 12]
+
+def test_decoder_open_error(tmp_path, pipeline):
+    with pytest.raises(IOError):
+        PipelinedSource(pipeline.spec(), str(tmp_path / 'missing.avi'), size=32)
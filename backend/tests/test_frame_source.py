@@ -0,0 +1,46 @@
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_source import FrameSource, passthrough_args
+
+@pytest.fixture
+def video(tmp_path):
+    """Small synthetic clip whose frame index is encoded in the pixel values."""
+    path = str(tmp_path / 'clip.avi')
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*'MJPG'), 25, (160, 120))
+    for i in range(22):
+        writer.write(np.full((120, 160, 3), i * 10, np.uint8))
+    writer.release()
+    return path
+
+@pytest.mark.parametrize('mode', ['grab', 'seek'])
+def test_samples_every_step_frame(video, mode):
+    """Only every step-th frame is returned, already resized."""
+    with FrameSource(video, step=4, size=32, mode=mode) as source:
+        frames = list(source)
+    assert [idx for idx, _ in frames] == [0, 4, 8, 12, 16, 20]
+    assert all(frame.shape == (32, 32, 3) for _, frame in frames)
+    assert abs(int(frames[2][1].mean()) - 80) <= 3
+
+def test_segment_bounds(video):
+    """start_frame/end_frame restrict sampling to a segment."""
+    with FrameSource(video, step=3, size=32, start_frame=6, end_frame=15) as source:
+        assert [idx for idx, _ in source] == [6, 9, 12]
+
+def test_ffmpeg_passthrough_option_follows_version():
+    """-fps_mode only exists from ffmpeg 5.1; older builds get -vsync."""
+    assert passthrough_args("ffmpeg version 4.4.2-0ubuntu0.22.04.1 Copyright (c) 2000-2021") == ['-vsync', 'passthrough']
+    assert passthrough_args("ffmpeg version 5.0.1 Copyright") == ['-vsync', 'passthrough']
+    assert passthrough_args("ffmpeg version 5.1.4-0+deb12u1 Copyright") == ['-fps_mode', 'passthrough']
+    assert passthrough_args("ffmpeg version n6.1 Copyright") == ['-fps_mode', 'passthrough']
+    assert passthrough_args("ffmpeg version N-112000-gabcdef Copyright") == ['-fps_mode', 'passthrough']
+
+def test_unknown_mode(video):
+    with pytest.raises(ValueError):
+        FrameSource(video, mode='bogus')
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_engine import OnnxRuntimeEngine, rows_from_outputs
+
+NUM_CLASSES = 80
+
+def yolo_rows():
+    """Two Darknet rows: a confident car (class 2) in the centre and a weak one."""
+    rows = np.zeros((1, 2, 5 + NUM_CLASSES), np.float32)
+    rows[0, 0, :5] = [0.5, 0.5, 0.25, 0.25, 0.9]
+    rows[0, 0, 5 + 2] = 0.9
+    rows[0, 1, :5] = [0.2, 0.2, 0.1, 0.1, 0.2]
+    rows[0, 1, 5 + 2] = 0.2
+    return rows
+
+@pytest.fixture
+def onnx_model(tmp_path):
+    """Tiny ONNX graph with a fixed batch of 1 that returns yolo_rows() for any input."""
+    onnx = pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    from onnx import TensorProto, helper, numpy_helper
+
+    nodes = [
+        helper.make_node('ReduceMean', ['input'], ['mean'], keepdims=0),
+        helper.make_node('Mul', ['mean', 'zero'], ['nothing']),
+        helper.make_node('Add', ['rows', 'nothing'], ['output']),
+    ]
+    graph = helper.make_graph(
+        nodes, 'fake_yolo',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, [1, 3, 64, 64])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, [1, 2, 5 + NUM_CLASSES])],
+        initializer=[numpy_helper.from_array(yolo_rows(), 'rows'),
+                     numpy_helper.from_array(np.zeros((), np.float32), 'zero')])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)], ir_version=8)
+    path = str(tmp_path / 'fake.onnx')
+    onnx.save(model, path)
+    return path
+
+def test_onnx_engine_detects_like_detection_model(onnx_model):
+    """Input size follows the model; boxes are decoded with DetectionModel's integer math."""
+    engine = OnnxRuntimeEngine(onnx_model, input_size=416, intra_op_threads=1)
+    assert engine.input_size == 64
+
+    frame = np.zeros((200, 100, 3), np.uint8)
+    classes, scores, boxes = engine.detect(frame, 0.4, 0.45)
+    assert classes.tolist() == [2]
+    assert boxes.tolist() == [[38, 75, 25, 50]]
+
+    # Fixed batch 1: a batch of three is run frame by frame
+    results = engine.detect_batch([frame] * 3, 0.1, 0.45)
+    assert [len(c) for c, _, _ in results] == [2, 2, 2]
+
+def test_missing_model(tmp_path):
+    pytest.importorskip('onnxruntime')
+    with pytest.raises(FileNotFoundError):
+        OnnxRuntimeEngine(str(tmp_path / 'none.onnx'), 416)
+
+def test_two_output_export_layout():
+    """x1y1x2y2 boxes + class confidences become Darknet rows."""
+    boxes = np.array([[[[0.25, 0.25, 0.75, 0.5]]]], np.float32)
+    confs = np.zeros((1, 1, NUM_CLASSES), np.float32)
+    confs[0, 0, 3] = 0.7
+    rows = rows_from_outputs([boxes, confs], 1)
+    assert rows.shape == (1, 1, 5 + NUM_CLASSES)
+    np.testing.assert_allclose(rows[0, 0, :5], [0.5, 0.375, 0.5, 0.25, 1.0])
+    assert rows[0, 0, 5 + 3] == pytest.approx(0.7)
@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import app
+from src import routes
+
+def test_async_upload_job(tmp_path, monkeypatch):
+    """?async=1 returns a job id; status and SSE events report progress and the result."""
+    def fake_detect(paths, max_workers=None, progress=None):
+        for idx in range(len(paths)):
+            progress(idx, 10, 5.0)
+        return [3] * len(paths), [None] * len(paths)
+
+    monkeypatch.setattr(routes, 'get_cache', lambda: None)
+    monkeypatch.setattr(routes, 'detect_cars_parallel', fake_detect)
+    monkeypatch.setattr(routes, 'run_cpp_optimizer',
+                        lambda cars, **kw: {'north': 30, 'south': 30, 'west': 30, 'east': 30, 'delay': 12.5})
+    monkeypatch.setattr(routes, 'log_result', lambda *a, **k: True)
+    monkeypatch.setattr(routes, 'log_analytics', lambda *a, **k: True)
+    app.config['TESTING'] = True
+    monkeypatch.setitem(app.config, 'UPLOADS_DIR', str(tmp_path))
+
+    data = {'videos': [(io.BytesIO(f"clip {i}".encode()), f'{i}.mp4') for i in range(4)]}
+    with app.test_client() as client:
+        response = client.post('/upload?async=1', data=data, content_type='multipart/form-data')
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job_id']
+
+        events = client.get(f'/jobs/{job_id}/events').get_data(as_text=True)
+        assert 'event: progress' in events
+        assert events.count('event: lane_done') == 4
+        assert 'event: end' in events
+
+        status = json.loads(client.get(f'/jobs/{job_id}').data)
+        assert status['status'] == 'done'
+        assert [lane['frames'] for lane in status['lanes']] == [10, 10, 10, 10]
+        assert [lane['cars'] for lane in status['lanes']] == [3, 3, 3, 3]
+        assert status['result']['result']['delay'] == 12.5
+        assert 'rl_recommendation' in status['result']
+    assert not os.path.exists(os.path.join(str(tmp_path), 'jobs', job_id))
+
+def test_failed_save_removes_job_directory(tmp_path, monkeypatch):
+    """A save that fails partway through an async upload leaves no per-job directory behind."""
+    saved = []
+    def flaky_save(file, path):
+        if saved:
+            raise OSError("disk full")
+        saved.append(path)
+        with open(path, 'wb') as out:
+            out.write(file.stream.read())
+        return "digest"
+
+    monkeypatch.setattr(routes, 'save_and_hash', flaky_save)
+    app.config['TESTING'] = True
+    monkeypatch.setitem(app.config, 'UPLOADS_DIR', str(tmp_path))
+    data = {'videos': [(io.BytesIO(f"clip {i}".encode()), f'{i}.mp4') for i in range(4)]}
+    with app.test_client() as client:
+        response = client.post('/upload?async=1', data=data, content_type='multipart/form-data')
+    assert response.status_code == 500
+    assert len(saved) == 1
+    assert os.listdir(os.path.join(str(tmp_path), 'jobs')) == []
+
+def test_unknown_job():
+    with app.test_client() as client:
+        assert client.get('/jobs/nope').status_code == 404
+        assert client.get('/jobs/nope/events').status_code == 404
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import metrics
+from src.metrics import Counter, Histogram, Registry
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.register(Histogram('t_seconds', 'Test', ['kind'], buckets=(0.1, 1)))
+    for value in (0.05, 0.5, 0.7, 3):
+        hist.observe(value, kind='a')
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{kind="a",le="1"} 3' in text
+    assert 't_seconds_bucket{kind="a",le="+Inf"} 4' in text
+    assert 't_seconds_count{kind="a"} 4' in text
+    assert hist.snapshot(kind='a')['sum'] == pytest.approx(4.25)
+
+def test_counter_and_label_checks():
+    registry = Registry()
+    counter = registry.register(Counter('t_events', 'Test', ['reason']))
+    counter.inc(reason='x')
+    counter.inc(2, reason='say "hi"')
+    text = registry.render()
+    assert '# TYPE t_events counter' in text
+    assert 't_events_total{reason="x"} 1' in text
+    assert 't_events_total{reason="say \\"hi\\""} 2' in text
+    with pytest.raises(ValueError):
+        counter.inc(other='x')
+
+def test_histogram_time_observes_on_error():
+    hist = Histogram('t_timed', 'Test')
+    with pytest.raises(RuntimeError):
+        with hist.time():
+            raise RuntimeError
+    assert hist.snapshot()['count'] == 1
+
+def test_metrics_endpoint_and_rate_limit_counter():
+    from app import app
+    from src.limiter import RATE_LIMIT_REQUESTS, request_counts
+    app.config['TESTING'] = True
+    before = metrics.RATE_LIMITED.value(endpoint='api.upload_files')
+    request_counts.clear()
+    try:
+        with app.test_client() as client:
+            statuses = [client.post('/upload').status_code for _ in range(RATE_LIMIT_REQUESTS + 1)]
+            response = client.get('/metrics')
+    finally:
+        request_counts.clear()
+    assert statuses[-1] == 429
+    assert metrics.RATE_LIMITED.value(endpoint='api.upload_files') == before + 1
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'traffic_rate_limited_total{endpoint="api.upload_files"}' in text
+    assert '# TYPE traffic_detection_lane_seconds histogram' in text
+
+def test_pool_reports_worker_metrics_to_parent():
+    """Job timings measured in the worker process land in this process's histograms."""
+    from detector_pool import DetectionPool
+    jobs_before = metrics.DETECTION_JOB_SECONDS.snapshot(kind='video')['count']
+    retired_before = metrics.WORKER_RESTARTS.value(reason='retired')
+    pool = DetectionPool(1, max_jobs_per_worker=1)
+    try:
+        job = pool.submit('missing_0.mp4')
+        assert job.wait(60)
+        assert job.finished_at is not None
+        deadline = time.time() + 30
+        while not pool.stats()['restarts'] and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        pool.shutdown()
+    assert metrics.DETECTION_JOB_SECONDS.snapshot(kind='video')['count'] == jobs_before + 1
+    assert metrics.WORKER_RESTARTS.value(reason='retired') == retired_before + 1
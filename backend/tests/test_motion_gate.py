@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motion_gate import MotionGate, merge_motion_stats
+
+def frame(value):
+    return np.full((120, 160, 3), value, np.uint8)
+
+def test_static_frames_reuse_count():
+    """Unchanged frames skip the detector until max_reuse forces a refresh."""
+    gate = MotionGate(threshold=4.0, max_reuse=3)
+    decisions = []
+    for _ in range(6):
+        infer = gate.should_infer(frame(50))
+        decisions.append(infer)
+        if infer:
+            gate.record(7)
+    assert decisions == [True, False, False, False, True, False]
+    assert gate.last_count == 7
+    assert gate.stats()['skip_ratio'] == round(4 / 6, 3)
+
+def test_motion_triggers_inference():
+    gate = MotionGate(threshold=4.0, max_reuse=100)
+    assert gate.should_infer(frame(50))
+    assert not gate.should_infer(frame(52))
+    assert gate.should_infer(frame(80))
+
+def test_slow_drift_is_measured_against_last_inferred_frame():
+    """Small per-frame changes accumulate against the reference frame."""
+    gate = MotionGate(threshold=4.0, max_reuse=100)
+    gate.should_infer(frame(50))
+    decisions = [gate.should_infer(frame(50 + 2 * i)) for i in range(1, 4)]
+    assert decisions == [False, False, True]
+
+def test_audit_and_merge():
+    gate = MotionGate(threshold=4.0, max_reuse=100)
+    gate.should_infer(frame(50))
+    gate.record(3)
+    gate.should_infer(frame(50))
+    gate.audit(5)
+    stats = gate.stats()
+    assert stats['audited'] == 1 and stats['max_abs_error'] == 2 and stats['full_max'] == 5
+
+    merged = merge_motion_stats([stats, MotionGate().stats()])
+    assert merged['frames'] == 2 and merged['skipped'] == 1
+    assert merged['skip_ratio'] == 0.5 and merged['full_max'] == 5
@@ -0,0 +1,139 @@
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import optimizer
+from src.plan_history import PlanHistory
+
+
+def test_parser_reports_solve_time():
+    events, leftover = optimizer.parse_log_lines_to_events(
+        ["Final greens: N=10 S=40 W=48 E=50", "solver=exact solve_us=129", "other"])
+    assert events == [{"type": "end", "final_greens": [10, 40, 48, 50]},
+                      {"type": "timing", "solver": "exact", "solve_us": 129}]
+    assert leftover == ["other"]
+
+def test_unknown_solver_is_rejected():
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="annealing")["error"] == "unknown optimizer solver"
+
+def test_exact_solver_is_optimal_and_deterministic(binary, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    for cars in ([5, 10, 15, 20], [0, 0, 0, 0], [8, 12, 0, 0], [25, 3, 40, 1]):
+        exact = optimizer.run_cpp_optimizer(cars, solver="exact", backend="subprocess")
+        assert "error" not in exact
+        greens = [exact[k] for k in ("north", "south", "west", "east")]
+        assert all(10 <= g <= 60 for g in greens) and sum(greens) <= 148
+        assert optimizer.run_cpp_optimizer(cars, solver="exact", verbose=False,
+                                           backend="subprocess")["delay"] == exact["delay"]
+        # Every GA answer is a feasible allocation, so it can never beat the optimum
+        for _ in range(3):
+            ga = optimizer.run_cpp_optimizer(cars, solver="ga", verbose=False, backend="subprocess")
+            assert ga["delay"] >= exact["delay"] - 1e-3
+
+def test_library_matches_subprocess(binary, in_process, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    for cars in ([5, 10, 15, 20], [8, 12, 0, 0], [-3, 40, 2, 7]):
+        lib = optimizer.run_cpp_optimizer(cars, solver="exact", backend="library")
+        proc = optimizer.run_cpp_optimizer(cars, solver="exact", backend="subprocess")
+        assert lib["_backend"] == "library" and proc["_backend"] == "subprocess"
+        assert [lib[k] for k in optimizer.LANES] == [proc[k] for k in optimizer.LANES]
+        assert lib["delay"] == pytest.approx(proc["delay"], rel=1e-5)
+
+def test_library_returns_ga_trace(in_process):
+    result = optimizer.run_cpp_optimizer([5, 10, 15, 20], solver="ga")
+    assert result["_backend"] == "library"
+    events = result["_logs_events"]
+    assert [e["type"] for e in events[:3]] == ["invocation", "start", "starting_best"]
+    delays = [e["best_delay"] for e in events if e["type"] in ("starting_best", "iter")]
+    assert delays == sorted(delays, reverse=True) and delays[-1] == result["delay"]
+    assert events[-1] == {"type": "end", "final_greens": [result[k] for k in optimizer.LANES]}
+    assert any(e["type"] == "timing" and e["solver"] == "ga" for e in events)
+
+def test_missing_library_falls_back(monkeypatch):
+    monkeypatch.setattr(optimizer, 'OPTIMIZER_LIB', '/nonexistent/libalgo.so')
+    monkeypatch.setattr(optimizer, '_lib', None)
+    monkeypatch.setattr(optimizer, '_lib_error', None)
+    assert optimizer.load_library() is None
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], backend="library")["error"] == "optimizer library not available"
+    monkeypatch.setattr(optimizer, 'GA_BINARY', '/nonexistent/Algo1')
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4])["error"] == "C++ binary not found"
+
+def test_deadline_returns_best_so_far(binary, in_process, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    for backend in ("library", "subprocess"):
+        full = optimizer.run_cpp_optimizer([5, 10, 15, 20], verbose=False, backend=backend)
+        assert full["iterations"] > 0 and not full["deadline_hit"]
+        rushed = optimizer.run_cpp_optimizer([5, 10, 15, 20], verbose=False, backend=backend, deadline_ms=0.001)
+        assert rushed["deadline_hit"] and rushed["iterations"] == 0 and not rushed["converged"]
+        greens = [rushed[k] for k in optimizer.LANES]
+        assert all(10 <= g <= 60 for g in greens) and sum(greens) <= 148
+        assert rushed["delay"] > 0
+
+def test_warm_start_seeds_the_ga(binary, in_process, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    monkeypatch.setattr(optimizer, 'get_plan_history', lambda: PlanHistory(size=2))
+    plan = [10, 40, 48, 50]     # Exact optimum for these counts
+    for backend in ("library", "subprocess"):
+        warm = optimizer.run_cpp_optimizer([5, 10, 15, 20], verbose=False, backend=backend, warm_start=[plan])
+        assert warm["seeded"] == 1
+        # Nothing beats the seed, so the GA stops after the early-stop patience window
+        assert [warm[k] for k in optimizer.LANES] == plan and warm["iterations"] == 5
+    assert optimizer.run_cpp_optimizer([5, 10, 15, 20], warm_start=[[1, 2, 3]])["error"] == "invalid warm start"
+    exact = optimizer.run_cpp_optimizer([5, 10, 15, 20], solver="exact", backend="library", warm_start=[plan])
+    assert exact["seeded"] == 0
+
+def test_intersection_reuses_previous_plans(in_process, monkeypatch):
+    history = PlanHistory(size=2)
+    monkeypatch.setattr(optimizer, 'get_plan_history', lambda: history)
+    first = optimizer.run_cpp_optimizer([5, 10, 15, 20], verbose=False, intersection="main-st")
+    assert first["seeded"] == 0
+    assert history.seeds("main-st") == [[first[k] for k in optimizer.LANES]]
+    second = optimizer.run_cpp_optimizer([6, 10, 14, 20], verbose=False, intersection="main-st")
+    assert second["seeded"] == 1 and second["delay"] > 0
+
+def test_seed_reproduces_across_threads_and_backends(binary, in_process, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    monkeypatch.setattr(optimizer, 'OPTIMIZER_ISLANDS', 4)
+    runs = []
+    for threads in ("1", "3"):
+        monkeypatch.setenv("OMP_NUM_THREADS", threads)
+        runs.append(optimizer.run_cpp_optimizer([12, 3, 25, 8], verbose=False, backend="subprocess", seed=42))
+    lib = optimizer.run_cpp_optimizer([12, 3, 25, 8], verbose=False, backend="library", seed=42)
+    keys = optimizer.LANES + ("delay", "iterations", "seed")
+    assert [runs[0][k] for k in keys] == [runs[1][k] for k in keys]
+    assert [lib[k] for k in optimizer.LANES] == [runs[0][k] for k in optimizer.LANES]
+    assert lib["iterations"] == runs[0]["iterations"] and lib["seed"] == 42
+    fresh = optimizer.run_cpp_optimizer([12, 3, 25, 8], verbose=False, backend="library")
+    assert fresh["seed"] != 42
+    again = optimizer.run_cpp_optimizer([12, 3, 25, 8], verbose=False, backend="library", seed=fresh["seed"])
+    assert again["delay"] == fresh["delay"]
+
+def test_out_of_range_seeds_are_rejected(binary):
+    import json
+    import subprocess
+    for args in ([binary, "1", "2", "3", "4", "--seed=-1"], [binary, "--batch", "--seed=9007199254740992"]):
+        out = subprocess.run(args, input="[1, 2, 3, 4]\n", capture_output=True, text=True)
+        assert out.returncode == 1
+        assert json.loads(out.stdout)["error"] == "seed must be an integer in [0, 2^53)"
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], seed=-1)["error"] == "invalid seed"
+
+def test_seed_zero_is_reproducible(binary, in_process, monkeypatch):
+    """0 is an ordinary seed, not a request for a fresh one."""
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    for backend in ("subprocess", "library"):
+        runs = [optimizer.run_cpp_optimizer([5, 3, 8, 2], verbose=False, backend=backend, seed=0) for _ in range(2)]
+        assert runs[0]["seed"] == runs[1]["seed"] == 0
+        assert [runs[0][k] for k in optimizer.LANES + ("delay", "iterations")] == \
+               [runs[1][k] for k in optimizer.LANES + ("delay", "iterations")]
+
+def test_concurrent_in_process_solves_are_independent(in_process):
+    from concurrent.futures import ThreadPoolExecutor
+    cars = [[i, 20 - i, 3, 7] for i in range(8)]
+    solo = [optimizer.run_cpp_optimizer(c, verbose=False, backend="library", seed=7)["delay"] for c in cars]
+    with ThreadPoolExecutor(4) as ex:
+        parallel = list(ex.map(lambda c: optimizer.run_cpp_optimizer(c, verbose=False, backend="library",
+                                                                     seed=7)["delay"], cars))
+    assert parallel == solo
@@ -0,0 +1,152 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import optimizer
+from src.metrics import OPTIMIZER_RESTARTS
+from src.optimizer_server import OptimizerServerError, OptimizerServerPool
+
+
+@pytest.fixture
+def pool(binary):
+    pool = OptimizerServerPool(2, binary=binary, health_interval=0)
+    yield pool
+    pool.shutdown()
+
+def test_server_matches_cli(pool, binary, monkeypatch):
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    response = pool.solve([5, 10, 15, 20], solver="exact", timeout=10)
+    cli = optimizer.run_cpp_optimizer([5, 10, 15, 20], solver="exact", backend="subprocess")
+    assert [response[k] for k in optimizer.LANES] == [cli[k] for k in optimizer.LANES]
+    assert response["delay"] == pytest.approx(cli["delay"], rel=1e-5)
+
+def test_server_returns_trace_and_accepts_ga_params(pool):
+    response = pool.solve([5, 10, 15, 20], params={"pop_size": 50, "max_iter": 4}, trace=True, timeout=10)
+    assert response["config"][:2] == [50, 4]
+    delays = [t["delay"] for t in response["trace"]]
+    assert 2 <= len(delays) <= 5
+    assert delays == sorted(delays, reverse=True) and delays[-1] == response["delay"]
+    assert "error" in pool.solve([1, 2, 3, 4], params={"green_min": 50}, timeout=10)
+
+def test_server_honours_deadline(pool):
+    rushed = pool.solve([5, 10, 15, 20], params={"pop_size": 200000, "max_iter": 1000, "deadline_ms": 5}, timeout=10)
+    assert rushed["deadline_hit"] and not rushed["converged"]
+    assert rushed["iterations"] < 1000 and rushed["delay"] > 0
+    exact = pool.solve([5, 10, 15, 20], solver="exact", params={"deadline_ms": 0.001}, timeout=10)
+    assert exact["converged"] and not exact["deadline_hit"]
+
+def test_server_accepts_warm_start_seeds(pool):
+    seeded = pool.solve([5, 10, 15, 20], params={"seeds": [10, 40, 48, 50, 99, 0, 0, 0]}, timeout=10)
+    assert seeded["seeded"] == 2
+    assert [seeded[k] for k in optimizer.LANES] == [10, 40, 48, 50]
+    assert "error" in pool.solve([5, 10, 15, 20], params={"seeds": [10, 40, 48]}, timeout=10)
+
+def test_server_runs_are_reproducible_by_seed(pool):
+    params = {"seed": 1234, "islands": 3, "migration_interval": 2}
+    first = pool.solve([12, 3, 25, 8], params=params, trace=True, timeout=10)
+    second = pool.solve([12, 3, 25, 8], params=params, trace=True, timeout=10)
+    assert first["seed"] == 1234 and first["trace"] == second["trace"]
+    assert "error" in pool.solve([12, 3, 25, 8], params={"islands": 0}, timeout=10)
+
+def test_server_rejects_seeds_outside_json_range(pool):
+    for seed in (-1, 1.5, 2 ** 53):
+        response = pool.solve([12, 3, 25, 8], params={"seed": seed}, timeout=10)
+        assert response["error"] == "seed must be an integer in [0, 2^53)"
+    assert pool.solve([12, 3, 25, 8], params={"seed": 2 ** 53 - 1, "max_iter": 2}, timeout=10)["seed"] == 2 ** 53 - 1
+    zero = [pool.solve([5, 3, 8, 2], params={"seed": 0}, trace=True, timeout=10) for _ in range(2)]
+    assert zero[0]["seed"] == zero[1]["seed"] == 0 and zero[0]["trace"] == zero[1]["trace"]
+
+def test_pipelined_requests_are_matched(pool):
+    cars = [[i, 20 - i, i % 7, 3] for i in range(20)]
+    pending = [pool.submit({"cars": c, "solver": "exact"})[1] for c in cars]
+    responses = [p.wait(10) for p in pending]
+    assert all(r is not None and "error" not in r for r in responses)
+    for c, r in zip(cars, responses):
+        expected = pool.solve(c, solver="exact", timeout=10)
+        assert r["delay"] == expected["delay"]
+
+def test_crashed_server_is_restarted(pool):
+    before = OPTIMIZER_RESTARTS.value(reason='crashed')
+    server, slot = pool.submit({"op": "ping"})
+    assert slot.wait(10)["ok"]
+    server.proc.kill()
+    server.proc.wait()
+    for _ in range(pool.size):
+        assert "error" not in pool.solve([1, 2, 3, 4], timeout=10)
+    assert pool.restarts == 1
+    assert OPTIMIZER_RESTARTS.value(reason='crashed') == before + 1
+
+def test_timeout_replaces_server(binary):
+    pool = OptimizerServerPool(1, binary=binary, health_interval=0)
+    try:
+        response = pool.solve([1, 2, 3, 4], params={"pop_size": 200000, "max_iter": 1000}, timeout=0.05)
+        assert response == {"error": "C++ optimizer timed out"}
+        assert pool.restarts == 1
+        assert "error" not in pool.solve([1, 2, 3, 4], solver="exact", timeout=10)
+    finally:
+        pool.shutdown()
+
+def test_unusable_binary_falls_back_to_subprocess(binary, monkeypatch):
+    broken = OptimizerServerPool(1, binary=shutil.which('true') or '/bin/true', health_interval=0)
+    with pytest.raises(OptimizerServerError):
+        broken.solve([1, 2, 3, 4], timeout=5)
+    monkeypatch.setattr('src.optimizer_server.get_server_pool', lambda: broken)
+    monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], backend="server")["error"] == "optimizer server not available"
+    monkeypatch.setattr(optimizer, 'OPTIMIZER_LIB', '/nonexistent/libalgo.so')
+    monkeypatch.setattr(optimizer, '_lib', None)
+    monkeypatch.setattr(optimizer, '_lib_error', None)
+    monkeypatch.setattr(optimizer, 'get_timing_table', lambda: None)
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="exact")["_backend"] == "subprocess"
+
+def test_crash_mid_request_fails_the_request_and_restarts(binary):
+    pool = OptimizerServerPool(1, binary=binary, health_interval=0)
+    try:
+        server, slot = pool.submit({"cars": [5, 10, 15, 20], "pop_size": 200000, "max_iter": 1000})
+        server.proc.kill()
+        assert slot.wait(10)["_server_failed"]
+        # The next request lands on a replacement process
+        assert "error" not in pool.solve([5, 10, 15, 20], solver="exact", timeout=10)
+        assert pool.restarts == 1
+    finally:
+        pool.shutdown()
+
+def test_server_dying_on_every_solve_falls_back_to_subprocess(binary, tmp_path, monkeypatch):
+    """Answers pings, exits on any solve: retried once, then run_cpp_optimizer falls back."""
+    script = tmp_path / 'dying_server'
+    script.write_text("#!/usr/bin/env python3\n"
+                      "import json, sys\n"
+                      "for line in sys.stdin:\n"
+                      "    req = json.loads(line)\n"
+                      "    if req.get('op') != 'ping':\n"
+                      "        sys.exit(1)\n"
+                      "    print(json.dumps({'id': req['id'], 'ok': True}), flush=True)\n")
+    script.chmod(0o755)
+    dying = OptimizerServerPool(1, binary=str(script), health_interval=0)
+    try:
+        with pytest.raises(OptimizerServerError):
+            dying.solve([1, 2, 3, 4], timeout=10)
+        assert dying.restarts == 1
+        monkeypatch.setattr('src.optimizer_server.get_server_pool', lambda: dying)
+        monkeypatch.setattr(optimizer, 'GA_BINARY', binary)
+        monkeypatch.setattr(optimizer, 'OPTIMIZER_LIB', '/nonexistent/libalgo.so')
+        monkeypatch.setattr(optimizer, '_lib', None)
+        monkeypatch.setattr(optimizer, '_lib_error', None)
+        monkeypatch.setattr(optimizer, 'get_timing_table', lambda: None)
+        result = optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="exact")
+        assert "error" not in result and result["_backend"] == "subprocess"
+    finally:
+        dying.shutdown()
+
+def test_starting_slot_does_not_block_other_slots(pool):
+    """While one slot's process is (re)starting, requests go to the others without waiting on it."""
+    assert "error" not in pool.solve([1, 2, 3, 4], solver="exact", timeout=10)
+    busy = next(i for i in range(pool.size) if pool._servers[i] is None)
+    with pool._slot_locks[busy]:
+        pool._starting.add(busy)
+        assert "error" not in pool.solve([1, 2, 3, 4], solver="exact", timeout=10)
+        pool._starting.discard(busy)
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.plan_history import PlanHistory
+
+
+def test_keeps_newest_plans_per_intersection():
+    history = PlanHistory(size=2)
+    history.record("a", [10, 40, 48, 50])
+    history.record("a", [11, 40, 47, 50])
+    history.record("a", [10, 40, 48, 50])
+    history.record("a", [12, 39, 47, 50])
+    history.record("b", [20, 20, 20, 20])
+    assert history.seeds("a") == [[12, 39, 47, 50], [10, 40, 48, 50]]
+    assert history.seeds("b") == [[20, 20, 20, 20]]
+    assert history.seeds("c") == []
+
+def test_drops_least_recently_used_intersection():
+    history = PlanHistory(size=1, max_intersections=2)
+    history.record("a", [10, 10, 10, 10])
+    history.record("b", [20, 20, 20, 20])
+    history.record("a", [11, 11, 11, 11])
+    history.record("c", [30, 30, 30, 30])
+    assert len(history) == 2 and history.seeds("b") == []
+
+def test_size_zero_disables_history():
+    history = PlanHistory(size=0)
+    history.record("a", [10, 40, 48, 50])
+    assert history.seeds("a") == []
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_source import FrameSource
+from preprocess import PAD_VALUE, BlobBuffer, FramePreprocessor
+
+def test_stretch_matches_resize_and_reuses_buffer():
+    frame = np.random.default_rng(0).integers(0, 255, (120, 200, 3), dtype=np.uint8)
+    pre = FramePreprocessor(200, 120, 64, roi_coords=(0, 20, 200, 120))
+    out = pre.prepare(frame)
+    np.testing.assert_array_equal(out, cv.resize(frame[20:120, 0:200], (64, 64)))
+    assert pre.prepare(frame) is out
+
+@pytest.mark.parametrize('shape', [(100, 200), (200, 100)])
+def test_letterbox_pads_and_maps_boxes_back(shape):
+    """Wide and tall sources: aspect ratio kept, padding on the short side, boxes map back to source pixels."""
+    h, w = shape
+    frame = np.full((h, w, 3), 10, np.uint8)
+    pre = FramePreprocessor(w, h, 64, letterbox=True)
+    out = pre.prepare(frame)
+    assert (pre.new_w, pre.new_h) == ((64, 32) if w > h else (32, 64))
+    assert out[0, 0].tolist() == [PAD_VALUE] * 3
+    assert out[32, 32].tolist() == [10] * 3
+    # A box covering the whole letterboxed content is the whole source frame
+    box = [pre.pad_x, pre.pad_y, pre.new_w, pre.new_h]
+    assert pre.to_frame([box]).tolist() == [[0, 0, w, h]]
+
+def test_blob_buffer_matches_blob_from_images():
+    rng = np.random.default_rng(1)
+    frames = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8), rng.integers(0, 255, (50, 90, 3), dtype=np.uint8)]
+    blob = BlobBuffer(64)
+    out = blob.fill(frames)
+    expected = cv.dnn.blobFromImages(frames, 1/255, (64, 64), swapRB=True, crop=False)
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+    assert blob.fill(frames[:1]).base is out.base
+
+def test_frame_source_buffers(tmp_path):
+    video = str(tmp_path / 'clip.avi')
+    writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*'MJPG'), 25, (160, 80))
+    for i in range(6):
+        writer.write(np.full((80, 160, 3), i * 40, np.uint8))
+    writer.release()
+
+    with FrameSource(video, size=32) as source:
+        fresh = [frame for _, frame in source]
+    with FrameSource(video, size=32, buffers=2) as source:
+        reused = [frame for _, frame in source]
+    assert len({id(f) for f in fresh}) == 6
+    assert len({id(f) for f in reused}) == 2
+
+    with FrameSource(video, size=32, letterbox=True) as source:
+        _, frame = next(iter(source))
+    assert frame[0, 0].tolist() == [PAD_VALUE] * 3
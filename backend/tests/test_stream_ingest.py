@@ -0,0 +1,65 @@
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import stream_ingest
+import yolov4
+
+CLASS_NAMES = ['person', 'bicycle', 'car', 'motorbike']
+
+class RectangleModel:
+    """Reports every bright rectangle in the frame as a confident car, in that frame's pixels."""
+    def detect(self, frame, conf, nms):
+        grey = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+        contours, _ = cv.findContours((grey > 128).astype(np.uint8), cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        boxes = np.array([cv.boundingRect(c) for c in contours], np.int32).reshape(-1, 4)
+        return np.full(len(boxes), 2, np.int32), np.full(len(boxes), 0.9, np.float32), boxes
+
+def test_live_frame_counts_like_upload(tmp_path):
+    """A live frame is ROI-cropped and resized like video frames: same count, sky ignored."""
+    frame = np.zeros((240, 320, 3), np.uint8)
+    frame[5:25, 100:150] = 255       # In the sky band (top 15%): outside the ROI
+    frame[80:120, 20:80] = 255       # Large car
+    frame[150:164, 120:140] = 255    # Small cars: under MIN_BOX_AREA at full resolution,
+    frame[190:204, 220:240] = 255    # above it at INPUT_SIZE
+    video = str(tmp_path / 'lane.avi')
+    writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*'MJPG'), 25, (320, 240))
+    for _ in range(4):
+        writer.write(frame)
+    writer.release()
+
+    model = RectangleModel()
+    stats, error = yolov4._scan_video(model, CLASS_NAMES, video, 0)
+    assert error is None
+
+    cap = cv.VideoCapture(video)
+    ret, decoded = cap.read()
+    cap.release()
+    assert ret
+    assert stream_ingest._count_frame(model, CLASS_NAMES, decoded, source='cam') == stats['max'] == 3
+
+def test_letterbox_keeps_counts(tmp_path, monkeypatch):
+    """Letterboxed frames shrink boxes; the area filter compensates, so counts match stretching."""
+    frame = np.zeros((240, 640, 3), np.uint8)
+    frame[80:120, 20:100] = 255      # Large car
+    frame[150:164, 200:240] = 255    # Counted either way (~740 px stretched, ~240 px letterboxed)
+    frame[200:210, 400:420] = 255    # Too small either way
+    video = str(tmp_path / 'wide.avi')
+    writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*'MJPG'), 25, (640, 240))
+    for _ in range(4):
+        writer.write(frame)
+    writer.release()
+
+    model = RectangleModel()
+    counts = []
+    for letterbox in (False, True):
+        monkeypatch.setattr(yolov4, 'LETTERBOX', letterbox)
+        stream_ingest._camera_preprocessors.clear()
+        stats, error = yolov4._scan_video(model, CLASS_NAMES, video, 0)
+        assert error is None
+        counts.append((stats['max'], stream_ingest._count_frame(model, CLASS_NAMES, frame, source='cam')))
+    assert counts == [(2, 2), (2, 2)]
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import optimizer
+from src.optimizer_server import OptimizerServerPool
+from src.timing_table import LANES, TimingTable, TimingTableError
+
+CAP = 6
+
+
+@pytest.fixture(scope='module')
+def table(binary, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('table') / 'timing_table.bin')
+    subprocess.run([binary, '--build-table', path, '--cap', str(CAP)], check=True, capture_output=True)
+    table = TimingTable(path)
+    yield table
+    table.close()
+
+def test_table_matches_live_exact_solver(table, binary):
+    """Every entry is the exact optimum, including tuples filled in by permutation."""
+    pool = OptimizerServerPool(1, binary=binary, health_interval=0)
+    try:
+        tuples = [(n, s, w, e) for n in range(CAP + 1) for s in range(CAP + 1)
+                  for w in range(CAP + 1) for e in range(CAP + 1)]
+        pending = [pool.submit({"cars": list(t), "solver": "exact"})[1] for t in tuples]
+        for cars, slot in zip(tuples, pending):
+            live, hit = slot.wait(30), table.lookup(cars)
+            assert hit["delay"] == pytest.approx(live["delay"], rel=1e-6)
+            greens = [hit[k] for k in LANES]
+            assert all(table.green_min <= g <= table.green_max for g in greens)
+            assert sum(greens) <= table.cycle_time
+    finally:
+        pool.shutdown()
+
+def test_out_of_range_counts_miss(table):
+    assert table.lookup([CAP + 1, 0, 0, 0]) is None
+    assert table.lookup([-1, 0, 0, 0]) is None
+    assert table.lookup([1, 2, 3]) is None
+
+def test_rejects_foreign_files(tmp_path):
+    bad = tmp_path / 'bad.bin'
+    bad.write_bytes(b'not a table at all, just some bytes')
+    with pytest.raises(TimingTableError):
+        TimingTable(str(bad))
+
+def test_optimizer_answers_exact_from_table(table, monkeypatch):
+    monkeypatch.setattr(optimizer, 'get_timing_table', lambda: table)
+    hit = optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="exact")
+    assert hit["_backend"] == "table"
+    assert hit["seed"] == 0 and hit["seeded"] == 0 and hit["iterations"] == 0
+    assert hit["_logs_events"][-1] == {"type": "end", "final_greens": [hit[k] for k in LANES]}
+    assert optimizer.run_cpp_optimizer([1, 2, 3, CAP + 1], solver="exact")["_backend"] != "table"
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="ga")["_backend"] != "table"
+    assert optimizer.run_cpp_optimizer([1, 2, 3, 4], solver="exact", backend="subprocess")["_backend"] == "subprocess"
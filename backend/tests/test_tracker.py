@@ -0,0 +1,81 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracker import Tracker, describe, greedy_match, iou_matrix, merge_tracker_stats
+
+def car(x, y=100):
+    return ((x, y, 40, 20), 'car', 0.9)
+
+def test_iou_and_greedy_match():
+    iou = iou_matrix([(0, 0, 10, 10), (20, 0, 10, 10)], [(20, 0, 10, 10), (5, 0, 10, 10)])
+    np.testing.assert_allclose(iou, [[0.0, 50 / 150], [1.0, 0.0]])
+    assert sorted(greedy_match(iou, 0.3)) == [(0, 1), (1, 0)]
+    assert greedy_match(iou, 0.5) == [(1, 0)]
+
+def test_boxes_propagate_between_detections():
+    """A car moving 5 px/frame keeps its ID; predicted boxes follow it between detector runs."""
+    tracker = Tracker(max_age=2, min_hits=2, iou_threshold=0.3, frame_size=(416, 416))
+    ids = set()
+    for frame in range(30):
+        x = 10 + 5 * frame
+        visible = tracker.step([car(x)] if frame % 3 == 0 else None)
+        assert len(visible) == 1   # Tentative after the first detection, confirmed at the second
+        if not visible:
+            continue
+        ids.add(visible[0].id)
+        if frame > 12:
+            assert abs(visible[0].box[0] - x) < 3
+    assert ids == {1}
+    assert tracker.stats() == {'frames': 30, 'detected': 10, 'unique': 1}
+
+def test_unique_count_over_passing_vehicles():
+    """Two cars one after the other: peak concurrent 1, unique 2; a one-off false positive is not counted."""
+    tracker = Tracker(max_age=1, min_hits=2, frame_size=(416, 416))
+    peak = 0
+    for frame in range(20):
+        detections = [car(50)] if frame < 8 else [car(300)]
+        if frame == 4:
+            detections.append(car(200, 300))
+        peak = max(peak, len(tracker.step(detections)))
+    assert peak == 1
+    assert tracker.unique_count == 2
+
+def test_first_detection_round_counts_tentative_tracks(tmp_path, monkeypatch):
+    """A clip too short to confirm tracks reports the detector's count, not 0."""
+    tracker = Tracker(max_age=2, min_hits=2)
+    assert len(tracker.step([car(50), car(200)])) == 2
+    assert len(tracker.step(None)) == 2
+    assert tracker.unique_count == 0
+
+    import cv2 as cv
+    import yolov4
+    from tests.test_stream_ingest import CLASS_NAMES, RectangleModel
+    frame = np.zeros((240, 320, 3), np.uint8)
+    frame[80:120, 20:80] = 255
+    frame[150:200, 200:280] = 255
+    video = str(tmp_path / 'short.avi')
+    writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*'MJPG'), 25, (320, 240))
+    for _ in range(2):
+        writer.write(frame)
+    writer.release()
+    monkeypatch.setattr(yolov4, 'TRACKING', True)
+    stats, error = yolov4._scan_video(RectangleModel(), CLASS_NAMES, video, 0)
+    assert error is None and stats['frames'] == 1 and stats['max'] == 2
+
+def test_tracks_expire_after_max_age():
+    tracker = Tracker(max_age=1, min_hits=1)
+    assert len(tracker.step([car(50)])) == 1
+    assert tracker.step([]) == []
+    assert len(tracker.tracks) == 1
+    tracker.step([])
+    assert tracker.tracks == []
+
+def test_merge_tracker_stats():
+    merged = merge_tracker_stats([{'frames': 10, 'detected': 4, 'unique': 3},
+                                  {'frames': 5, 'detected': 2, 'unique': 1}])
+    assert merged == {'frames': 15, 'detected': 6, 'unique': 4, 'segments': 2}
+    assert 'at most 4 unique' in describe(merged)
@@ -0,0 +1,214 @@
+"""
+Multi-Object Tracking (SORT-style)
+Vehicles are tracked with one constant-velocity Kalman filter per box and IoU
+association, so the detector only has to run every K-th sampled frame: in between,
+boxes are propagated by the filters. Besides the concurrent count per frame the
+tracker knows how many distinct vehicles it has seen. Both only include confirmed
+tracks (matched min_hits times), so one-off false positives are never counted;
+until min_hits detector rounds have run no track can be confirmed, so the per-frame
+count uses every track and short clips still report the detector's count.
+"""
+
+import numpy as np
+
+# <!--- Constant-velocity model over [cx, cy, area, aspect, vcx, vcy, varea] (as in SORT) --->
+_F = np.eye(7)
+_F[0, 4] = _F[1, 5] = _F[2, 6] = 1.0
+_H = np.eye(4, 7)
+_Q = np.eye(7)
+_Q[4:, 4:] *= 0.01
+_Q[-1, -1] *= 0.01
+_R = np.eye(4)
+_R[2:, 2:] *= 10.0
+
+
+def _to_z(box):
+    """(x, y, w, h) -> measurement [cx, cy, area, aspect]."""
+    x, y, w, h = (float(v) for v in box)
+    return np.array([x + w / 2, y + h / 2, w * h, w / h if h else 1.0])
+
+
+def _to_box(state):
+    """State -> (x, y, w, h); area and aspect are clamped so the box stays valid."""
+    cx, cy, area, aspect = state[:4]
+    area = max(area, 1.0)
+    aspect = max(aspect, 1e-3)
+    w = np.sqrt(area * aspect)
+    h = area / w
+    return np.array([cx - w / 2, cy - h / 2, w, h])
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of two (N, 4) / (M, 4) arrays of (x, y, w, h) boxes."""
+    a = np.asarray(boxes_a, np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, np.float64).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax2[:, None], bx2[None]) - np.maximum(a[:, 0, None], b[None, :, 0]), 0, None)
+    ih = np.clip(np.minimum(ay2[:, None], by2[None]) - np.maximum(a[:, 1, None], b[None, :, 1]), 0, None)
+    inter = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(iou, threshold):
+    """Highest-IoU-first one-to-one matching; returns [(row, col)] with iou >= threshold."""
+    matches = []
+    if iou.size == 0:
+        return matches
+    used_rows, used_cols = set(), set()
+    order = np.argsort(-iou, axis=None)
+    for flat in order:
+        r, c = divmod(int(flat), iou.shape[1])
+        if iou[r, c] < threshold:
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((r, c))
+    return matches
+
+
+class Track:
+    """One vehicle: Kalman state plus bookkeeping (hits, missed detection rounds)."""
+
+    def __init__(self, track_id, box, label=None, score=0.0):
+        self.id = track_id
+        self.label = label
+        self.score = float(score)
+        self.hits = 1
+        self.misses = 0          # Consecutive detection rounds without a match
+        self.x = np.zeros(7)
+        self.x[:4] = _to_z(box)
+        self.P = np.eye(7) * 10.0
+        self.P[4:, 4:] *= 1000.0     # Unknown initial velocity
+
+    @property
+    def box(self):
+        return _to_box(self.x)
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0
+        self.x = _F @ self.x
+        self.P = _F @ self.P @ _F.T + _Q
+
+    def update(self, box, label=None, score=0.0):
+        y = _to_z(box) - _H @ self.x
+        S = _H @ self.P @ _H.T + _R
+        K = self.P @ _H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ _H) @ self.P
+        self.hits += 1
+        self.misses = 0
+        if label is not None:
+            self.label = label
+        self.score = float(score)
+
+
+class Tracker:
+    """
+    Per-stream tracker. Call step() once per sampled frame: with the frame's vehicle
+    detections on detector frames, or with None to only propagate the tracks.
+    """
+
+    def __init__(self, max_age=2, min_hits=2, iou_threshold=0.3, frame_size=None):
+        self.max_age = max_age              # Drop a track after this many unmatched detection rounds
+        self.min_hits = min_hits            # Matches before a track counts as a unique vehicle
+        self.iou_threshold = iou_threshold
+        self.frame_size = frame_size        # (width, height); tracks whose centre leaves it are dropped
+        self.tracks = []
+        self.frames = 0
+        self.detected_frames = 0
+        self._next_id = 1
+        self._confirmed = set()
+
+    def _inside(self, track):
+        if self.frame_size is None:
+            return True
+        cx, cy = track.x[:2]
+        return 0 <= cx < self.frame_size[0] and 0 <= cy < self.frame_size[1]
+
+    def step(self, detections=None):
+        """
+        Advance one frame. detections is a list of (box, label, score) with
+        box = (x, y, w, h), or None when the detector did not run on this frame.
+        Returns the tracks visible in this frame.
+        """
+        self.frames += 1
+        for track in self.tracks:
+            track.predict()
+        self.tracks = [t for t in self.tracks if self._inside(t)]
+
+        if detections is not None:
+            self.detected_frames += 1
+            self._associate(detections)
+        return self.visible()
+
+    def _associate(self, detections):
+        boxes = [d[0] for d in detections]
+        iou = iou_matrix([t.box for t in self.tracks], boxes)
+        matches = greedy_match(iou, self.iou_threshold)
+        matched_tracks = {r for r, _ in matches}
+        matched_dets = {c for _, c in matches}
+
+        for r, c in matches:
+            box, label, score = detections[c]
+            self.tracks[r].update(box, label, score)
+        for r, track in enumerate(self.tracks):
+            if r not in matched_tracks:
+                track.misses += 1
+        for c, (box, label, score) in enumerate(detections):
+            if c not in matched_dets:
+                self.tracks.append(Track(self._next_id, box, label, score))
+                self._next_id += 1
+
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_age]
+        for track in self.tracks:
+            if track.hits >= self.min_hits:
+                self._confirmed.add(track.id)
+
+    def visible(self):
+        """
+        Confirmed tracks matched at the last detection round (what is on screen now).
+        Before min_hits detection rounds, when no track can be confirmed yet, every
+        matched track is visible.
+        """
+        warming_up = self.detected_frames < self.min_hits
+        return [t for t in self.tracks if t.misses == 0 and (warming_up or t.hits >= self.min_hits)]
+
+    @property
+    def count(self):
+        return len(self.visible())
+
+    @property
+    def unique_count(self):
+        return len(self._confirmed)
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'detected': self.detected_frames,
+            'unique': self.unique_count,
+        }
+
+
+def merge_tracker_stats(parts):
+    """
+    Combine Tracker.stats() of several segments of one lane. Segments are tracked
+    independently, so a vehicle crossing a segment boundary is counted in both: the
+    summed 'unique' is an upper bound once 'segments' > 1.
+    """
+    merged = {key: sum(p[key] for p in parts) for key in ('frames', 'detected', 'unique')}
+    merged['segments'] = sum(p.get('segments', 1) for p in parts)
+    return merged
+
+
+def describe(tracking):
+    """One-line summary of detector rate and unique vehicles for logs."""
+    share = tracking['detected'] / tracking['frames'] if tracking['frames'] else 0.0
+    segments = tracking.get('segments', 1)
+    unique = (f"{tracking['unique']} unique vehicles" if segments <= 1 else
+              f"at most {tracking['unique']} unique vehicles ({segments} segments tracked separately)")
+    return f"detector on {tracking['detected']}/{tracking['frames']} frames ({share:.0%}), {unique}"
@@ -1,16 +1,27 @@
 """
 YOLOv4-tiny Car Detection Module - Memory-Safe Parallel Processing
-Features: CUDA auto-detection, multiprocessing with spawn, memory limits
+Features: CUDA auto-detection, persistent spawn-based worker pool, memory limits
 """
 
 import cv2 as cv
 import time
 import os
-import gc
 import sys
 import numpy as np
 import multiprocessing as mp
 
+from frame_source import FrameSource, roi_box
+from preprocess import FramePreprocessor
+from frame_pipeline import PipelinedSource
+from motion_gate import MotionGate, merge_motion_stats, describe as describe_motion
+from adaptive_sampling import adaptive_peak
+from detection_core import (VEHICLE_CLASSES, PER_CLASS_CONF, MIN_BOX_AREA, MIN_BOX_AREA_DEFAULT,
+                            vehicle_filter, count_vehicles, vehicle_detections)
+from tracker import Tracker, merge_tracker_stats, describe as describe_tracking
+from autotune import load_tuning, tuned_setting, parse_bool
+from inference_engine import (ENGINE as INFERENCE_ENGINE, OpenCVEngine, create_onnx_engine, onnx_model_path,
+                              decode_detections as _decode_detections, make_blob, rows_from_outputs)
+
 # <!--- Configuration --->
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CLASS_FILE = os.path.join(BASE_DIR, 'classes.txt')
@@ -21,39 +32,60 @@ FULL_WEIGHTS_FILE = os.path.join(BASE_DIR, 'yolov4.weights')
 TINY_CFG_FILE = CONFIG_FILE
 TINY_WEIGHTS_FILE = WEIGHTS_FILE
 
-# <!--- Performance tuning ---->
-cv.setNumThreads(4)
-cv.ocl.setUseOpenCL(True)
+# <!--- Performance tuning (env > autotune file > defaults; run autotune.py on each host) ---->
+TUNING = load_tuning()
+MAX_PARALLEL_WORKERS = tuned_setting(TUNING, "YOLO_WORKERS", 'workers',
+                                     min(3, max(1, mp.cpu_count() - 1)))  # Limit to prevent memory exhaustion
+DNN_THREADS = tuned_setting(TUNING, "YOLO_DNN_THREADS", 'threads',
+                            max(1, mp.cpu_count() // MAX_PARALLEL_WORKERS))  # Workers x threads <= cores
+USE_OPENCL = tuned_setting(TUNING, "YOLO_OPENCL", 'opencl', False, parse_bool)
+cv.setNumThreads(DNN_THREADS)
+cv.ocl.setUseOpenCL(USE_OPENCL)
 
 # <!--- Model configuration ---->
 MODEL_TYPE = 'tiny'          # 'full' (YOLOv4) or 'tiny' (YOLOv4-tiny) - tiny is faster
 CONF_THRESHOLD = 0.4         # Lower for catching more bikes in crowds
 NMS_THRESHOLD = 0.45         # Lower to allow overlapping bikes
-INPUT_SIZE = 416             # Input resolution - better accuracy with acceptable speed trade-off
+INPUT_SIZE = tuned_setting(TUNING, "YOLO_INPUT_SIZE", 'input_size', 416)  # Input resolution - better accuracy with acceptable speed trade-off
 SKIP_FRAMES = 3              # Process 1 frame every (SKIP_FRAMES + 1) - improved accuracy
-MAX_PARALLEL_WORKERS = min(3, max(1, mp.cpu_count() - 1))     # Limit to prevent memory exhaustion
-
-# Per-class thresholds for fine-tuned detection
-PER_CLASS_CONF = {
-    'car': 0.5,              # Strict for cars (avoid false positives)
-    'truck': 0.5,            # Strict for trucks
-    'bus': 0.5,              # Strict for buses
-    'motorbike': 0.35,       # Loose for bikes (catch all in crowds)
-    'bicycle': 0.4           # Loose for bicycles
-}
-
-# <!--- Target classes (COCO) ---->
-VEHICLE_CLASSES = {'car', 'motorbike', 'bus', 'truck', 'bicycle'}
-
-# Per-class minimum box area (motorcycles are smaller than cars)
-MIN_BOX_AREA_DEFAULT = 600
-MIN_BOX_AREA = {
-    'car': 600,
-    'truck': 800,
-    'bus': 800,
-    'motorbike': 300,      # Much smaller than cars
-    'bicycle': 250         # Smallest
-}
+FRAME_SOURCE = os.environ.get("YOLO_FRAME_SOURCE", "grab")      # 'grab', 'seek' or 'ffmpeg' (see frame_source.py)
+LETTERBOX = os.environ.get("YOLO_LETTERBOX", "0") == "1"         # Keep the ROI aspect ratio (pad) instead of stretching
+SEGMENT_MIN_FRAMES = int(os.environ.get("YOLO_SEGMENT_MIN_FRAMES", "600"))  # Never split lanes into shorter segments
+PROGRESS_EVERY = 25         # Report progress every N processed frames
+BATCHED_INFERENCE = os.environ.get("YOLO_BATCHED", "0") == "1"   # One forward pass across all lanes
+BATCH_SIZE = int(os.environ.get("YOLO_BATCH_SIZE", "4"))         # Frames per forward pass in batched mode
+PIPELINED_DECODE = os.environ.get("YOLO_PIPELINED_DECODE", "0") == "1"  # Decode in a sibling process via shared memory
+RING_DEPTH = int(os.environ.get("YOLO_RING_DEPTH", "8"))         # Frames buffered between decoder and inference
+MOTION_GATING = os.environ.get("YOLO_MOTION_GATE", "0") == "1"   # Reuse the last count while the ROI is static
+MOTION_THRESHOLD = float(os.environ.get("YOLO_MOTION_THRESHOLD", "4.0"))  # Mean grey-level change that counts as motion
+MOTION_MAX_REUSE = int(os.environ.get("YOLO_MOTION_MAX_REUSE", "10"))     # Force inference after N reused frames
+MOTION_AUDIT = os.environ.get("YOLO_MOTION_AUDIT", "0") == "1"   # Also infer skipped frames to measure count error
+ADAPTIVE_SAMPLING = os.environ.get("YOLO_ADAPTIVE", "0") == "1"  # Coarse-to-fine peak search with early stop
+ADAPTIVE_COARSE = int(os.environ.get("YOLO_ADAPTIVE_COARSE", "8"))        # Coarse pass visits every Nth sampled frame
+ADAPTIVE_PATIENCE = int(os.environ.get("YOLO_ADAPTIVE_PATIENCE", "12"))   # Stop after N inferred frames without a new peak
+ADAPTIVE_PATIENCE_SECONDS = float(os.environ.get("YOLO_ADAPTIVE_PATIENCE_SECONDS", "0"))  # ...or N seconds (0 = off)
+ADAPTIVE_MARGIN = int(os.environ.get("YOLO_ADAPTIVE_MARGIN", "1"))        # Refine around frames within N of the peak
+CASCADE = os.environ.get("YOLO_CASCADE", "0") == "1"             # Tiny screens every frame, full re-runs uncertain ones
+CASCADE_BAND = float(os.environ.get("YOLO_CASCADE_BAND", "0.1"))          # Scores this close to a class threshold are uncertain
+CASCADE_MIN_UNCERTAIN = int(os.environ.get("YOLO_CASCADE_MIN_UNCERTAIN", "2"))  # Escalate at N uncertain detections
+CASCADE_PEAK_MARGIN = int(os.environ.get("YOLO_CASCADE_PEAK_MARGIN", "1"))  # Escalate counts >= running max + N (a new peak)
+TRACKING = os.environ.get("YOLO_TRACKING", "0") == "1"           # Detect every K sampled frames, track in between
+TRACK_DETECT_EVERY = int(os.environ.get("YOLO_TRACK_DETECT_EVERY", "3"))  # K: run the detector on every Kth sampled frame
+TRACK_MAX_AGE = int(os.environ.get("YOLO_TRACK_MAX_AGE", "2"))   # Drop tracks after N detector runs without a match
+TRACK_MIN_HITS = int(os.environ.get("YOLO_TRACK_MIN_HITS", "2")) # Matches before a track counts as a unique vehicle
+TRACK_IOU = float(os.environ.get("YOLO_TRACK_IOU", "0.3"))       # Min IoU between a predicted box and a detection
+
+# Batched mode shares plain-engine forward passes between lanes, which these features cannot use:
+# fall back to the per-lane segment path so the configured detector is what runs
+BATCHED_UNSUPPORTED = [name for name, enabled in (("YOLO_CASCADE", CASCADE), ("YOLO_ADAPTIVE", ADAPTIVE_SAMPLING),
+                                                  ("YOLO_TRACKING", TRACKING)) if enabled]
+if BATCHED_INFERENCE and BATCHED_UNSUPPORTED:
+    if mp.current_process().name == 'MainProcess':
+        print(f"[YOLO] Warning: YOLO_BATCHED ignored with {', '.join(BATCHED_UNSUPPORTED)} - "
+              f"lanes run as segments", flush=True)
+    BATCHED_INFERENCE = False
+
+# Vehicle classes, per-class confidence and minimum box area live in detection_core.py
 
 # <!--- Region of Interest (ROI) - focus on traffic lanes, skip sky/borders --->
 ROI_TOP = 0.15     # Skip top 15% (sky)
@@ -62,6 +94,37 @@ ROI_LEFT = 0.0     # Use full left
 ROI_RIGHT = 1.0    # Use full right
 
 
+def detection_params():
+    """
+    Every setting that can change a lane count (used as part of the result cache key).
+    Batched mode runs the plain engine on every sampled frame, so cascade, adaptive
+    sampling and tracking do not apply to its counts.
+    """
+    batched = BATCHED_INFERENCE
+    return {
+        'model_type': MODEL_TYPE,
+        'input_size': INPUT_SIZE,
+        'skip_frames': SKIP_FRAMES,
+        'conf_threshold': CONF_THRESHOLD,
+        'nms_threshold': NMS_THRESHOLD,
+        'per_class_conf': PER_CLASS_CONF,
+        'min_box_area': MIN_BOX_AREA,
+        'min_box_area_default': MIN_BOX_AREA_DEFAULT,
+        'vehicle_classes': sorted(VEHICLE_CLASSES),
+        'roi': [ROI_TOP, ROI_BOTTOM, ROI_LEFT, ROI_RIGHT],
+        'frame_source': FRAME_SOURCE,
+        'letterbox': LETTERBOX,
+        'engine': (INFERENCE_ENGINE if INFERENCE_ENGINE == 'opencv'
+                   else f"{INFERENCE_ENGINE}:{os.path.basename(onnx_model_path())}"),
+        'motion_gate': [MOTION_THRESHOLD, MOTION_MAX_REUSE] if MOTION_GATING else None,
+        'batched': BATCH_SIZE if batched else None,
+        'cascade': [CASCADE_BAND, CASCADE_MIN_UNCERTAIN, CASCADE_PEAK_MARGIN] if CASCADE and not batched else None,
+        'adaptive': ([ADAPTIVE_COARSE, ADAPTIVE_PATIENCE, ADAPTIVE_PATIENCE_SECONDS, ADAPTIVE_MARGIN]
+                     if ADAPTIVE_SAMPLING and not batched else None),
+        'tracking': ([TRACK_DETECT_EVERY, TRACK_MAX_AGE, TRACK_MIN_HITS, TRACK_IOU]
+                     if TRACKING and not ADAPTIVE_SAMPLING and not batched else None),
+    }
+
 def get_optimal_backend():
     """Auto-detect best backend (CUDA > OpenCL > CPU)"""
     try:
@@ -71,12 +134,12 @@ def get_optimal_backend():
     except:
         pass
     try:
-        if cv.ocl.haveOpenCL():
-            print("[YOLO] OpenCL detected - using GPU acceleration", flush=True)
-            return cv.dnn.DNN_BACKEND_DEFAULT, cv.dnn.DNN_TARGET_CPU
+        if USE_OPENCL and cv.ocl.haveOpenCL():
+            print("[YOLO] OpenCL enabled - using OpenCL target", flush=True)
+            return cv.dnn.DNN_BACKEND_OPENCV, cv.dnn.DNN_TARGET_OPENCL
     except:
         pass
-    print("[YOLO] Using CPU backend", flush=True)
+    print(f"[YOLO] Using CPU backend ({DNN_THREADS} threads)", flush=True)
     return cv.dnn.DNN_BACKEND_DEFAULT, cv.dnn.DNN_TARGET_CPU
 
 def extract_roi(frame):
@@ -103,10 +166,10 @@ def filter_roi_detections(classes, boxes, roi_coords):
     
     return filtered_classes, filtered_boxes
 
-def create_model():
-    """Create a new model instance (for use in subprocess)."""
+def load_net(model_type=None):
+    """Load the raw DNN plus class names (no DetectionModel wrapper)."""
     # <!--- Choose files based on MODEL_TYPE ---->
-    if MODEL_TYPE == 'full':
+    if (model_type or MODEL_TYPE) == 'full':
         cfg_path = FULL_CFG_FILE
         weights_path = FULL_WEIGHTS_FILE
     else:  # <!-- 'tiny' -->
@@ -123,253 +186,635 @@ def create_model():
     net.setPreferableBackend(backend)
     net.setPreferableTarget(target)
     
+    return net, load_class_names()
+
+
+def load_class_names():
+    with open(CLASS_FILE, 'r') as f:
+        return [c.strip() for c in f.readlines()]
+
+
+def create_engine(model_type=None):
+    """
+    Inference engine selected by YOLO_ENGINE (see inference_engine.py) plus class names.
+    Falls back to OpenCV DNN if the ONNX Runtime engine cannot be created.
+    """
+    model_type = model_type or MODEL_TYPE
+    if INFERENCE_ENGINE == 'onnxruntime':
+        try:
+            engine = create_onnx_engine(model_type, INPUT_SIZE)
+            print(f"[YOLO] ONNX Runtime engine: {engine.model_path}", flush=True)
+            return engine, load_class_names()
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"[YOLO] ONNX Runtime unavailable ({e}) - using OpenCV DNN", flush=True)
+    net, class_names = load_net(model_type)
+    return OpenCVEngine(net, INPUT_SIZE), class_names
+
+
+def wrap_detection_model(net):
+    """Wrap a loaded net in a DetectionModel with our input parameters."""
     model = cv.dnn_DetectionModel(net)
     model.setInputParams(size=(INPUT_SIZE, INPUT_SIZE), scale=1/255, swapRB=True)
-    
-    # <!--- Load class names --->
-    with open(CLASS_FILE, 'r') as f:
-        class_names = [c.strip() for c in f.readlines()]
-    
-    return model, class_names
+    return model
 
 
-def _detect_cars_worker(video_file, result_queue, worker_id):
+def create_model():
+    """Create a new model instance (for use in a pool worker); threads/OpenCL/input size follow TUNING."""
+    engine, class_names = create_engine()
+    return (create_cascade(engine) if CASCADE else engine), class_names
+
+
+class CascadeModel:
     """
-    Worker function for multiprocessing.
-    Creates its own model instance to avoid sharing issues.
+    Tiny-then-full detector with the DetectionModel.detect interface.
+    YOLOv4-tiny screens every frame; the full YOLOv4 re-runs only when the tiny
+    output is uncertain (several scores near their PER_CLASS_CONF threshold) or its
+    count is a new peak (CASCADE_PEAK_MARGIN above the running maximum). Frames at or
+    below the current peak cannot change the lane max, so steady traffic stays on tiny.
     """
+
+    def __init__(self, tiny_model, full_model, class_names):
+        self.tiny = tiny_model
+        self.full = full_model
+        self.class_names = class_names
+        # Screen low enough to see detections just under the loosest class threshold
+        self.screen_conf = max(0.05, min([CONF_THRESHOLD] + list(PER_CLASS_CONF.values())) - CASCADE_BAND)
+        self.reset()
+
+    def reset(self, area_scale=1.0):
+        self.area_scale = area_scale    # Of the frames about to be detected (see FramePreprocessor)
+        self.frames = 0
+        self.escalated = 0
+        self.tiny_seconds = 0.0
+        self.full_seconds = 0.0
+        self.running_max = 0
+
+    def _uncertain(self, classes, scores):
+        return vehicle_filter(self.class_names).uncertain(classes, scores, CASCADE_BAND)
+
+    def detect(self, frame, conf_threshold, nms_threshold):
+        self.frames += 1
+        t0 = time.perf_counter()
+        classes, scores, boxes = self.tiny.detect(frame, self.screen_conf, nms_threshold)
+        self.tiny_seconds += time.perf_counter() - t0
+
+        classes = np.asarray(classes).reshape(-1)
+        scores = np.asarray(scores).reshape(-1)
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        uncertain = self._uncertain(classes, scores)
+        keep = scores > conf_threshold
+        classes, scores, boxes = classes[keep], scores[keep], boxes[keep]
+        count = count_vehicles(classes, scores, boxes, self.class_names, self.area_scale)
+
+        new_peak = count > 0 and count >= self.running_max + CASCADE_PEAK_MARGIN
+        if new_peak or uncertain >= CASCADE_MIN_UNCERTAIN:
+            # <!--- Escalate to the full network --->
+            self.escalated += 1
+            t0 = time.perf_counter()
+            classes, scores, boxes = self.full.detect(frame, conf_threshold, nms_threshold)
+            self.full_seconds += time.perf_counter() - t0
+            count = count_vehicles(classes, scores, boxes, self.class_names, self.area_scale)
+
+        self.running_max = max(self.running_max, count)
+        return classes, scores, boxes
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'escalated': self.escalated,
+            'tiny_seconds': round(self.tiny_seconds, 3),
+            'full_seconds': round(self.full_seconds, 3),
+        }
+
+
+def create_cascade(tiny_model):
+    """Wrap the tiny model in a CascadeModel; falls back to tiny alone if the full model is missing."""
     try:
-        print(f"[YOLO-W{worker_id}] Starting detection for {video_file}", flush=True)
-        
-        # <!--- Each worker creates its own model --->
-        model, class_names = create_model()
-        
-        if not os.path.exists(video_file):
-            result_queue.put((worker_id, video_file, None, f"File not found: {video_file}"))
-            return
-        
-        cap = cv.VideoCapture(video_file)
-        if not cap.isOpened():
-            result_queue.put((worker_id, video_file, None, f"Could not open video: {video_file}"))
-            return
-        
-        total_frames = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
-        fps_video = cap.get(cv.CAP_PROP_FPS) or 30
-        
-        print(f"[YOLO-W{worker_id}] Processing {video_file}: {total_frames} frames @ {fps_video:.1f} FPS", flush=True)
-        
-        start_time = time.time()
-        car_counts = []
-        frame_idx = 0
-        processed_count = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # <!--- Skip frames for speed --->
-            if frame_idx % (SKIP_FRAMES + 1) == 0:
-                # <!--- Extract ROI to focus on traffic lanes --->
-                frame_roi, roi_coords = extract_roi(frame)
-                # <!--- Resize ROI for faster processing --->
-                frame_resized = cv.resize(frame_roi, (INPUT_SIZE, INPUT_SIZE))
-                # <!--- Detect vehicles in ROI --->
-                classes, scores, boxes = model.detect(frame_resized, CONF_THRESHOLD, NMS_THRESHOLD)
-                # <!--- Filter detections: only count vehicles with sufficient size --->
-                vehicle_count = 0
-                for cid, score, box in zip(classes, scores, boxes):
-                    class_name = class_names[cid]
-                    if class_name in VEHICLE_CLASSES:
-                        # Apply per-class confidence threshold
-                        class_conf_threshold = PER_CLASS_CONF.get(class_name, CONF_THRESHOLD)
-                        if score < class_conf_threshold:
-                            continue
-                        
-                        x, y, w, h = box
-                        # Use per-class minimum area
-                        min_area = MIN_BOX_AREA.get(class_name, MIN_BOX_AREA_DEFAULT)
-                        if w * h >= min_area:  # Filter tiny detections
-                            vehicle_count += 1
-                car_counts.append(vehicle_count)
-                processed_count += 1
-                
+        full_engine, class_names = create_engine('full')
+    except FileNotFoundError as e:
+        print(f"[YOLO] Cascade disabled - {e}", flush=True)
+        return tiny_model
+    return CascadeModel(tiny_model, full_engine, class_names)
+
+
+def merge_cascade_stats(parts):
+    """Combine CascadeModel.stats() of several segments of one lane."""
+    merged = {key: sum(p[key] for p in parts) for key in ('frames', 'escalated', 'tiny_seconds', 'full_seconds')}
+    merged['tiny_seconds'] = round(merged['tiny_seconds'], 3)
+    merged['full_seconds'] = round(merged['full_seconds'], 3)
+    return merged
+
+
+def describe_cascade(cascade):
+    share = cascade['escalated'] / cascade['frames'] if cascade['frames'] else 0.0
+    return (f"escalated {cascade['escalated']}/{cascade['frames']} frames ({share:.0%}), "
+            f"tiny {cascade['tiny_seconds']:.2f}s, full {cascade['full_seconds']:.2f}s")
+
+
+def detect_batch(net, frames, conf_threshold=CONF_THRESHOLD, nms_threshold=NMS_THRESHOLD):
+    """
+    Detect on several frames with a single forward pass.
+    Frames may come from different lanes/cameras and have different sizes;
+    returns one (classes, scores, boxes) tuple per frame, in order.
+    """
+    if not frames:
+        return []
+    net.setInput(make_blob(frames, INPUT_SIZE))
+    outs = net.forward(net.getUnconnectedOutLayersNames())
+    rows = rows_from_outputs(outs, len(frames))
+
+    results = []
+    for i, frame in enumerate(frames):
+        h, w = frame.shape[:2]
+        results.append(_decode_detections(rows[i], w, h, conf_threshold, nms_threshold))
+    return results
+
+
+def frame_source_options():
+    """FrameSource settings (sampling step, size, ROI, mode, letterbox) used for detection."""
+    return {'step': SKIP_FRAMES + 1, 'size': INPUT_SIZE,
+            'roi': (ROI_TOP, ROI_BOTTOM, ROI_LEFT, ROI_RIGHT), 'mode': FRAME_SOURCE, 'letterbox': LETTERBOX}
+
+
+def create_preprocessor(width, height, buffers=1):
+    """FramePreprocessor for single frames (live cameras): the same ROI crop and resize as open_frame_source."""
+    roi_coords = roi_box(width, height, (ROI_TOP, ROI_BOTTOM, ROI_LEFT, ROI_RIGHT))
+    return FramePreprocessor(width, height, INPUT_SIZE, roi_coords, letterbox=LETTERBOX, buffers=buffers)
+
+
+def open_frame_source(video_file, pipeline=None, buffers=2, **kwargs):
+    """
+    Sampled, ROI-cropped, INPUT_SIZE frames for detection (see frame_source.py).
+    Frames are written into `buffers` preallocated arrays, so callers that hold on
+    to several frames at once must ask for at least that many.
+    With a pipeline spec the frames are decoded by the worker's decoder process
+    and read from shared memory (see frame_pipeline.py).
+    """
+    if pipeline is not None:
+        return PipelinedSource(pipeline, video_file, **frame_source_options(), buffers=buffers, **kwargs)
+    return FrameSource(video_file, **frame_source_options(), buffers=buffers, **kwargs)
+
+
+def create_motion_gate():
+    """A MotionGate with the configured threshold, or None when gating is off."""
+    return MotionGate(MOTION_THRESHOLD, MOTION_MAX_REUSE) if MOTION_GATING else None
+
+
+def create_tracker():
+    """A Tracker over INPUT_SIZE frames with the configured settings, or None when tracking is off."""
+    if not TRACKING:
+        return None
+    return Tracker(TRACK_MAX_AGE, TRACK_MIN_HITS, TRACK_IOU, frame_size=(INPUT_SIZE, INPUT_SIZE))
+
+
+def _scan_video(model, class_names, video_file, worker_id, start_frame=0, end_frame=None, progress=None,
+                pipeline=None):
+    """
+    Run detection over one video (or the [start_frame, end_frame) segment of it)
+    with an already-loaded model.
+    progress(frames, fps) is called every PROGRESS_EVERY processed frames.
+    pipeline is the worker's shared-memory decoder spec, if any.
+    Returns (stats, error) where stats = {'max', 'mean', 'frames'} over sampled frames,
+    plus 'motion' (skip ratio / audited count error) when motion gating is on and
+    'tracking' (detector frames / unique vehicles) when tracking is on. With tracking
+    the detector runs on every TRACK_DETECT_EVERY-th sampled frame and the per-frame
+    count is the number of tracked vehicles.
+    """
+    if ADAPTIVE_SAMPLING:
+        return _scan_video_adaptive(model, class_names, video_file, worker_id, start_frame, end_frame, progress)
+    segment = f" [{start_frame}:{end_frame if end_frame is not None else 'end'}]" if start_frame or end_frame else ""
+    print(f"[YOLO-W{worker_id}] Starting detection for {video_file}{segment}", flush=True)
+
+    if not os.path.exists(video_file):
+        return None, f"File not found: {video_file}"
+
+    try:
+        source = open_frame_source(video_file, pipeline=pipeline, start_frame=start_frame, end_frame=end_frame)
+    except IOError as e:
+        return None, str(e)
+
+    print(f"[YOLO-W{worker_id}] Processing {video_file}{segment}: {source.frame_count} frames @ {source.fps:.1f} FPS ({source.mode})", flush=True)
+
+    start_time = time.time()
+    car_counts = []
+    processed_count = 0
+    gate = create_motion_gate()
+    tracker = create_tracker()
+    cascade = model if isinstance(model, CascadeModel) else None
+    if cascade is not None:
+        cascade.reset(source.area_scale)
+
+    def infer(frame):
+        # <!--- Detect vehicles in ROI --->
+        classes, scores, boxes = model.detect(frame, CONF_THRESHOLD, NMS_THRESHOLD)
+        # <!--- Filter detections: only count vehicles with sufficient size --->
+        return count_vehicles(classes, scores, boxes, class_names, source.area_scale)
+
+    with source:
+        # <!--- Only sampled frames are decoded; they arrive ROI-cropped and resized --->
+        for frame_idx, frame_resized in source:
+            if tracker is not None:
+                # <!--- Detector every Kth sampled frame (and only on motion, if gated); tracks carry the rest --->
+                detections = None
+                if processed_count % max(1, TRACK_DETECT_EVERY) == 0 and (
+                        gate is None or gate.should_infer(frame_resized)):
+                    classes, scores, boxes = model.detect(frame_resized, CONF_THRESHOLD, NMS_THRESHOLD)
+                    detections = vehicle_detections(classes, scores, boxes, class_names, source.area_scale)
+                    if gate is not None:
+                        gate.record(len(detections))
+                car_counts.append(len(tracker.step(detections)))
+            elif gate is None:
+                car_counts.append(infer(frame_resized))
+            elif gate.should_infer(frame_resized):
+                count = infer(frame_resized)
+                gate.record(count)
+                car_counts.append(count)
+            else:
+                # <!--- Static scene: reuse the previous count --->
+                car_counts.append(gate.last_count)
+                if MOTION_AUDIT:
+                    gate.audit(infer(frame_resized))
+            processed_count += 1
+
+            if processed_count % PROGRESS_EVERY == 0:
+                elapsed = time.time() - start_time
+                fps = processed_count / elapsed if elapsed > 0 else 0
+                if progress:
+                    progress(processed_count, fps)
                 # <!--- Progress update every 100 processed frames --->
                 if processed_count % 100 == 0:
-                    elapsed = time.time() - start_time
-                    fps = processed_count / elapsed if elapsed > 0 else 0
                     print(f"[YOLO-W{worker_id}] Progress: {processed_count} frames ({fps:.1f} FPS)", flush=True)
-            
-            frame_idx += 1
-            frame = None  # <!--- Release memory --->
-        
-        cap.release()
-        
-        elapsed = time.time() - start_time
-        actual_fps = processed_count / elapsed if elapsed > 0 else 0
-        print(f"[YOLO-W{worker_id}] Done: {processed_count} frames in {elapsed:.2f}s ({actual_fps:.1f} FPS)", flush=True)
-        
-        if not car_counts:
-            result_queue.put((worker_id, video_file, 0, None))
-            return
-        
-        # <!--- Return the MAXIMUM number of vehicles seen in any frame --->
-        # <!--- This represents peak traffic load for signal timing --->
+
+    if getattr(source, 'error', None):
+        return None, source.error
+
+    elapsed = time.time() - start_time
+    actual_fps = processed_count / elapsed if elapsed > 0 else 0
+    print(f"[YOLO-W{worker_id}] Done: {processed_count} frames in {elapsed:.2f}s ({actual_fps:.1f} FPS)", flush=True)
+    if progress and processed_count % PROGRESS_EVERY:
+        progress(processed_count, actual_fps)
+
+    if not car_counts:
+        stats = {'max': 0, 'mean': 0.0, 'frames': 0}
+    else:
         max_vehicles = max(car_counts)
         avg_vehicles = np.mean(car_counts)
-        
         print(f"[YOLO-W{worker_id}] Stats: max={max_vehicles}, avg={avg_vehicles:.1f}, frames={len(car_counts)}", flush=True)
-        
-        # <!--- Use maximum for traffic signal optimization --->
-        result = int(max_vehicles)
-        result_queue.put((worker_id, video_file, result, None))
-        
-        # <!--- Cleanup --->
-        del model, class_names
-        gc.collect()
-        
-    except Exception as e:
-        print(f"[YOLO-W{worker_id}] Error: {e}", flush=True)
-        result_queue.put((worker_id, video_file, None, str(e)))
+        stats = {'max': int(max_vehicles), 'mean': float(avg_vehicles), 'frames': len(car_counts)}
+
+    if gate is not None:
+        stats['motion'] = gate.stats()
+        print(f"[YOLO-W{worker_id}] Motion gate: {describe_motion(stats['motion'], stats['max'])}", flush=True)
+    if cascade is not None:
+        stats['cascade'] = cascade.stats()
+        print(f"[YOLO-W{worker_id}] Cascade: {describe_cascade(stats['cascade'])}", flush=True)
+    if tracker is not None:
+        stats['tracking'] = tracker.stats()
+        print(f"[YOLO-W{worker_id}] Tracking: {describe_tracking(stats['tracking'])}", flush=True)
+    return stats, None
+
+
+def _scan_video_adaptive(model, class_names, video_file, worker_id, start_frame=0, end_frame=None, progress=None):
+    """
+    Peak-count scan that infers only part of the sampling grid (see adaptive_sampling.py).
+    Same return value as _scan_video; 'frames' is the number of frames actually inferred
+    and 'adaptive' = {'inferred', 'grid'} records how much of the grid was skipped.
+    """
+    segment = f" [{start_frame}:{end_frame if end_frame is not None else 'end'}]" if start_frame or end_frame else ""
+    print(f"[YOLO-W{worker_id}] Starting adaptive detection for {video_file}{segment}", flush=True)
+
+    if not os.path.exists(video_file):
+        return None, f"File not found: {video_file}"
+
+    try:
+        source = open_frame_source(video_file)
+    except IOError as e:
+        return None, str(e)
+
+    cascade = model if isinstance(model, CascadeModel) else None
+    if cascade is not None:
+        cascade.reset(source.area_scale)
+
+    start_time = time.time()
+    with source:
+        end = end_frame if end_frame is not None else source.frame_count
+        grid = list(range(start_frame, end, SKIP_FRAMES + 1))
+        inferred = [0]
+
+        def infer(frame_idx):
+            frame = source.read_at(frame_idx)
+            if frame is None:
+                return None
+            classes, scores, boxes = model.detect(frame, CONF_THRESHOLD, NMS_THRESHOLD)
+            count = count_vehicles(classes, scores, boxes, class_names, source.area_scale)
+            inferred[0] += 1
+            if progress and inferred[0] % PROGRESS_EVERY == 0:
+                elapsed = time.time() - start_time
+                progress(inferred[0], inferred[0] / elapsed if elapsed > 0 else 0)
+            return count
+
+        peak, counts = adaptive_peak(grid, infer, ADAPTIVE_COARSE, ADAPTIVE_PATIENCE,
+                                     ADAPTIVE_PATIENCE_SECONDS, ADAPTIVE_MARGIN)
+
+    elapsed = time.time() - start_time
+    actual_fps = len(counts) / elapsed if elapsed > 0 else 0
+    if progress and len(counts) % PROGRESS_EVERY:
+        progress(len(counts), actual_fps)
+    share = len(counts) / len(grid) if grid else 0
+    print(f"[YOLO-W{worker_id}] Adaptive: inferred {len(counts)}/{len(grid)} sampled frames ({share:.0%}) "
+          f"in {elapsed:.2f}s, peak={peak}", flush=True)
+
+    values = list(counts.values())
+    stats = {
+        'max': int(peak) if values else 0,
+        'mean': float(np.mean(values)) if values else 0.0,
+        'frames': len(values),
+        'adaptive': {'inferred': len(values), 'grid': len(grid)},
+    }
+    if cascade is not None:
+        stats['cascade'] = cascade.stats()
+        print(f"[YOLO-W{worker_id}] Cascade: {describe_cascade(stats['cascade'])}", flush=True)
+    return stats, None
+
+
+def _detect_video(model, class_names, video_file, worker_id, progress=None, pipeline=None):
+    """
+    Run detection over one video with an already-loaded model.
+    Returns (car_count, error) - the peak vehicle count seen in any sampled frame.
+    """
+    stats, error = _scan_video(model, class_names, video_file, worker_id, progress=progress, pipeline=pipeline)
+    if error:
+        return None, error
+    # <!--- Return the MAXIMUM number of vehicles seen in any frame --->
+    # <!--- This represents peak traffic load for signal timing --->
+    return stats['max'], None
+
+
+def merge_segment_stats(segment_stats):
+    """Combine per-segment {'max', 'mean', 'frames'} (and 'motion'/'cascade'/'adaptive'/'tracking') into one lane result."""
+    frames = sum(s['frames'] for s in segment_stats)
+    merged = {
+        'max': max((s['max'] for s in segment_stats), default=0),
+        'mean': sum(s['mean'] * s['frames'] for s in segment_stats) / frames if frames else 0.0,
+        'frames': frames,
+    }
+    motion = [s['motion'] for s in segment_stats if 'motion' in s]
+    if motion:
+        merged['motion'] = merge_motion_stats(motion)
+    cascade = [s['cascade'] for s in segment_stats if 'cascade' in s]
+    if cascade:
+        merged['cascade'] = merge_cascade_stats(cascade)
+    adaptive = [s['adaptive'] for s in segment_stats if 'adaptive' in s]
+    if adaptive:
+        merged['adaptive'] = {'inferred': sum(a['inferred'] for a in adaptive),
+                              'grid': sum(a['grid'] for a in adaptive)}
+    tracking = [s['tracking'] for s in segment_stats if 'tracking' in s]
+    if tracking:
+        merged['tracking'] = merge_tracker_stats(tracking)
+    return merged
+
+
+def _video_frame_count(video_file):
+    cap = cv.VideoCapture(video_file)
+    try:
+        return int(cap.get(cv.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+def plan_segments(frame_counts, workers):
+    """
+    Split lanes into (lane, start_frame, end_frame) jobs of roughly total/workers
+    frames each, longest first. Boundaries sit on the SKIP_FRAMES sampling grid so
+    the sampled frames are exactly those of an unsplit run; the last segment of a
+    lane is open-ended in case the container under-reports its frame count.
+    """
+    step = SKIP_FRAMES + 1
+    total = sum(frame_counts)
+    target = max(SEGMENT_MIN_FRAMES, -(-total // max(1, workers)))
+    target = -(-target // step) * step
+
+    plan = []
+    for lane, length in enumerate(frame_counts):
+        if length <= target:
+            plan.append((lane, 0, None, length))
+            continue
+        for start in range(0, length, target):
+            end = start + target if start + target < length else None
+            plan.append((lane, start, end, (end or length) - start))
+
+    plan.sort(key=lambda seg: seg[3], reverse=True)
+    return [(lane, start, end) for lane, start, end, _ in plan]
+
+
+def _detect_videos_batched(engine, class_names, video_files, worker_id, batch_size=BATCH_SIZE, progress=None):
+    """
+    Run detection over several lane videos in lockstep, stacking their sampled
+    frames into shared forward passes of up to batch_size frames.
+    progress(frames, fps, lane) is called per lane every PROGRESS_EVERY frames.
+    Plain engine only: cascade, adaptive sampling and tracking disable batched mode
+    (see BATCHED_UNSUPPORTED); every sampled frame goes into a batch.
+    Returns (counts, errors) lists aligned with video_files.
+    """
+    n = len(video_files)
+    counts = [None] * n
+    errors = [None] * n
+    car_counts = [[] for _ in range(n)]
+    gates = [create_motion_gate() for _ in range(n)]
+    sources = {}
+    area_scales = {}    # Lane -> FramePreprocessor.area_scale (sources are dropped as lanes finish)
+    frames_iter = {}
+
+    for lane, video_file in enumerate(video_files):
+        if not os.path.exists(video_file):
+            errors[lane] = f"File not found: {video_file}"
+            continue
+        try:
+            sources[lane] = open_frame_source(video_file, buffers=batch_size + 1)   # A lane holds <= batch_size frames
+        except IOError as e:
+            errors[lane] = str(e)
+            continue
+        area_scales[lane] = sources[lane].area_scale
+        frames_iter[lane] = iter(sources[lane])
+
+    print(f"[YOLO-W{worker_id}] Batched detection for {len(sources)} lanes (batch={batch_size})", flush=True)
+
+    start_time = time.time()
+    processed_count = 0
+
+    while frames_iter:
+        # <!--- Share the batch evenly between lanes that still have frames --->
+        per_lane = max(1, batch_size // len(frames_iter))
+        batch_lanes, batch_frames = [], []
+        round_lanes = list(frames_iter.keys())
+        deferred = {}   # lane -> skipped frames that must reuse a count still in this batch
+        prev = processed_count
+        for lane in list(frames_iter.keys()):
+            for _ in range(per_lane):
+                item = next(frames_iter[lane], None)
+                if item is None:
+                    del frames_iter[lane]
+                    sources.pop(lane).release()
+                    break
+                processed_count += 1
+                gate = gates[lane]
+                if gate is not None and not gate.should_infer(item[1]):
+                    # <!--- Static scene: reuse the count, keep the frame out of the batch --->
+                    if lane in batch_lanes:
+                        deferred[lane] = deferred.get(lane, 0) + 1
+                    else:
+                        car_counts[lane].append(gate.last_count)
+                    continue
+                batch_lanes.append(lane)
+                batch_frames.append(item[1])
+
+        for i in range(0, len(batch_frames), batch_size):
+            chunk = batch_frames[i:i + batch_size]
+            for lane, (classes, scores, boxes) in zip(batch_lanes[i:i + batch_size],
+                                                      engine.detect_batch(chunk, CONF_THRESHOLD, NMS_THRESHOLD)):
+                count = count_vehicles(classes, scores, boxes, class_names, area_scales[lane])
+                if gates[lane] is not None:
+                    gates[lane].record(count)
+                car_counts[lane].append(count)
+        for lane, skipped in deferred.items():
+            car_counts[lane].extend([gates[lane].last_count] * skipped)
+
+        if processed_count // PROGRESS_EVERY > prev // PROGRESS_EVERY:
+            elapsed = time.time() - start_time
+            fps = processed_count / elapsed if elapsed > 0 else 0
+            if progress:
+                for lane in round_lanes:
+                    progress(len(car_counts[lane]), len(car_counts[lane]) / elapsed if elapsed > 0 else 0, lane)
+            if processed_count // 100 > prev // 100:
+                print(f"[YOLO-W{worker_id}] Progress: {processed_count} frames ({fps:.1f} FPS)", flush=True)
+
+    elapsed = time.time() - start_time
+    actual_fps = processed_count / elapsed if elapsed > 0 else 0
+    print(f"[YOLO-W{worker_id}] Done: {processed_count} frames in {elapsed:.2f}s ({actual_fps:.1f} FPS)", flush=True)
+
+    for lane in range(n):
+        if gates[lane] is not None and errors[lane] is None:
+            motion = gates[lane].stats()
+            lane_max = max(car_counts[lane], default=0)
+            print(f"[YOLO-W{worker_id}] Lane {lane} motion gate: {describe_motion(motion, lane_max)}", flush=True)
+        if progress and errors[lane] is None:
+            progress(len(car_counts[lane]), len(car_counts[lane]) / elapsed if elapsed > 0 else 0, lane)
+        if errors[lane] is None:
+            counts[lane] = int(max(car_counts[lane])) if car_counts[lane] else 0
+    return counts, errors
 
 
 def detect_cars(video_file):
     """
     Detect cars in a single video file.
-    Uses subprocess to isolate memory and prevent leaks in main process.
+    Runs on the persistent worker pool so the main process never loads the model.
     """
-    # <!--- Use spawn method to avoid fork issues with semaphores --->
-    ctx = mp.get_context('spawn')
-    result_queue = ctx.Queue()
-    
-    proc = ctx.Process(
-        target=_detect_cars_worker,
-        args=(video_file, result_queue, 0)
-    )
-    proc.start()
-    
-    # <!--- Wait for result with timeout (5 minutes max per video) --->
-    try:
-        proc.join(timeout=300)
-        
-        if proc.is_alive():
-            print(f"[YOLO] Timeout - terminating worker for {video_file}", flush=True)
-            proc.terminate()
-            proc.join(timeout=5)
-            if proc.is_alive():
-                proc.kill()
+    results, errors = detect_cars_parallel([video_file], max_workers=1)
+    if errors[0]:
+        if errors[0] == "Timeout":
+            print(f"[YOLO] Timeout - no result for {video_file}", flush=True)
             return 0
-        
-        # <!--- Get result from queue --->
-        if not result_queue.empty():
-            worker_id, vfile, count, error = result_queue.get_nowait()
-            if error:
-                raise RuntimeError(f"Detection failed: {error}")
-            return count if count is not None else 0
-        else:
-            return 0
-            
-    except Exception as e:
-        print(f"[YOLO] Error in detect_cars: {e}", flush=True)
-        if proc.is_alive():
-            proc.terminate()
-            proc.join(timeout=5)
-        raise
-    finally:
-        result_queue.close()
-        gc.collect()
+        raise RuntimeError(f"Detection failed: {errors[0]}")
+    return results[0]
 
 
-def detect_cars_parallel(video_files, max_workers=None):
+def detect_cars_parallel(video_files, max_workers=None, timeout=600, progress=None):
     """
-    Process multiple videos in parallel using multiprocessing.
-    Uses spawn method to avoid fork semaphore issues.
+    Process multiple videos in parallel on the persistent detection pool.
+    Workers keep the model loaded between requests; see detector_pool.py.
+    With BATCHED_INFERENCE all lanes share forward passes inside one worker (it is
+    switched off at import when cascade, adaptive sampling or tracking is enabled).
+    max_workers only shapes the segment plan; the pool itself has MAX_PARALLEL_WORKERS.
+    progress(lane, frames_processed, fps) is called as workers report in.
+    Per-lane wall time (until the lane's last job finished) goes to the /metrics histogram.
     Returns list of (car_count, error) tuples for each video.
     """
+    from detector_pool import get_pool
+    from src.metrics import DETECTION_LANE_SECONDS
+
     if max_workers is None:
         max_workers = min(MAX_PARALLEL_WORKERS, len(video_files))
-    
-    print(f"[YOLO] Processing {len(video_files)} videos with {max_workers} parallel workers", flush=True)
-    
-    # Use spawn context to avoid fork issues
-    ctx = mp.get_context('spawn')
-    result_queue = ctx.Queue()
-    
-    results = [None] * len(video_files)
-    errors = [None] * len(video_files)
-    
-    # Process videos in batches to limit concurrent memory usage
-    active_procs = {}
-    video_idx = 0
-    completed = 0
-    
+
     start_time = time.time()
-    
-    while completed < len(video_files):
-        # Start new workers if we have capacity and videos remaining
-        while len(active_procs) < max_workers and video_idx < len(video_files):
-            video_file = video_files[video_idx]
-            print(f"[YOLO] Starting worker {video_idx} for {video_file}", flush=True)
-            
-            proc = ctx.Process(
-                target=_detect_cars_worker,
-                args=(video_file, result_queue, video_idx)
-            )
-            proc.start()
-            active_procs[video_idx] = proc
-            video_idx += 1
-        
-        # Check for completed workers
-        for idx in list(active_procs.keys()):
-            proc = active_procs[idx]
-            if not proc.is_alive():
-                proc.join()
-                del active_procs[idx]
-        
-        # Collect results from queue
-        while not result_queue.empty():
-            try:
-                worker_id, vfile, count, error = result_queue.get_nowait()
-                results[worker_id] = count if count is not None else 0
-                errors[worker_id] = error
-                completed += 1
-                print(f"[YOLO] Worker {worker_id} completed: {count} vehicles (errors: {error})", flush=True)
-            except:
-                break
-        
-        # Small sleep to prevent busy-waiting
-        if len(active_procs) > 0:
-            time.sleep(0.1)
-        
-        # Timeout check (10 minutes total)
-        if time.time() - start_time > 600:
-            print("[YOLO] Overall timeout - terminating remaining workers", flush=True)
-            for idx, proc in active_procs.items():
-                if proc.is_alive():
-                    proc.terminate()
-                    results[idx] = 0
-                    errors[idx] = "Timeout"
-            break
-    
-    # Cleanup any remaining processes
-    for proc in active_procs.values():
-        if proc.is_alive():
-            proc.terminate()
-            proc.join(timeout=2)
-    
-    result_queue.close()
-    gc.collect()
-    
+    pool = get_pool()   # Process-wide pool, MAX_PARALLEL_WORKERS (tuned) workers
+
+    if BATCHED_INFERENCE and len(video_files) > 1:
+        # <!--- One worker, one forward pass per batch across all lanes --->
+        print(f"[YOLO] Processing {len(video_files)} videos batched (batch={BATCH_SIZE})", flush=True)
+        on_progress = None
+        if progress:
+            on_progress = lambda frames, fps, lane: progress(lane, frames, fps)
+        job = pool.submit(video_files, kind='batch', on_progress=on_progress)
+        pool.wait_all([job], timeout)
+        if job.error:
+            results, errors = [0] * len(video_files), [job.error] * len(video_files)
+        else:
+            counts, errors = job.result
+            results = [c if c is not None else 0 for c in counts]
+        for error in errors:
+            if error is None:
+                DETECTION_LANE_SECONDS.observe(job.finished_at - start_time)
+    else:
+        # <!--- Long lanes are split so elapsed time tracks total work / workers --->
+        plan = plan_segments([_video_frame_count(v) for v in video_files], max_workers)
+        print(f"[YOLO] Processing {len(video_files)} videos as {len(plan)} segments with {max_workers} parallel workers", flush=True)
+        segment_frames = [0] * len(plan)
+
+        def segment_progress(seg):
+            # Lane progress is the sum over its segments; FPS is measured per lane
+            def report(frames, fps, _lane=None):
+                segment_frames[seg] = frames
+                lane = plan[seg][0]
+                lane_frames = sum(f for (l, _, _), f in zip(plan, segment_frames) if l == lane)
+                elapsed = time.time() - start_time
+                progress(lane, lane_frames, lane_frames / elapsed if elapsed > 0 else 0)
+            return report
+
+        jobs = [pool.submit((video_files[lane], start, end), kind='segment',
+                            on_progress=segment_progress(seg) if progress else None)
+                for seg, (lane, start, end) in enumerate(plan)]
+        pool.wait_all(jobs, timeout)
+
+        lane_stats = [[] for _ in video_files]
+        lane_finished = [start_time] * len(video_files)
+        errors = [None] * len(video_files)
+        for (lane, _, _), job in zip(plan, jobs):
+            lane_finished[lane] = max(lane_finished[lane], job.finished_at or time.time())
+            if job.error:
+                errors[lane] = errors[lane] or job.error
+            else:
+                lane_stats[lane].append(job.result)
+
+        results = [0] * len(video_files)
+        for lane, stats in enumerate(lane_stats):
+            if errors[lane] is None:
+                DETECTION_LANE_SECONDS.observe(lane_finished[lane] - start_time)
+                merged = merge_segment_stats(stats)
+                results[lane] = merged['max']
+                print(f"[YOLO] Lane {lane}: max={merged['max']}, avg={merged['mean']:.1f}, "
+                      f"frames={merged['frames']}, segments={len(stats)}", flush=True)
+                if 'motion' in merged:
+                    print(f"[YOLO] Lane {lane} motion gate: {describe_motion(merged['motion'], merged['max'])}", flush=True)
+                if 'cascade' in merged:
+                    print(f"[YOLO] Lane {lane} cascade: {describe_cascade(merged['cascade'])}", flush=True)
+                if 'adaptive' in merged:
+                    print(f"[YOLO] Lane {lane} adaptive: inferred {merged['adaptive']['inferred']}"
+                          f"/{merged['adaptive']['grid']} sampled frames", flush=True)
+                if 'tracking' in merged:
+                    print(f"[YOLO] Lane {lane} tracking: peak {merged['max']} concurrent, "
+                          f"{describe_tracking(merged['tracking'])}", flush=True)
+
     elapsed = time.time() - start_time
     print(f"[YOLO] Parallel processing complete in {elapsed:.1f}s: {results}", flush=True)
-    
+
     return results, errors
 
 
-# For backwards compatibility - simple single-video function using subprocess
+# For backwards compatibility - simple single-video function on the worker pool
 def detect_cars_safe(video_file):
     """
     Memory-safe single video detection.
-    Alias for detect_cars that uses subprocess isolation.
+    Alias for detect_cars: detection runs on the DetectionPool worker processes,
+    so the model is never loaded in the calling process.
     """
-    return detect_cars(video_file)
\ No newline at end of file
+    return detect_cars(video_file)